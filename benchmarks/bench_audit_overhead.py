@@ -0,0 +1,67 @@
+# CommandProcessor.on_command latency with and without the CSV audit sink subscribed to the
+# registry (writer thread running, fsync every second), PLC write stubbed out.
+# "burst" issues commands back-to-back (writer competes for the GIL on a saturated core),
+# "paced" issues them at a fixed rate well above what the app backend sends.
+#
+#   PYTHONPATH=src python benchmarks/bench_audit_overhead.py
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from hubcontroller.adapters.audit.csv_audit import AuditSink
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry
+
+
+class NullPlcClient:
+    def plc_write_command(self, command):
+        return PlcSendStatus.OK
+
+
+def run(n: int, sink: AuditSink | None, rate_hz: float | None = None) -> list[int]:
+    registry = CommandRegistry(max_entries=10_000)
+    if sink is not None:
+        registry.subscribe(sink.on_transition)
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    processor = CommandProcessor(registry, {"start_cycle": None}, state, Guard(), NullPlcClient())
+    commands = [Command(command_id=f"cmd-{i}", command_type="start_cycle", payload={}) for i in range(n)]
+    latencies = []
+    period_ns = int(1e9 / rate_hz) if rate_hz else 0
+    next_ns = time.perf_counter_ns()
+    for command in commands:
+        if period_ns:
+            next_ns += period_ns
+            while time.perf_counter_ns() < next_ns:
+                pass
+        t0 = time.perf_counter_ns()
+        processor.on_command(command)
+        latencies.append(time.perf_counter_ns() - t0)
+    return latencies
+
+
+def describe(name: str, latencies: list[int]) -> None:
+    q = statistics.quantiles(latencies, n=100)
+    print(f"{name:>12}: p50 {q[49] / 1000:6.2f} us  p99 {q[98] / 1000:6.2f} us  mean {statistics.fmean(latencies) / 1000:6.2f} us")
+
+
+def main() -> None:
+    run(10_000, None)  # warm-up
+    for mode, n, rate_hz in (("burst", 100_000, None), ("paced 5k/s", 15_000, 5_000)):
+        print(mode)
+        describe("no audit", run(n, None, rate_hz))
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = AuditSink(Path(tmp) / "control.csv", max_bytes=8 * 1024 * 1024)
+            sink.start()
+            describe("audit", run(n, sink, rate_hz))
+            sink.stop()
+            print(f"{'':>12}  {sink.stats.written} rows, {sink.stats.fsyncs} fsyncs, {sink.stats.rotations} rotations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Cold start: wall time of a fresh interpreter importing the protocol/domain packages, minus a
+# bare interpreter, median of RUNS. Runs with an empty environment - the imports must not need
+# any configuration - and then reports the one-time cost of the first get_settings().
+#
+#   PYTHONPATH=src python benchmarks/bench_cold_start.py
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RUNS = 15
+IMPORTS = ("hubcontroller.adapters.plc.protocol.decoders.exec_decoder, "
+           "hubcontroller.adapters.plc.protocol.decoders.ack_decoder, "
+           "hubcontroller.adapters.plc.client, hubcontroller.domain.processor")
+SETTINGS_ENV = {
+    "PLC_CONTROL_IP": "127.0.0.1", "PLC_CONTROL_READ": "1", "PLC_CONTROL_WRITE": "2", "PLC_PHOTOS_READ": "3",
+    "PLC_EXEC_READ": "4", "PLC_ACK_READ_DB": "5", "PLC_LIVEBIT": "6", "PLC_RESEND_READ": "7",
+    "HUB_NUMBER_OF_UAVS": "1", "HUB_NUMBER_OF_BATTERY": "2", "SERVER_MQTT_PORT": "1883",
+}
+
+
+def wall_ms(code: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+    return (time.perf_counter() - start) * 1e3
+
+
+def main() -> None:
+    env = {"PATH": os.environ.get("PATH", ""), "PYTHONPATH": os.environ.get("PYTHONPATH", "")}
+    bare = statistics.median(wall_ms("pass", env) for _ in range(RUNS))
+    imports = statistics.median(wall_ms(f"import {IMPORTS}", env) for _ in range(RUNS))
+    first_access = (f"import time, {IMPORTS}\n"
+                    "from hubcontroller.config.settings import get_settings\n"
+                    "from hubcontroller.adapters.plc.protocol.specs import ack_specs\n"
+                    "t = time.perf_counter(); get_settings(); ack_specs.ACK_FRAME_SPEC\n"
+                    "print((time.perf_counter() - t) * 1e3)")
+    out = subprocess.run([sys.executable, "-c", first_access], env={**env, **SETTINGS_ENV},
+                         check=True, capture_output=True, text=True).stdout
+    print(f"bare interpreter {bare:6.1f} ms  +imports {imports - bare:6.1f} ms  "
+          f"first get_settings() + spec {float(out):5.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Commands/s through ControlIngest.parse (json.loads + compiled validator + interning)
+# and end-to-end on_message + drain into a no-op sink, on one core.
+#
+#   PYTHONPATH=src python benchmarks/bench_control_ingest.py
+import json
+import time
+
+from hubcontroller.adapters.mqtt.control_ingest import ControlIngest
+
+
+def frames(n: int) -> list[bytes]:
+    types = ("start_cycle", "load_battery", "uav_landed", "safety_stop")
+    return [json.dumps({"command_id": f"6f1c2a9e-4b1d-4c55-9a8e-{i:012d}", "command_type": types[i % len(types)],
+                        "payload": {"mission_id": i % 100}}).encode() for i in range(n)]
+
+
+def main() -> None:
+    n = 200_000
+    data = frames(n)
+    ingest = ControlIngest(lambda batch: None, batch_max=64)
+
+    t0 = time.perf_counter()
+    for raw in data:
+        ingest.parse(raw)
+    parse_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for i, raw in enumerate(data):
+        ingest.on_message(raw)
+        if i % 64 == 63:
+            ingest.drain()
+    ingest.drain()
+    e2e_s = time.perf_counter() - t0
+
+    print(f"{'parse':>22}: {n / parse_s:>12,.0f} commands/s")
+    print(f"{'on_message + drain':>22}: {n / e2e_s:>12,.0f} commands/s ({ingest.stats.batches} batches)")
+
+
+if __name__ == "__main__":
+    main()
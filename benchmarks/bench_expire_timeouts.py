@@ -0,0 +1,77 @@
+# Tick cost of CommandRegistry.expire_timeouts() vs number of live records.
+#
+#   PYTHONPATH=src python benchmarks/bench_expire_timeouts.py [max_records]
+#
+# Every tick has the same small number of records due, the rest of the registry
+# is live but far from its deadline. The "full scan" column is the pre-index
+# algorithm (walk every record) run on the same registry for comparison.
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.registry import CommandRegistry
+
+DUE_PER_TICK = 100
+TICKS = 20
+
+
+class FakeClock:
+    def __init__(self, start: datetime):
+        self._t = start
+
+    def now(self) -> datetime:
+        return self._t
+
+    def advance(self, second: float) -> None:
+        self._t = self._t + timedelta(seconds=second)
+
+
+def full_scan(registry: CommandRegistry) -> int:
+    now = registry.now_utc()
+    expired = 0
+    for record in registry._by_command_id.values():
+        if record.is_terminal(): continue
+        if record.status == CommandStatus.RECEIVED:
+            if (now - record.received_at).total_seconds() >= registry.accept_timeout_s:
+                expired += 1
+    return expired
+
+
+def build(live: int) -> tuple[CommandRegistry, FakeClock]:
+    clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=clock.now, accept_timeout_s=1.0)
+    # live records received "in the future" relative to the ticks below never expire
+    clock.advance(10_000.0)
+    for i in range(live):
+        registry.on_received(Command(command_id=f"live-{i}", command_type="test", payload={}))
+    clock.advance(-10_000.0)
+    for tick in range(TICKS):
+        for i in range(DUE_PER_TICK):
+            registry.on_received(Command(command_id=f"due-{tick}-{i}", command_type="test", payload={}))
+        clock.advance(1.0)
+    clock.advance(-TICKS * 1.0)
+    return registry, clock
+
+
+def main() -> None:
+    max_records = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [n for n in (1_000, 10_000, 100_000, 1_000_000) if n <= max_records]
+    print(f"{'live':>10} {'indexed tick [us]':>18} {'full scan [us]':>15}")
+    for live in sizes:
+        registry, clock = build(live)
+        indexed = 0.0
+        for _ in range(TICKS):
+            clock.advance(1.0)
+            t0 = time.perf_counter()
+            expired = registry.expire_timeouts()
+            indexed += time.perf_counter() - t0
+            assert expired == DUE_PER_TICK, expired
+        t0 = time.perf_counter()
+        full_scan(registry)
+        scan = time.perf_counter() - t0
+        print(f"{live:>10} {indexed / TICKS * 1e6:>18.1f} {scan * 1e6:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Decodes/s of AckDecoder vs the FrameSpec-compiled decoder on the ack frame.
+#
+#   PYTHONPATH=src python benchmarks/bench_frame_decoder.py
+import struct
+import timeit
+
+from hubcontroller.adapters.plc.protocol.decoders.ack_decoder import AckDecoder
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
+from hubcontroller.adapters.plc.protocol.specs.ack_specs import ACK_FRAME_SPEC
+
+
+def put_string(data: bytearray, offset: int, max_len: int, value: bytes) -> None:
+    data[offset] = max_len
+    data[offset + 1] = len(value)
+    data[offset + 2:offset + 2 + len(value)] = value
+
+
+def ack_frame() -> bytearray:
+    data = bytearray(ACK_FRAME_SPEC.length)
+    struct.pack_into(">h", data, 0, 1)
+    put_string(data, 2, 100, b"start_cycle")
+    put_string(data, 106, 100, b"accepted")
+    put_string(data, 208, 40, b"6f1c2a9e-4b1d-4c55-9a8e-1f2d3c4b5a69")
+    struct.pack_into(">h", data, 250, 42)
+    return data
+
+
+def main() -> None:
+    frame = ack_frame()
+    view = memoryview(frame)
+    legacy = AckDecoder()
+    compiled = compile_decoder(ACK_FRAME_SPEC, AckSnapshot)
+    assert legacy.decode(frame) == compiled.decode(view)
+
+    n = 200_000
+    for name, fn in (("AckDecoder", lambda: legacy.decode(frame)),
+                     ("compiled (memoryview)", lambda: compiled.decode(view))):
+        best = min(timeit.repeat(fn, number=n, repeat=5))
+        print(f"{name:>24}: {n / best:>12,.0f} decodes/s")
+
+
+if __name__ == "__main__":
+    main()
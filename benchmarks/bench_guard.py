@@ -0,0 +1,55 @@
+# Guard.check/s: the old if/elif mode chain (new GuardDecision per call) vs the compiled table.
+#
+#   PYTHONPATH=src python benchmarks/bench_guard.py
+import timeit
+
+from hubcontroller.domain import guard as g
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard, GuardDecision, GuardDecisionReason
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+
+
+class ChainGuard:
+    # Guard.check before the decision table
+    def check(self, command, hub_state_snapshot):
+        if hub_state_snapshot is None or (hub_state_snapshot.mode == HubMode.UNKNOWN and command.command_type not in g.allowed_in_unknown):
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_STATE_UNKNOWN.value)
+        elif hub_state_snapshot.mode == HubMode.SAFETY_STOP and command.command_type not in g.allowed_in_safety_stop:
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.SAFETY_STOP_ACTIVE.value)
+        elif hub_state_snapshot.mode == HubMode.ERROR and command.command_type not in g.allowed_in_error:
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_ERROR.value)
+        elif hub_state_snapshot.mode == HubMode.HOMING_ACTIVE and command.command_type not in g.allowed_in_homing_active:
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_BUSY.value)
+        elif hub_state_snapshot.mode == HubMode.HOMING_READY and command.command_type not in g.allowed_in_homing_ready:
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
+        elif hub_state_snapshot.mode == HubMode.CYCLE_READY and command.command_type not in g.allowed_in_cycle_ready:
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
+        elif hub_state_snapshot.mode == HubMode.CYCLE_ACTIVE and command.command_type not in g.allowed_in_cycle_active:
+            return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
+        else:
+            return GuardDecision(allowed=True, reason=None)
+
+
+def main() -> None:
+    types = sorted(g.KNOWN_COMMAND_TYPES) + ["unknown_type"]
+    cases = [(Command(command_id=str(i), command_type=t, payload={}), HubStateSnapshot(mode=m, execution_state=ExecutionState.IDLE))
+             for i, (t, m) in enumerate((t, m) for t in types for m in HubMode)]
+    chain, table = ChainGuard(), Guard()
+    assert all(chain.check(c, s) == table.check(c, s) for c, s in cases)
+
+    repeat = 500
+    n = repeat * len(cases)
+    for name, guard in (("if/elif chain", chain), ("decision table", table)):
+        check = guard.check
+        best = min(timeit.repeat(lambda: [check(c, s) for c, s in cases], number=repeat, repeat=5))
+        print(f"{name:>16}: {n / best:>12,.0f} checks/s")
+    # worst case for the chain: CYCLE_ACTIVE is the last branch
+    worst = [(c, s) for c, s in cases if s.mode == HubMode.CYCLE_ACTIVE]
+    for name, guard in (("chain, last mode", chain), ("table, last mode", table)):
+        check = guard.check
+        best = min(timeit.repeat(lambda: [check(c, s) for c, s in worst], number=repeat * 7, repeat=5))
+        print(f"{name:>16}: {repeat * 7 * len(worst) / best:>12,.0f} checks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Heartbeat period deviation while CommandProcessor runs CPU-bound command bursts (BURST commands
+# back-to-back, then a 20 ms gap) on the main thread: HeartbeatEngine (absolute deadlines, own
+# thread) vs a naive "sleep(period); beat()" thread. Both share the fake write connection lock
+# with the processor. Period 20 ms, ~3 s each. Full (gen 2) gc collections hold the GIL whatever
+# thread wants it, so they are counted separately; the engine runs them itself right after a beat
+# (gc_interval_s) and lowers the GIL switch interval to 1 ms, and what is alive after wiring is frozen as the application does at startup.
+# Exits non-zero when the engine's p99 deviation under the burst is over BUDGET_MS.
+#
+#   PYTHONPATH=src python benchmarks/bench_heartbeat_jitter.py
+import gc
+import statistics
+import sys
+import threading
+import time
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcLinkStats
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry
+from hubcontroller.health.heartbeat import HeartbeatEngine
+
+PERIOD_S = 0.02
+DURATION_S = 3.0
+BURST = 1000
+BUDGET_MS = 5.0
+
+
+class FakeWriteConnection:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = PlcLinkStats()
+
+    def write_db(self, db_number, start, data):
+        with self.lock:
+            pass
+
+    def plc_write_command(self, command):
+        with self.lock:
+            return PlcSendStatus.OK
+
+
+class RecordingSink:
+    def __init__(self):
+        self.sent_ns = []
+
+    def publish_heartbeat(self, topic, payload):
+        self.sent_ns.append(time.monotonic_ns())
+        return True
+
+
+class SleepLoopHeartbeat:
+    def __init__(self, engine: HeartbeatEngine):
+        self._engine = engine
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            time.sleep(PERIOD_S)
+            self._engine.beat()
+
+
+def run(naive: bool, burst: bool) -> tuple[list[int], int]:
+    plc = FakeWriteConnection()
+    sink = RecordingSink()
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    registry = CommandRegistry(max_entries=10_000)
+    processor = CommandProcessor(registry, {"start_cycle": None}, state, Guard(), plc)
+    engine = HeartbeatEngine(plc, sink, "hub/heartbeat", state, registry, livebit_db=1, period_s=PERIOD_S,
+                             switch_interval_s=0.001, gc_interval_s=1.0)
+    heartbeat = SleepLoopHeartbeat(engine) if naive else engine
+    gc.collect()
+    gc.freeze()
+    heartbeat.start()
+    commands = 0
+    end = time.monotonic() + DURATION_S
+    while time.monotonic() < end:
+        for _ in range(BURST if burst else 0):
+            command_id = f"cmd-{commands}"
+            processor.on_command(Command(command_id=command_id, command_type="start_cycle", payload={}))
+            registry.on_accepted(command_id)
+            registry.on_executed(command_id)
+            commands += 1
+        time.sleep(0.02)
+    heartbeat.stop()
+    gc.unfreeze()
+    return sink.sent_ns, commands
+
+
+class FullGcPauses:
+    def __init__(self):
+        self.pauses_ms = []
+        self._start = 0
+
+    def __call__(self, phase, info):
+        if info["generation"] != 2:
+            return
+        if phase == "start":
+            self._start = time.perf_counter_ns()
+        else:
+            self.pauses_ms.append((time.perf_counter_ns() - self._start) / 1e6)
+
+
+def main() -> int:
+    period_ns = PERIOD_S * 1e9
+    over_budget = False
+    for name, naive, burst in (("engine idle", False, False), ("engine burst", False, True),
+                               ("sleep-loop burst", True, True)):
+        gc_pauses = FullGcPauses()
+        gc.callbacks.append(gc_pauses)
+        sent, commands = run(naive, burst)
+        gc.callbacks.remove(gc_pauses)
+        deviation = [abs(b - a - period_ns) / 1e6 for a, b in zip(sent, sent[1:])]
+        q = statistics.quantiles(deviation, n=100)
+        drift = (sent[-1] - sent[0] - (len(sent) - 1) * period_ns) / 1e6
+        print(f"{name:>17}: {len(sent):4d} beats  period deviation p50 {q[49]:5.2f} ms  p99 {q[98]:5.2f} ms  "
+              f"max {max(deviation):5.2f} ms  drift {drift:7.2f} ms  ({commands / DURATION_S:6.0f} cmd/s, "
+              f"{len(gc_pauses.pauses_ms)} full gc, max {max(gc_pauses.pauses_ms, default=0):.1f} ms)")
+        if name == "engine burst" and q[98] > BUDGET_MS:
+            print(f"engine p99 deviation {q[98]:.2f} ms is over the {BUDGET_MS} ms budget")
+            over_budget = True
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# Command journal: append cost per registry transition and crash recovery time for 1M journal
+# records (250k commands, received -> dispatched -> accepted -> executed), then for the same
+# state after a checkpoint (snapshot, empty journal).
+#
+# Measured on a slow single-core box: 1M journal records -> CompactCommandRegistry in
+# 0.64-0.77 s, the 250k-record snapshot in ~0.39 s. CommandRegistry has to build a Command and a
+# CommandRecord per command and takes 1.4-1.7 s / 1.0-1.3 s.
+#
+#   PYTHONPATH=src python benchmarks/bench_journal_recovery.py
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from hubcontroller.adapters.persistence.command_journal import CommandJournal
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.compact_registry import CompactCommandRegistry
+from hubcontroller.domain.registry import CommandRegistry
+
+COMMANDS = 250_000
+
+
+def fill(path: Path) -> float:
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock, ttl_s=1e9)
+    journal = CommandJournal(path, snapshot_bytes=1 << 40)
+    journal.attach(registry)
+    journal.start()
+    start = time.perf_counter()
+    for i in range(COMMANDS):
+        command_id = f"cmd-{i:08d}"
+        registry.on_received(Command(command_id=command_id, command_type="start_cycle", payload={}))
+        registry.on_dispatched(command_id)
+        registry.on_accepted(command_id)
+        registry.on_executed(command_id)
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return elapsed
+
+
+def baseline() -> float:
+    registry = CommandRegistry(clock=ManualClock(), ttl_s=1e9)
+    start = time.perf_counter()
+    for i in range(COMMANDS):
+        command_id = f"cmd-{i:08d}"
+        registry.on_received(Command(command_id=command_id, command_type="start_cycle", payload={}))
+        registry.on_dispatched(command_id)
+        registry.on_accepted(command_id)
+        registry.on_executed(command_id)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "commands.journal"
+        plain = baseline()
+        journaled = fill(path)
+        transitions = COMMANDS * 4
+        print(f"transitions: {transitions}, journal {path.stat().st_size / 1e6:.1f} MB")
+        print(f"append overhead: {(journaled - plain) / transitions * 1e6:.2f} us/transition "
+              f"({plain:.2f} s plain, {journaled:.2f} s journaled)", flush=True)
+
+        recover(path, "journal", CompactCommandRegistry)
+        recover(path, "journal", CommandRegistry)
+        registry = CommandRegistry(clock=ManualClock(), ttl_s=1e9)
+        journal = CommandJournal(path)
+        journal.recover(registry)
+        journal.attach(registry)
+        start = time.perf_counter()
+        journal.checkpoint(force=True)
+        queued = time.perf_counter()
+        journal.sync()  # the committer thread's part
+        print(f"checkpoint: {(queued - start) * 1e3:.0f} ms on the registry thread, "
+              f"{(time.perf_counter() - queued) * 1e3:.0f} ms writing the snapshot", flush=True)
+        journal.close()
+        recover(path, "snapshot", CompactCommandRegistry)
+        recover(path, "snapshot", CommandRegistry)
+
+
+def recover(path: Path, label: str, registry_cls: type[CommandRegistry]) -> None:
+    # recovery runs at process start, so it is timed in a fresh interpreter, not in this one's
+    # heap left over from filling the journal
+    for _ in range(3):
+        subprocess.run([sys.executable, __file__, "recover", str(path), label, registry_cls.__name__], check=True)
+
+
+def recover_once(path: Path, label: str, registry_cls: type[CommandRegistry]) -> None:
+    registry = registry_cls(clock=ManualClock(), ttl_s=1e9)
+    journal = CommandJournal(path)
+    start = time.perf_counter()
+    restored = journal.recover(registry)
+    elapsed = time.perf_counter() - start
+    print(f"recover from {label} into {registry_cls.__name__}: {journal.stats.recovered_records} records "
+          f"-> {restored} commands in {elapsed * 1e3:.0f} ms", flush=True)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["recover"]:
+        registries = {cls.__name__: cls for cls in (CommandRegistry, CompactCommandRegistry)}
+        recover_once(Path(sys.argv[2]), sys.argv[3], registries[sys.argv[4]])
+    else:
+        main()
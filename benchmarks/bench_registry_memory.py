@@ -0,0 +1,56 @@
+# Memory per live record: dict-of-dataclasses CommandRegistry vs CompactCommandRegistry.
+#
+#   PYTHONPATH=src python benchmarks/bench_registry_memory.py [records]
+#
+# Commands are built inside the measured window and only the registry keeps them, like commands
+# from the ingest do, so "store" is everything a live record keeps alive (record, Command, payload,
+# command_id string, index entry). "total" adds the deadline heap (same for both backends).
+#
+# Measured here (100k records, CPython 3.11): CommandRegistry 413 B/record, CompactCommandRegistry
+# 151 B/record, a ratio of 0.36. What is left per compact record: the 7 int64 timestamps, the
+# status byte, the id/type/order columns, ~10 B of command_id table and the command_id string (~60 B).
+import gc
+import sys
+import tracemalloc
+
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.compact_registry import CompactCommandRegistry
+from hubcontroller.domain.registry import CommandRegistry
+
+
+def measure(registry_cls: type[CommandRegistry], n: int) -> tuple[int, int]:
+    clock = ManualClock()
+    gc.collect()
+    tracemalloc.start()
+    registry = registry_cls(clock=clock)
+    for i in range(n):
+        registry.on_received(Command(command_id=f"cmd-{i}", command_type="test", payload={}))
+        clock.advance(0.000_001)
+    # typical mix: most commands got dispatched and accepted
+    for i in range(n * 3 // 4):
+        registry.on_dispatched(f"cmd-{i}")
+        registry.on_accepted(f"cmd-{i}")
+    gc.collect()
+    total, _ = tracemalloc.get_traced_memory()
+    registry._deadlines = []
+    gc.collect()
+    store, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del registry
+    return total, store
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f"{'backend':>24} {'total [MiB]':>12} {'store [MiB]':>12} {'store/record [B]':>17}")
+    per_record = []
+    for registry_cls in (CommandRegistry, CompactCommandRegistry):
+        total, store = measure(registry_cls, n)
+        per_record.append(store / n)
+        print(f"{registry_cls.__name__:>24} {total / 2**20:>12.1f} {store / 2**20:>12.1f} {store / n:>17.0f}")
+    print(f"compact/dict: {per_record[1] / per_record[0]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
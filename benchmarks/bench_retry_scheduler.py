@@ -0,0 +1,56 @@
+# Healthy-command throughput while some commands hit a flapping PLC link: blocking retries
+# (time.sleep backoff inside on_command) vs RetryScheduler driven by processor.tick().
+# Every 500th command's writes keep failing; tick() runs every 50 commands.
+#
+#   PYTHONPATH=src python benchmarks/bench_retry_scheduler.py
+import statistics
+import time
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry
+from hubcontroller.domain.retry_scheduler import RetryScheduler
+
+N = 5_000
+FLAPPING_EVERY = 500
+
+
+class FlappingPlcClient:
+    def plc_write_command(self, command):
+        return PlcSendStatus.ERROR if command.payload.get("flapping") else PlcSendStatus.OK
+
+
+def run(use_scheduler: bool) -> tuple[float, list[int]]:
+    registry = CommandRegistry(max_entries=10_000)
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    plc = FlappingPlcClient()
+    scheduler = RetryScheduler(registry, plc.plc_write_command) if use_scheduler else None
+    processor = CommandProcessor(registry, {"start_cycle": None}, state, Guard(), plc, retry_scheduler=scheduler)
+    commands = [Command(command_id=f"cmd-{i}", command_type="start_cycle",
+                        payload={"flapping": True} if i % FLAPPING_EVERY == 0 else {}) for i in range(N)]
+    latencies = []
+    start = time.perf_counter()
+    for i, command in enumerate(commands):
+        t0 = time.perf_counter_ns()
+        processor.on_command(command)
+        if not command.payload:
+            latencies.append(time.perf_counter_ns() - t0)
+        if i % 50 == 0:
+            processor.tick()
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    for name, use_scheduler in (("blocking", False), ("scheduler", True)):
+        elapsed, latencies = run(use_scheduler)
+        q = statistics.quantiles(latencies, n=100)
+        print(f"{name:>10}: {len(latencies) / elapsed:9.0f} healthy cmd/s  p50 {q[49] / 1000:6.1f} us  "
+              f"p99 {q[98] / 1000:6.1f} us  total {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# Whole command path against the in-process PLC simulator: CommandProcessor -> PlcClient ->
+# PlcAdapter -> SimulatedPlc, with ack and exec frames polled and cleared through AckGateway the
+# way the pollers do. Lognormal accept/execute latencies, 1% dropped acks (-> timeouts), 1% acks
+# with an error (-> failed) and 1% resend requests (the command is written again); ~3 s per run.
+# Stage latencies come from CommandMetrics.
+#
+#   PYTHONPATH=src python benchmarks/bench_sim_pipeline.py
+import time
+
+from hubcontroller.adapters.plc.client import PlcClient
+from hubcontroller.adapters.plc.gateway.exec_gateway import AckGateway
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.adapters.plc.protocol.specs.ack_specs import build_ack_frame_spec
+from hubcontroller.adapters.plc.protocol.specs.control_specs import build_control_frame_spec
+from hubcontroller.adapters.plc.protocol.specs.exec_specs import build_exec_frame_spec, build_resend_frame_spec
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
+from hubcontroller.config.settings import Settings
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry
+from hubcontroller.health.command_metrics import CommandMetrics
+from hubcontroller.sim.plc_simulator import PlcBehaviour, SimulatedPlc, lognormal
+
+DURATION_S = 3.0
+BATCH = 20  # commands written per loop, then every posted ack/exec frame is drained
+
+SETTINGS = Settings.from_env({
+    "PLC_CONTROL_IP": "127.0.0.1", "PLC_CONTROL_READ": "1", "PLC_CONTROL_WRITE": "2", "PLC_PHOTOS_READ": "3",
+    "PLC_EXEC_READ": "4", "PLC_ACK_READ_DB": "5", "PLC_LIVEBIT": "6", "PLC_RESEND_READ": "7",
+    "HUB_NUMBER_OF_UAVS": "1", "HUB_NUMBER_OF_BATTERY": "2", "SERVER_MQTT_PORT": "1883",
+})
+
+
+def drain(gateway: AckGateway, on_frame) -> int:
+    n = 0
+    snapshot = gateway.read_ack_snapshot()
+    while gateway.consume_ack_trigger(snapshot):
+        on_frame(snapshot)
+        n += 1
+        snapshot = gateway.read_ack_snapshot()
+    return n
+
+
+def run(behaviour: PlcBehaviour) -> None:
+    sim = SimulatedPlc.from_settings(SETTINGS, behaviour)
+    adapter = PlcAdapter(SETTINGS.plc_control_ip, 0, 1, 102, client_factory=sim.client)
+    ack_spec, exec_spec = build_ack_frame_spec(SETTINGS), build_exec_frame_spec(SETTINGS)
+    acks = AckGateway(adapter, compile_decoder(ack_spec, AckSnapshot), ack_spec)
+    execs = AckGateway(adapter, compile_decoder(exec_spec, ExecSnapshot), exec_spec)
+    resend_spec = build_resend_frame_spec(SETTINGS)
+    resends = AckGateway(adapter, compile_decoder(resend_spec, ExecSnapshot), resend_spec)
+
+    registry = CommandRegistry(accept_timeout_s=0.2, exec_timeout_s=1.0, max_entries=20_000)
+    registry.dispatch_timeout_s = 0.2
+    metrics = CommandMetrics()
+    metrics.attach(registry)
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    client = PlcClient(adapter, build_control_frame_spec(SETTINGS))
+    processor = CommandProcessor(registry, {"start_cycle": None}, state, Guard(), client)
+
+    def on_ack(frame):
+        # an error ack comes after the dispatch, REJECTED is only reachable from RECEIVED
+        (registry.on_failed if frame.error else registry.on_accepted)(frame.token)
+
+    def on_exec(frame):
+        (registry.on_failed if frame.error else registry.on_executed)(frame.token)
+
+    def on_resend(frame):
+        record = registry.get_record(frame.token)
+        if record is not None and not record.is_terminal():
+            client.plc_write_command(record.command)
+
+    def poll():
+        drain(resends, on_resend)
+        drain(acks, on_ack)
+        drain(execs, on_exec)
+        return registry.expire_timeouts()
+
+    sent = timeouts = 0
+    start = time.perf_counter()
+    end = start + DURATION_S
+    while time.perf_counter() < end:
+        for _ in range(BATCH):
+            processor.on_command(Command(command_id=f"cmd-{sent}", command_type="start_cycle", payload={}))
+            sent += 1
+        timeouts += poll()
+    # let the tail finish without sending more
+    tail_end = time.perf_counter() + 1.5
+    while time.perf_counter() < tail_end and registry.in_flight_count:
+        timeouts += poll()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    stats = sim.stats
+    outcomes = {}
+    for type_metrics in metrics.by_type.values():
+        for status, n in type_metrics.outcomes.items():
+            outcomes[status.value] = outcomes.get(status.value, 0) + n
+    print(f"  {sent} commands in {elapsed:.2f} s ({sent / elapsed:6.0f} cmd/s), PLC reads {stats.reads} writes {stats.writes}")
+    print(f"  simulator: dropped {stats.dropped} rejected {stats.rejected} resends {stats.resends} "
+          f"failed {stats.failed}; hub timeouts {timeouts}, still in flight {registry.in_flight_count}")
+    print(f"  outcomes: {outcomes}")
+    stages = metrics.by_type["start_cycle"].stages
+    for name, histogram in zip(("dispatch", "accept", "execute"), stages):
+        if histogram.count:
+            print(f"  {name:>8}: p50 {histogram.quantile_ns(0.5) / 1e6:7.2f} ms  "
+                  f"p99 {histogram.quantile_ns(0.99) / 1e6:7.2f} ms  max {histogram.max_ns / 1e6:7.2f} ms")
+
+
+def main() -> None:
+    print("instant PLC (mailbox round trips only):")
+    run(PlcBehaviour())
+    print("lognormal latencies, 1% drops/rejects/resends:")
+    run(PlcBehaviour(accept_latency=lognormal(0.002), execute_latency=lognormal(0.010),
+                     ack_drop_rate=0.01, reject_rate=0.01, resend_rate=0.01, seed=1))
+
+
+if __name__ == "__main__":
+    main()
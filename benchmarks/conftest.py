@@ -0,0 +1,34 @@
+# pytest-benchmark suite for the domain and protocol hot paths (benchmarks/test_perf_*.py).
+# The standalone bench_*.py scripts next to it are not collected; `pytest` alone (testpaths)
+# does not run this suite, and without pytest-benchmark every module is skipped.
+#
+#   pip install -e ".[bench]"
+#
+# Save a baseline (JSON under benchmarks/baselines/<machine>/NNNN_<name>.json):
+#   PYTHONPATH=src python -m pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+#
+# Compare against the latest saved run, failing when a median got more than 20% slower:
+#   PYTHONPATH=src python -m pytest benchmarks --benchmark-storage=benchmarks/baselines \
+#       --benchmark-compare --benchmark-compare-fail=median:20%
+#
+# Baselines are only comparable on the machine that recorded them. The 1M-record cases take
+# most of the run; -k "not 1M" leaves them out.
+import pytest
+
+from hubcontroller.config import settings as settings_module
+from hubcontroller.config.settings import Settings
+
+BENCH_ENV = {
+    "PLC_CONTROL_IP": "127.0.0.1", "PLC_CONTROL_READ": "1", "PLC_CONTROL_WRITE": "2", "PLC_PHOTOS_READ": "3",
+    "PLC_EXEC_READ": "4", "PLC_ACK_READ_DB": "5", "PLC_LIVEBIT": "6", "PLC_RESEND_READ": "7",
+    "HUB_NUMBER_OF_UAVS": "1", "HUB_NUMBER_OF_BATTERY": "2", "SERVER_MQTT_PORT": "1883",
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def settings():
+    # fixed DB numbers, so the lazily built frame specs never read the environment
+    settings = Settings.from_env(BENCH_ENV)
+    settings_module.configure(settings)
+    yield settings
+    settings_module.configure(None)
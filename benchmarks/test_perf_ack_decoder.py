@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from hubcontroller.adapters.plc.protocol.decoders.ack_decoder import AckDecoder  # noqa: E402
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder  # noqa: E402
+from hubcontroller.adapters.plc.protocol.encoders.frame_encoder import compile_encoder  # noqa: E402
+from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot  # noqa: E402
+from hubcontroller.adapters.plc.protocol.specs import ack_specs  # noqa: E402
+
+
+@pytest.fixture
+def frame() -> bytearray:
+    # a full ack frame as read from the PLC
+    return bytearray(compile_encoder(ack_specs.ACK_FRAME_SPEC).encode({
+        "trigger": 1, "command": "start_cycle", "error": 0, "message": "accepted",
+        "token": "6f1c2a9e-2b7d-4c1e-9f3a-5d8e7b6a4c21", "mission_id": 42,
+    }))
+
+
+def test_ack_decoder_decode(benchmark, frame):
+    snapshot = benchmark(AckDecoder().decode, frame)
+    assert snapshot.token == "6f1c2a9e-2b7d-4c1e-9f3a-5d8e7b6a4c21" and snapshot.mission_id == 42
+
+
+def test_compiled_ack_decoder_decode(benchmark, frame):
+    # what the pollers use; kept next to AckDecoder so the gap between the two stays visible
+    snapshot = benchmark(compile_decoder(ack_specs.ACK_FRAME_SPEC, AckSnapshot).decode, memoryview(frame))
+    assert snapshot.token == "6f1c2a9e-2b7d-4c1e-9f3a-5d8e7b6a4c21" and snapshot.mission_id == 42
@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus  # noqa: E402
+from hubcontroller.domain.commands import Command  # noqa: E402
+from hubcontroller.domain.guard import KNOWN_COMMAND_TYPES, Guard  # noqa: E402
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot  # noqa: E402
+from hubcontroller.domain.hub_state_provider import HubStateProvider  # noqa: E402
+from hubcontroller.domain.processor import CommandProcessor  # noqa: E402
+from hubcontroller.domain.registry import CommandRegistry  # noqa: E402
+
+# every known command type plus one the policy never mentions
+COMMANDS = [Command(command_id=f"cmd-{t}", command_type=t, payload={})
+            for t in sorted(KNOWN_COMMAND_TYPES) + ["not_a_command"]]
+
+
+class FakePlcClient:
+    def plc_write_command(self, command: Command) -> PlcSendStatus:
+        return PlcSendStatus.OK
+
+    def plc_write_commands(self, commands: list[Command]) -> list[PlcSendStatus]:
+        return [PlcSendStatus.OK] * len(commands)
+
+
+@pytest.mark.parametrize("mode", list(HubMode), ids=[m.value for m in HubMode])
+def test_guard_check_all_command_types(benchmark, mode):
+    guard = Guard()
+    snapshot = HubStateSnapshot(mode=mode, execution_state=ExecutionState.IDLE)
+    check = guard.check
+
+    def check_all():
+        for command in COMMANDS:
+            check(command, snapshot)
+
+    benchmark(check_all)
+
+
+@pytest.mark.parametrize("command_type", ["start_cycle", "start_mission"], ids=["dispatched", "guard_rejected"])
+def test_processor_on_command(benchmark, command_type):
+    # CYCLE_READY: start_cycle goes to the PLC, start_mission is rejected by the guard
+    registry = CommandRegistry(max_entries=100_000)
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    processor = CommandProcessor(registry, {"start_cycle": None, "start_mission": None}, state, Guard(),
+                                 FakePlcClient())
+    calls = itertools.count()
+    payload = {"mission_id": 1}
+
+    benchmark(lambda: processor.on_command(Command(command_id=f"cmd-{next(calls)}", command_type=command_type,
+                                                   payload=payload)))
+    # the cap evicts the early commands once the benchmark runs more than 100k calls; the last one is always there
+    assert registry.get_record(f"cmd-{next(calls) - 1}") is not None
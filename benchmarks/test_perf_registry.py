@@ -0,0 +1,80 @@
+import itertools
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from hubcontroller.domain.clock import ManualClock  # noqa: E402
+from hubcontroller.domain.commands import Command, CommandStatus  # noqa: E402
+from hubcontroller.domain.registry import CommandRegistry  # noqa: E402
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+DUE = 100  # records expiring / evicted per tick
+STEP_NS = 1_000  # received_ns spacing of the prefilled records
+PAYLOAD = {"mission_id": 1}
+
+
+def prefilled(n: int, status: CommandStatus, **kwargs) -> tuple[CommandRegistry, ManualClock]:
+    # n live records received STEP_NS apart, restored the way journal recovery does it
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock, **kwargs)
+    stamp = {CommandStatus.DISPATCHED: 1, CommandStatus.ACCEPTED: 2, CommandStatus.EXECUTED: 3}[status]
+
+    def rows():
+        for i in range(n):
+            stamps = [i * STEP_NS, None, None, None, None, None, None]
+            for s in range(1, stamp + 1):
+                stamps[s] = i * STEP_NS
+            yield Command(command_id=f"cmd-{i}", command_type="start_cycle", payload=PAYLOAD), status, stamps
+
+    registry.restore_records(rows())
+    clock.advance(n * STEP_NS / 1e9)
+    return registry, clock
+
+
+def ticks(clock: ManualClock, timeout_s: float, n: int):
+    # moves the clock to one step before the oldest record is due; each call then makes DUE more due
+    clock.advance(timeout_s - (n + 1) * STEP_NS / 1e9)
+    step_s = DUE * STEP_NS / 1e9
+    return lambda: clock.advance(step_s)
+
+
+@pytest.fixture(params=list(SIZES), ids=list(SIZES))
+def size(request) -> int:
+    return SIZES[request.param]
+
+
+def test_lifecycle_transitions(benchmark, size):
+    # received -> dispatched -> accepted -> executed for one new command next to `size` in flight
+    registry, clock = prefilled(size, CommandStatus.ACCEPTED, exec_timeout_s=3600.0)
+    ids = (f"new-{i}" for i in itertools.count())
+
+    def lifecycle():
+        command_id = next(ids)
+        registry.on_received(Command(command_id=command_id, command_type="start_cycle", payload=PAYLOAD))
+        registry.on_dispatched(command_id)
+        registry.on_accepted(command_id)
+        registry.on_executed(command_id)
+
+    benchmark(lifecycle)
+    assert registry.get_record("new-0").status == CommandStatus.EXECUTED
+
+
+def test_expire_timeouts(benchmark, size):
+    # every tick DUE dispatched records reach their deadline, the rest stays in flight
+    registry, clock = prefilled(size, CommandStatus.DISPATCHED)
+    due = ticks(clock, registry.dispatch_timeout_s, size)
+
+    rounds = min(size // DUE - 1, 200)
+    benchmark.pedantic(registry.expire_timeouts, setup=due, rounds=rounds)
+    assert registry.in_flight_count == size - rounds * DUE
+
+
+def test_gc_ttl(benchmark, size):
+    # every tick the DUE oldest terminal records pass their TTL
+    registry, clock = prefilled(size, CommandStatus.EXECUTED)
+    due = ticks(clock, registry.ttl_s, size)
+
+    rounds = min(size // DUE - 1, 200)
+    benchmark.pedantic(registry.gc_ttl, setup=due, rounds=rounds)
+    assert registry.eviction_stats.ttl == rounds * DUE
@@ -0,0 +1,275 @@
+from __future__ import annotations
+import csv
+import gzip
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.domain.clock import EPOCH_UTC, Clock
+from hubcontroller.domain.commands import CommandStatus
+from hubcontroller.domain.registry import CommandRecord
+
+logger = logging.getLogger(__name__)
+
+CONTROL_HEADER = ("timestamp", "command_id", "command_type", "status")
+SNAPSHOT_HEADER = ("timestamp", "token", "command", "trigger", "error", "message", "mission_id")
+
+_STATUS_NS = {
+    CommandStatus.RECEIVED: "received_ns",
+    CommandStatus.DISPATCHED: "dispatched_ns",
+    CommandStatus.ACCEPTED: "accepted_ns",
+    CommandStatus.EXECUTED: "executed_ns",
+    CommandStatus.REJECTED: "rejected_ns",
+    CommandStatus.TIMEOUT: "timeout_ns",
+    CommandStatus.FAILED: "failed_ns",
+}
+
+
+@dataclass(slots=True)
+class AuditStats:
+    written: int = 0
+    fsyncs: int = 0
+    rotations: int = 0
+    compressed: int = 0
+    write_errors: int = 0
+    dropped: int = 0  # rows not queued because max_pending rows were already waiting
+
+
+class RotatingCsvFile:
+    # One audit stream. Only touched by the AuditSink writer thread.
+    # Rotates when the file reaches max_bytes or is older than max_age_s; the rotated segment is
+    # renamed to <name>.<UTC timestamp>.<n> and handed to compress() (gzip on another thread).
+    def __init__(self, path: str | Path, header: tuple[str, ...], max_bytes: int, max_age_s: float, compress):
+        self.path = Path(path)
+        self._header = header
+        self._max_bytes = max_bytes
+        self._max_age_s = max_age_s
+        self._compress = compress
+        self._file = None
+        self._writer = None
+        self._opened_at = 0.0
+        self._seq = 0
+        self.dirty = False
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", newline="", encoding="utf-8", buffering=1 << 16)
+        self._writer = csv.writer(self._file)
+        if self._file.tell() == 0:
+            self._writer.writerow(self._header)
+        self._opened_at = time.monotonic()
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        if self._file is None:
+            self._open()
+        self._writer.writerows(rows)
+        self.dirty = True
+
+    def sync(self, fsync: bool) -> bool:
+        if self._file is None or not self.dirty:
+            return False
+        self._file.flush()
+        if fsync:
+            os.fsync(self._file.fileno())
+        self.dirty = not fsync
+        return fsync
+
+    def rotate_if_due(self) -> bool:
+        if self._file is None:
+            return False
+        if self._file.tell() < self._max_bytes and time.monotonic() - self._opened_at < self._max_age_s:
+            return False
+        self.close()
+        self._seq += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}.{self._seq}")
+        os.replace(self.path, rotated)
+        self._compress(rotated)
+        return True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self.sync(fsync=True)
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+
+def gzip_segment(path: Path) -> Path:
+    target = path.with_name(path.name + ".gz")
+    with open(path, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.remove(path)
+    return target
+
+
+class AuditSink:
+    # CSV audit of command transitions (control), AckSnapshots (ack) and ExecSnapshots (exec).
+    # Producers only build a small tuple and deque.append() it - no lock, no I/O on the hot path.
+    # At most max_pending rows wait; past that new rows are counted in stats.dropped, not queued.
+    # One writer thread drains the queue every flush_interval_s, writes through a 64 KiB buffer,
+    # fsyncs at most every fsync_interval_s and rotates by size/age; gzip of rotated segments
+    # runs on a separate single-thread executor. Rows a failed write did not take go back to the
+    # front of the queue and are written by the next flush.
+    def __init__(self, control_path: str | Path | None, ack_path: str | Path | None = None, exec_path: str | Path | None = None,
+                 max_bytes: int = 64 * 1024 * 1024, max_age_s: float = 24 * 3600.0, flush_interval_s: float = 0.05,
+                 fsync_interval_s: float = 1.0, compress_rotated: bool = True, max_pending: int = 100_000):
+        if max_pending < 1:
+            raise ValueError(f"max_pending must be >= 1, got {max_pending}")
+        self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audit-gzip")
+        compress = self._submit_compress if compress_rotated else (lambda path: None)
+        self._streams: dict[str, RotatingCsvFile] = {}
+        for name, path, header in (("control", control_path, CONTROL_HEADER), ("ack", ack_path, SNAPSHOT_HEADER),
+                                   ("exec", exec_path, SNAPSHOT_HEADER)):
+            if path:
+                self._streams[name] = RotatingCsvFile(path, header, max_bytes, max_age_s, compress)
+        self._queue: deque[tuple[str, Any, int, tuple]] = deque()
+        self._max_pending = max_pending
+        self._flush_interval_s = flush_interval_s
+        self._fsync_interval_s = fsync_interval_s
+        self._chunk_rows = 128
+        self._timestamps = _TimestampFormatter()
+        self._last_fsync = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.stats = AuditStats()
+
+    # --- producers (any thread) ---
+
+    def on_transition(self, record: CommandRecord) -> None:
+        # CommandRegistry.subscribe() listener; copies the fields now, the record keeps changing
+        if len(self._queue) >= self._max_pending:
+            self.stats.dropped += 1
+            return
+        status = record.status
+        command = record.command
+        self._queue.append(("control", record.clock, getattr(record, _STATUS_NS[status]),
+                            (command.command_id, command.command_type, status.value)))
+
+    def on_ack(self, snapshot: AckSnapshot) -> None:
+        self._append_snapshot("ack", snapshot)
+
+    def on_exec(self, snapshot: ExecSnapshot) -> None:
+        self._append_snapshot("exec", snapshot)
+
+    def _append_snapshot(self, stream: str, s: AckSnapshot | ExecSnapshot) -> None:
+        if len(self._queue) >= self._max_pending:
+            self.stats.dropped += 1
+            return
+        self._queue.append((stream, None, time.time_ns(), (s.token, s.command, s.trigger, s.error, s.message, s.mission_id)))
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    # --- writer ---
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(fsync=True)
+        for stream in self._streams.values():
+            stream.close()
+        self._compressor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._flush_interval_s):
+            try:
+                self.flush()
+            except Exception:
+                self.stats.write_errors += 1
+                logger.exception("Audit flush failed")
+
+    def flush(self, fsync: bool | None = None) -> int:
+        # writer-thread side; also usable synchronously when the thread is not started
+        queue = self._queue
+        n = len(queue)
+        done = 0
+        while done < n:
+            # small chunks with a GIL hand-off in between, so a large backlog never holds
+            # the interpreter for a whole switch interval while the poll/command threads wait
+            chunk = min(self._chunk_rows, n - done)
+            entries = [queue.popleft() for _ in range(chunk)]
+            rows: dict[str, list[tuple]] = {}
+            timestamp = self._timestamps.format
+            for stream, clock, ns, fields in entries:
+                rows.setdefault(stream, []).append((timestamp(clock, ns),) + fields)
+            written: set[str] = set()
+            for name, stream_rows in rows.items():
+                stream = self._streams.get(name)
+                if stream is not None:
+                    try:
+                        stream.write_rows(stream_rows)
+                    except Exception:
+                        # back to the front, in queue order, whatever this and the later streams did not take
+                        queue.extendleft(reversed([entry for entry in entries if entry[0] not in written]))
+                        raise
+                    self.stats.written += len(stream_rows)
+                written.add(name)
+            done += chunk
+            time.sleep(0)
+
+        now = time.monotonic()
+        if fsync is None:
+            fsync = now - self._last_fsync >= self._fsync_interval_s
+        for stream in self._streams.values():
+            if stream.sync(fsync):
+                self.stats.fsyncs += 1
+            if stream.rotate_if_due():
+                self.stats.rotations += 1
+        if fsync:
+            self._last_fsync = now
+        return n
+
+    def _submit_compress(self, path: Path) -> None:
+        future = self._compressor.submit(gzip_segment, path)
+        future.add_done_callback(self._on_compressed)
+
+    def _on_compressed(self, future) -> None:
+        if future.exception() is not None:
+            logger.error("Compressing audit segment failed: %s", future.exception())
+        else:
+            self.stats.compressed += 1
+
+
+class _TimestampFormatter:
+    # ISO-8601 UTC with microseconds, like datetime.isoformat(), but the date/time prefix is
+    # formatted once per second. Registry clocks map ns to wall time linearly, so each clock's
+    # offset is taken once from to_utc().
+    def __init__(self):
+        self._offsets: dict[Clock, int] = {}
+        self._second = -1
+        self._prefix = ""
+
+    def format(self, clock: Clock | None, ns: int) -> str:
+        if clock is not None:
+            offset = self._offsets.get(clock)
+            if offset is None:
+                delta = clock.to_utc(ns) - EPOCH_UTC
+                offset = (delta // timedelta(microseconds=1)) * 1000 - ns
+                self._offsets[clock] = offset
+            ns += offset
+        us = ns // 1000
+        second, micro = divmod(us, 1_000_000)
+        if second != self._second:
+            self._second = second
+            self._prefix = (EPOCH_UTC + timedelta(seconds=second)).strftime("%Y-%m-%dT%H:%M:%S")
+        return f"{self._prefix}.{micro:06d}+00:00"
@@ -0,0 +1,173 @@
+from __future__ import annotations
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Protocol
+
+from hubcontroller.health.metrics import DEFAULT_DEPTH_BUCKETS, Histogram
+
+logger = logging.getLogger(__name__)
+
+
+class MqttPublisher(Protocol):
+    # paho.mqtt.client.Client and InMemoryBroker both fit
+    def publish(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False) -> Any: ...
+
+
+class OutboundKind(str, Enum):
+    ACK = "ack"
+    EXEC = "exec"
+    HEARTBEAT = "heartbeat"
+
+
+@dataclass(eq=False, slots=True)
+class OutboundEvent:
+    kind: OutboundKind
+    topic: str
+    payload: dict
+    command_id: str | None = None
+    enqueued_ns: int = field(default_factory=time.monotonic_ns)
+
+
+@dataclass(slots=True)
+class OutboundStats:
+    enqueued: int = 0
+    published_events: int = 0
+    published_messages: int = 0
+    heartbeats_merged: int = 0
+    heartbeats_dropped: int = 0
+    events_dropped: int = 0  # ack/exec lost because the queue was full of ack/exec
+    publish_errors: int = 0
+
+
+class MqttOutbound:
+    # Bounded outbound queue drained by one background thread.
+    # - offer() never blocks: a queued heartbeat is merged with the new one (latest state wins);
+    #   on a full queue heartbeats are dropped first, ack/exec only when nothing else is left to drop
+    # - the drainer waits at most batch_window_s after the first event (or batch_max events) and
+    #   publishes each run of consecutive same-topic events as one message with a JSON array payload,
+    #   so queue order - and with it per-command_id order - is kept on the wire
+    def __init__(self, publisher: MqttPublisher, max_queue: int = 1000, batch_window_s: float = 0.005,
+                 batch_max: int = 50, qos: int = 1):
+        if max_queue <= 0 or batch_max <= 0:
+            raise ValueError("max_queue and batch_max must be > 0")
+        self._publisher = publisher
+        self._max_queue = max_queue
+        self._batch_window_s = batch_window_s
+        self._batch_max = batch_max
+        self._qos = qos
+        self._queue: deque[OutboundEvent] = deque()
+        self._pending_heartbeat: OutboundEvent | None = None
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self.stats = OutboundStats()
+        self.publish_latency = Histogram()  # enqueue -> publish returned, seconds
+        self.queue_depth = Histogram(DEFAULT_DEPTH_BUCKETS)  # sampled at every drain
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._drain_loop, name="mqtt-outbound", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        # publishes what is already queued, then stops the drainer
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+            self._thread = None
+
+    def publish_ack(self, topic: str, command_id: str, payload: dict) -> bool:
+        return self.offer(OutboundEvent(OutboundKind.ACK, topic, payload, command_id))
+
+    def publish_exec(self, topic: str, command_id: str, payload: dict) -> bool:
+        return self.offer(OutboundEvent(OutboundKind.EXEC, topic, payload, command_id))
+
+    def publish_heartbeat(self, topic: str, payload: dict) -> bool:
+        return self.offer(OutboundEvent(OutboundKind.HEARTBEAT, topic, payload))
+
+    def offer(self, event: OutboundEvent) -> bool:
+        with self._cond:
+            if event.kind == OutboundKind.HEARTBEAT:
+                pending = self._pending_heartbeat
+                if pending is not None and pending.topic == event.topic:
+                    # keep the queue slot and original enqueue time, refresh the state
+                    pending.payload = event.payload
+                    self.stats.heartbeats_merged += 1
+                    return True
+                if len(self._queue) >= self._max_queue:
+                    self.stats.heartbeats_dropped += 1
+                    return False
+                self._pending_heartbeat = event
+            elif len(self._queue) >= self._max_queue:
+                if self._pending_heartbeat is None:
+                    self.stats.events_dropped += 1
+                    logger.warning("MQTT outbound queue full, dropping %s for %s", event.kind.value, event.command_id)
+                    return False
+                self._queue.remove(self._pending_heartbeat)
+                self._pending_heartbeat = None
+                self.stats.heartbeats_dropped += 1
+            self._queue.append(event)
+            self.stats.enqueued += 1
+            self._cond.notify()
+            return True
+
+    def _take_batch(self) -> list[OutboundEvent] | None:
+        with self._cond:
+            while not self._queue:
+                if not self._running:
+                    return None
+                self._cond.wait()
+            deadline = time.monotonic() + self._batch_window_s
+            while len(self._queue) < self._batch_max and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self.queue_depth.observe(len(self._queue))
+            n = min(self._batch_max, len(self._queue))
+            batch = [self._queue.popleft() for _ in range(n)]
+            if self._pending_heartbeat is not None and self._pending_heartbeat in batch:
+                self._pending_heartbeat = None
+            return batch
+
+    def _drain_loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self.publish_batch(batch)
+
+    def publish_batch(self, batch: list[OutboundEvent]) -> None:
+        start = 0
+        for i in range(1, len(batch) + 1):
+            if i == len(batch) or batch[i].topic != batch[start].topic:
+                self._publish_run(batch[start:i])
+                start = i
+
+    def _publish_run(self, run: list[OutboundEvent]) -> None:
+        payload = json.dumps([e.payload for e in run], separators=(",", ":")).encode("utf-8")
+        try:
+            self._publisher.publish(run[0].topic, payload, qos=self._qos)
+        except Exception:
+            self.stats.publish_errors += 1
+            logger.exception("MQTT publish to %s failed (%d events)", run[0].topic, len(run))
+            return
+        now = time.monotonic_ns()
+        for event in run:
+            self.publish_latency.observe((now - event.enqueued_ns) / 1e9)
+        self.stats.published_events += len(run)
+        self.stats.published_messages += 1
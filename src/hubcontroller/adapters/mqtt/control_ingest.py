@@ -0,0 +1,201 @@
+from __future__ import annotations
+import json
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import KNOWN_COMMAND_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ControlFieldRule:
+    name: str
+    kind: type
+    required: bool = True
+    max_len: int | None = None  # str only; matches the PLC control frame STRING lengths
+
+
+# {"command_id": "...", "command_type": "...", "payload": {...}}
+CONTROL_SCHEMA = (
+    ControlFieldRule(name="command_id", kind=str, max_len=40),
+    ControlFieldRule(name="command_type", kind=str, max_len=100),
+    ControlFieldRule(name="payload", kind=dict, required=False),
+)
+
+
+def compile_control_validator(schema: Iterable[ControlFieldRule]) -> Callable[[Any], str | None]:
+    # Resolves the schema once into a table of (name, kind, required, max_len, reject reasons),
+    # so validating a frame builds no strings; returns the reject reason or None.
+    table = tuple(
+        (rule.name, rule.kind, rule.required, rule.kind is str and rule.required,
+         rule.max_len if rule.kind is str else None,
+         f"missing_{rule.name}", f"invalid_{rule.name}", f"empty_{rule.name}", f"too_long_{rule.name}")
+        for rule in schema
+    )
+
+    def validate(frame: Any) -> str | None:
+        if type(frame) is not dict:
+            return "not_an_object"
+        for name, kind, required, non_empty, max_len, missing, invalid, empty, too_long in table:
+            v = frame.get(name)
+            if v is None:
+                if required:
+                    return missing
+                continue
+            if type(v) is not kind:
+                return invalid
+            if non_empty and not v:
+                return empty
+            # STRING lengths on the PLC are in bytes; only non-ASCII strings need encoding to check
+            if max_len is not None and (len(v) > max_len or (not v.isascii() and len(v.encode("utf-8")) > max_len)):
+                return too_long
+        return None
+
+    return validate
+
+
+@dataclass(slots=True)
+class IngestStats:
+    accepted: int = 0
+    rejected: dict[str, int] = field(default_factory=dict)  # reason -> count
+    batches: int = 0
+    sink_errors: int = 0
+    dropped: int = 0  # valid commands refused because max_queued were already waiting
+
+
+class ControlIngest:
+    # CONTROL_TOPIC -> Command:
+    # - json.loads + the compiled validator; malformed frames never reach CommandRegistry.on_received
+    # - command_type is interned against the guard's known types, so registry/guard lookups
+    #   hash an already-cached string and every command of one type shares one object
+    # - valid commands are queued and handed to sink in micro-batches (batch_max or batch_window_s)
+    #   by one consumer thread, off the MQTT network thread
+    # - the queue holds at most max_queued commands; with a stuck sink new ones are dropped and
+    #   counted (stats.dropped, on_reject "queue_full") instead of blocking the network thread
+    def __init__(self, sink: Callable[[list[Command]], Any], known_command_types: Iterable[str] = KNOWN_COMMAND_TYPES,
+                 schema: Iterable[ControlFieldRule] = CONTROL_SCHEMA, batch_max: int = 64, batch_window_s: float = 0.002,
+                 on_reject: Callable[[bytes, str], None] | None = None, max_queued: int = 10_000):
+        self._sink = sink
+        self._validate = compile_control_validator(schema)
+        self._interned = {sys.intern(t): sys.intern(t) for t in known_command_types}
+        self._batch_max = batch_max
+        self._batch_window_s = batch_window_s
+        self._on_reject = on_reject
+        self._max_queued = max_queued
+        self._queue: deque[Command] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._running = False
+        self.stats = IngestStats()
+
+    def _reject(self, raw: bytes, reason: str) -> None:
+        rejected = self.stats.rejected
+        rejected[reason] = rejected.get(reason, 0) + 1
+        if self._on_reject is not None:
+            self._on_reject(raw, reason)
+
+    def parse(self, raw: bytes | str) -> Command | None:
+        try:
+            frame = json.loads(raw)
+        except (ValueError, TypeError):
+            self._reject(raw, "invalid_json")
+            return None
+        reason = self._validate(frame)
+        if reason is not None:
+            self._reject(raw, reason)
+            return None
+        command_type = frame["command_type"]
+        return Command(command_id=frame["command_id"],
+                       command_type=self._interned.get(command_type, command_type),
+                       payload=frame.get("payload") or {})
+
+    def on_message(self, raw: bytes | str) -> bool:
+        command = self.parse(raw)
+        if command is None:
+            return False
+        with self._cond:
+            if len(self._queue) < self._max_queued:
+                self._queue.append(command)
+                self.stats.accepted += 1
+                # wake the consumer for the first command and again once the batch is full
+                if len(self._queue) == 1 or len(self._queue) == self._batch_max:
+                    self._cond.notify()
+                return True
+            self.stats.dropped += 1
+        if self._on_reject is not None:
+            self._on_reject(raw, "queue_full")
+        return False
+
+    def on_paho_message(self, client: Any, userdata: Any, message: Any) -> None:
+        # paho on_message callback signature
+        self.on_message(message.payload)
+
+    def take_batch(self, timeout_s: float | None = None) -> list[Command]:
+        with self._cond:
+            if not self._queue and self._running:
+                self._cond.wait(timeout_s)
+            if not self._queue:
+                return []
+            deadline = time.monotonic() + self._batch_window_s
+            while len(self._queue) < self._batch_max and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(self._batch_max, len(self._queue))
+            return [self._queue.popleft() for _ in range(n)]
+
+    def drain(self) -> int:
+        # synchronous hand-off of everything queued; returns number of commands delivered
+        delivered = 0
+        while True:
+            with self._cond:
+                n = min(self._batch_max, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(n)]
+            if not batch:
+                return delivered
+            self._deliver(batch)
+            delivered += len(batch)
+
+    def _deliver(self, batch: list[Command]) -> None:
+        self.stats.batches += 1
+        try:
+            self._sink(batch)
+        except Exception:
+            self.stats.sink_errors += 1
+            logger.exception("Control ingest sink failed for %d commands", len(batch))
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._consume_loop, name="mqtt-control-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+            if self._thread.is_alive():
+                # still inside the sink; draining here would run the sink on two threads at once
+                logger.warning("Control ingest consumer did not stop within %.1fs, leaving %d commands queued",
+                               timeout_s, len(self._queue))
+                return
+            self._thread = None
+        self.drain()
+
+    def _consume_loop(self) -> None:
+        while self._running:
+            batch = self.take_batch()
+            if batch:
+                self._deliver(batch)
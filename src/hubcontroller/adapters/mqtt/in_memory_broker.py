@@ -0,0 +1,51 @@
+from __future__ import annotations
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+
+@dataclass(frozen=True, slots=True)
+class BrokerMessage:
+    topic: str
+    payload: bytes
+    qos: int
+    retain: bool
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    # MQTT filter matching: '+' one level, trailing '#' any number of levels
+    f_parts = topic_filter.split("/")
+    t_parts = topic.split("/")
+    for i, part in enumerate(f_parts):
+        if part == "#":
+            return True
+        if i >= len(t_parts) or (part != "+" and part != t_parts[i]):
+            return False
+    return len(f_parts) == len(t_parts)
+
+
+class InMemoryBroker:
+    # In-process MQTT broker stand-in for tests and local runs: publish() has the paho
+    # Client.publish signature, every message is kept in .messages and fanned out to subscribers.
+    def __init__(self):
+        self.messages: list[BrokerMessage] = []
+        self._subscribers: list[tuple[str, Callable[[BrokerMessage], None]]] = []
+        self._lock = threading.Lock()
+
+    def publish(self, topic: str, payload: bytes | str = b"", qos: int = 0, retain: bool = False) -> None:
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        message = BrokerMessage(topic=topic, payload=bytes(payload), qos=qos, retain=retain)
+        with self._lock:
+            self.messages.append(message)
+            subscribers = [cb for f, cb in self._subscribers if topic_matches(f, topic)]
+        for callback in subscribers:
+            callback(message)
+
+    def subscribe(self, topic_filter: str, callback: Callable[[BrokerMessage], None]) -> None:
+        with self._lock:
+            self._subscribers.append((topic_filter, callback))
+
+    def messages_on(self, topic: str) -> list[BrokerMessage]:
+        with self._lock:
+            return [m for m in self.messages if m.topic == topic]
@@ -0,0 +1,519 @@
+from __future__ import annotations
+import gc
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+from hashlib import blake2b
+from itertools import accumulate, compress, repeat
+from operator import attrgetter
+from pathlib import Path
+from typing import Any
+
+from hubcontroller.domain.clock import EPOCH_UTC, Clock
+from hubcontroller.domain.commands import CommandStatus
+from hubcontroller.domain.registry import NO_TS, CommandRecord, CommandRegistry, RecordColumns
+
+logger = logging.getLogger(__name__)
+
+# Journal = sequence of frames, one per group commit: FRAME header (magic, record count, crc32 of
+# the body, payload count, payload bytes) followed by count RECORDs and the payloads of the commands
+# received in that commit (payload count PAYLOAD_ENTRYs, then the JSON of each). A crash mid-write
+# leaves a frame whose crc does not match - replay stops there and the tail is cut off.
+FRAME = struct.Struct("<4sIIII44x")
+FRAME_MAGIC = b"CJF3"
+PAYLOAD_ENTRY = struct.Struct("<qQ")  # command seq, JSON length
+# A record is the command's whole state after a transition, so replay only has to keep the last
+# record of each command: command seq (a number the journal gives each command_id it sees),
+# the 7 wall-clock timestamps in CommandStatus order (NO_TS = not reached), status code,
+# command_id length, command_type index, command_id (STRING40 like the control frame token).
+# The snapshot is one FRAME of the same records (type definitions first) + payloads of the open commands.
+RECORD = struct.Struct("<q7qBBH40s4x")
+RECORD_SIZE = RECORD.size
+_SEQ_WORDS = RECORD_SIZE // 8  # seq and timestamps are int64 words 0..7 of a record
+_CODE_AT = 64
+_ID_LEN_AT = 65
+_TYPE_AT = 66
+_ID_AT = 68
+MAX_ID_BYTES = 40
+TYPE_DEF = 0xFF  # status code of a record that defines command_type index -> name (seq -1, name in the id field)
+# status code of a record saying gc/capacity eviction dropped the command_id in the id field (seq -1):
+# the earlier records of that command_id are dropped on replay. Terminal commands keep no seq here.
+EVICTED = 0xFE
+UNKNOWN_TYPE = 0xFFFF
+
+# status code == CommandStatus order == timestamp column
+_STATUSES = tuple(CommandStatus)
+_STATUS_CODE = {status: code for code, status in enumerate(_STATUSES)}
+_TS_FIELDS = tuple(f"{status.value}_ns" for status in _STATUSES)
+_OPEN = frozenset({CommandStatus.RECEIVED, CommandStatus.DISPATCHED, CommandStatus.ACCEPTED})
+_OPEN_CODES = frozenset(_STATUS_CODE[s] for s in _OPEN)
+_OPEN_MASK = bytes(code in _OPEN_CODES for code in range(256))  # bytes.translate table
+_stamps_of = attrgetter(*_TS_FIELDS)
+_NO_STAMPS = (NO_TS,) * len(_TS_FIELDS)
+
+
+def command_id_hash(raw: bytes) -> int:
+    return int.from_bytes(blake2b(raw, digest_size=8).digest(), "little")
+
+
+def wall_offset_ns(clock: Clock) -> int:
+    # registry clocks map ns to wall time linearly: wall_ns = ns + offset
+    ns = clock.now_ns()
+    return (clock.to_utc(ns) - EPOCH_UTC) // timedelta(microseconds=1) * 1000 - ns
+
+
+def frame(records: list[bytes], payloads: list[tuple[int, bytes]] = ()) -> bytes:
+    # records (journal or snapshot), then (command seq, JSON) payloads
+    body = b"".join(records)
+    payload = b"".join([PAYLOAD_ENTRY.pack(seq, len(raw)) for seq, raw in payloads] + [raw for _, raw in payloads])
+    crc = zlib.crc32(payload, zlib.crc32(body))
+    return FRAME.pack(FRAME_MAGIC, len(records), crc, len(payloads), len(payload)) + body + payload
+
+
+@dataclass(slots=True)
+class JournalStats:
+    appended: int = 0
+    evictions: int = 0
+    commits: int = 0
+    snapshots: int = 0
+    skipped_long_ids: int = 0
+    skipped_payloads: int = 0  # not JSON-serializable, recovered as {}
+    recovered_records: int = 0
+    recovered_commands: int = 0
+    torn_bytes: int = 0
+
+
+@dataclass(slots=True)
+class _Checkpoint:
+    # what the registry thread hands the committer: the live records, the seqs of the open ones and
+    # command types at the cut; terminal records get seqs from next_seq on
+    records: list[CommandRecord]
+    seqs: dict[str, int]
+    type_names: list[str]
+    next_seq: int
+
+
+class CommandJournal:
+    # Optional write-ahead journal for CommandRegistry.
+    # - attach() subscribes to registry transitions and evictions; each one becomes a RECORD appended
+    #   to an in-memory deque (no I/O on the registry thread); a received command's payload is queued
+    #   as is and JSON-encoded by the committer. command_id -> seq is kept here for open commands only.
+    # - a committer thread writes everything pending every commit_interval_s as one frame with one
+    #   write + fdatasync (group commit); sync() forces a commit
+    # - checkpoint() (registry thread, e.g. after gc_ttl) only takes the list of live records and
+    #   queues it; the committer commits what was pending before it, writes <path>.snap from it and
+    #   truncates the journal, so disk use stays bounded. Records changed after the cut are newer in
+    #   the journal than in the snapshot, and the journal is replayed after it.
+    # - recover() mmaps snapshot + journal and keeps the last record of each command seq, with bytes
+    #   and column operations rather than per-record Python code, then hands the registry columns
+    #   (restore_columns). Open commands get their payload back, so RECEIVED/DISPATCHED ones can be
+    #   sent again; terminal ones come back with an empty payload; evicted ones do not come back.
+    def __init__(self, path: str | Path, commit_interval_s: float = 0.005, snapshot_bytes: int = 16 * 1024 * 1024,
+                 fsync: bool = True):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_name(self.path.name + ".snap")
+        self._commit_interval_s = commit_interval_s
+        self._snapshot_bytes = snapshot_bytes
+        self._fsync = fsync
+        # RECORD bytes, (command seq, payload) tuples and _Checkpoint markers, in transition order
+        self._pending: deque[bytes | tuple[int, Any] | _Checkpoint] = deque()
+        self._types: dict[str, int] = {}
+        self._type_names: list[str] = []
+        self._seqs: dict[str, int] = {}
+        self._next_seq = 0
+        self._file_lock = threading.Lock()
+        self._file = None
+        self._offset = 0
+        self._wall_offset = 0
+        self._registry: CommandRegistry | None = None
+        self._unsubscribe: list = []
+        self._checkpoint_queued = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.stats = JournalStats()
+
+    # --- recovery ---
+
+    def recover(self, registry: CommandRegistry) -> int:
+        # call before attach(); returns the number of commands restored
+        replay = _Replay()
+        # a few hundred thousand strings are created here; the cyclic gc has nothing to find in them
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with _mapped(self.snapshot_path) as snapshot, _mapped(self.path) as journal:
+                if snapshot is not None:
+                    self.stats.recovered_records += replay.snapshot(snapshot, self.snapshot_path)
+                size = good = 0
+                if journal is not None:
+                    size = len(journal)
+                    good = replay.journal(journal)
+                    self.stats.recovered_records += replay.journal_records
+                try:
+                    columns, seqs = replay.columns(wall_offset_ns(registry._clock))
+                finally:
+                    replay.release()
+            for index, name in sorted(replay.type_names.items()):
+                self._types.setdefault(name, index)
+            self._type_names = [replay.type_names.get(i, "") for i in range(max(replay.type_names, default=-1) + 1)]
+            self._seqs.update(compress(zip(columns.command_ids, seqs), columns.status.translate(_OPEN_MASK)))
+            self._next_seq = max(self._next_seq, replay.next_seq)
+            restored = registry.restore_columns(columns)
+            if good < size:
+                # torn frame from a crash mid-commit; cut it so new frames are appended after valid data
+                self.stats.torn_bytes += size - good
+                logger.warning("Command journal %s: cutting %d torn bytes", self.path, size - good)
+                with open(self.path, "r+b") as f:
+                    f.truncate(good)
+        finally:
+            if gc_enabled:
+                gc.enable()
+        self.stats.recovered_commands = restored
+        return restored
+
+    # --- appending ---
+
+    def attach(self, registry: CommandRegistry) -> None:
+        self._registry = registry
+        self._wall_offset = wall_offset_ns(registry._clock)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab", buffering=0)
+        self._offset = self._file.tell()
+        self._unsubscribe = [registry.subscribe(self.on_transition), registry.subscribe_evictions(self.on_evicted)]
+
+    def _type_index(self, command_type: str) -> int:
+        index = self._types.get(command_type)
+        if index is not None:
+            return index
+        raw = command_type.encode("utf-8")
+        if len(raw) > MAX_ID_BYTES or len(self._type_names) >= UNKNOWN_TYPE:
+            return UNKNOWN_TYPE
+        index = len(self._type_names)
+        self._type_names.append(command_type)
+        self._types[command_type] = index
+        self._pending.append(RECORD.pack(-1, *_NO_STAMPS, TYPE_DEF, len(raw), index, raw))
+        return index
+
+    def _record(self, seq: int, record: CommandRecord, raw: bytes, type_index: int) -> bytes:
+        offset = self._wall_offset
+        return RECORD.pack(seq, *[NO_TS if ns is None else ns + offset for ns in _stamps_of(record)],
+                           _STATUS_CODE[record.status], len(raw), type_index, raw)
+
+    def on_transition(self, record: CommandRecord) -> None:
+        command = record.command
+        command_id = command.command_id
+        raw = command_id.encode("utf-8")
+        seq = self._seqs.get(command_id)
+        if seq is None:
+            if len(raw) > MAX_ID_BYTES:
+                self.stats.skipped_long_ids += 1
+                return
+            seq = self._seqs[command_id] = self._next_seq
+            self._next_seq += 1
+        if record.status is CommandStatus.RECEIVED and command.payload:
+            self._pending.append((seq, command.payload))
+        self._pending.append(self._record(seq, record, raw, self._type_index(command.command_type)))
+        self.stats.appended += 1
+        if record.status not in _OPEN:
+            del self._seqs[command_id]  # terminal is final; an eviction names the command_id
+
+    def on_evicted(self, record: CommandRecord) -> None:
+        command_id = record.command.command_id
+        self._seqs.pop(command_id, None)
+        raw = command_id.encode("utf-8")
+        if len(raw) <= MAX_ID_BYTES:
+            self._pending.append(RECORD.pack(-1, *_NO_STAMPS, EVICTED, len(raw), 0, raw))
+            self.stats.evictions += 1
+
+    def sync(self) -> int:
+        # group commit of everything appended so far; safe from any thread
+        with self._file_lock:
+            return self._commit_locked()
+
+    def _commit_locked(self) -> int:
+        pending = self._pending
+        n = len(pending)
+        if n == 0 or self._file is None:
+            return 0
+        records: list[bytes] = []
+        payloads: list[tuple[int, bytes]] = []
+        committed = 0
+        for _ in range(n):
+            item = pending.popleft()
+            if type(item) is bytes:
+                records.append(item)
+            elif type(item) is tuple:
+                entry = self._payload_entry(*item)
+                if entry is not None:
+                    payloads.append(entry)
+            else:
+                committed += self._write_locked(records, payloads)
+                records, payloads = [], []
+                self._write_snapshot_locked(item)
+        return committed + self._write_locked(records, payloads)
+
+    def _payload_entry(self, seq: int, payload: Any) -> tuple[int, bytes] | None:
+        try:
+            return seq, json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        except (TypeError, ValueError):
+            self.stats.skipped_payloads += 1
+            return None
+
+    def _write_locked(self, records: list[bytes], payloads: list[tuple[int, bytes]]) -> int:
+        if not records and not payloads:
+            return 0
+        data = frame(records, payloads)
+        self._file.write(data)
+        if self._fsync:
+            os.fdatasync(self._file.fileno())
+        self._offset += len(data)
+        self.stats.commits += 1
+        return len(records)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="command-journal", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._commit_interval_s):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Command journal commit failed")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+        with self._file_lock:
+            self._commit_locked()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # --- snapshots ---
+
+    def checkpoint(self, force: bool = False) -> bool:
+        # registry thread only: takes the list of live records and queues the snapshot for the
+        # committer (next commit or sync()); True if one was queued
+        if self._registry is None or self._checkpoint_queued or (not force and self._offset < self._snapshot_bytes):
+            return False
+        self._checkpoint_queued = True
+        records = list(self._registry.records())
+        self._pending.append(_Checkpoint(records, dict(self._seqs), list(self._type_names), self._next_seq))
+        self._next_seq += len(records)
+        return True
+
+    def _write_snapshot_locked(self, checkpoint: _Checkpoint) -> None:
+        try:
+            types = self._types
+            seqs = checkpoint.seqs
+            # type definitions first, so the command records form one contiguous run
+            rows = []
+            for index, name in enumerate(checkpoint.type_names):
+                raw = name.encode("utf-8")
+                rows.append(RECORD.pack(-1, *_NO_STAMPS, TYPE_DEF, len(raw), index, raw))
+            payloads = []
+            next_seq = checkpoint.next_seq
+            for record in checkpoint.records:
+                command = record.command
+                raw = command.command_id.encode("utf-8")
+                if len(raw) > MAX_ID_BYTES:
+                    continue
+                seq = seqs.get(command.command_id)
+                if seq is None:
+                    seq = next_seq
+                    next_seq += 1
+                rows.append(self._record(seq, record, raw, types.get(command.command_type, UNKNOWN_TYPE)))
+                if _STATUS_CODE[record.status] in _OPEN_CODES and command.payload:
+                    entry = self._payload_entry(seq, command.payload)
+                    if entry is not None:
+                        payloads.append(entry)
+
+            tmp = self.snapshot_path.with_name(self.snapshot_path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(frame(rows, payloads))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            _fsync_dir(self.snapshot_path.parent)
+            # everything before the cut is in the snapshot; what came after is still pending
+            self._file.truncate(0)
+            os.fsync(self._file.fileno())
+            self._offset = 0
+            self.stats.snapshots += 1
+        finally:
+            self._checkpoint_queued = False
+
+
+class _Replay:
+    # The record regions of the snapshot and of every valid journal frame are joined, in order,
+    # into one buffer; the last record of each command seq is that command's state. Payloads are
+    # kept as (view, start, end) and only decoded for commands that end up open.
+    def __init__(self):
+        self._regions: list[memoryview] = []
+        self.type_names: dict[int, str] = {}
+        self._payloads: dict[int, tuple[memoryview, int, int]] = {}
+        self.journal_records = 0
+        self.next_seq = 0
+
+    def snapshot(self, view: memoryview, path: Path) -> int:
+        if len(view) < FRAME.size:
+            return 0
+        magic, count, crc, payload_count, payload_bytes = FRAME.unpack_from(view)
+        end = FRAME.size + count * RECORD_SIZE
+        # written to a temp file and renamed, so anything but a complete snapshot is disk damage
+        if (magic != FRAME_MAGIC or end + payload_bytes > len(view)
+                or zlib.crc32(view[FRAME.size:end + payload_bytes]) != crc):
+            logger.error("Command journal snapshot %s is corrupt, ignoring it", path)
+            return 0
+        self._regions.append(view[FRAME.size:end])
+        self._add_payloads(view, end, payload_count)
+        return count
+
+    def _add_payloads(self, view: memoryview, start: int, count: int) -> None:
+        if not count:
+            return
+        entries = view[start:start + count * PAYLOAD_ENTRY.size].cast("q")
+        blobs = start + count * PAYLOAD_ENTRY.size
+        ends = list(accumulate(entries[1::2].tolist(), initial=blobs))
+        self._payloads.update(zip(entries[0::2].tolist(), zip(repeat(view), ends, ends[1:])))
+        entries.release()
+
+    def journal(self, view: memoryview) -> int:
+        # returns the end of the last valid frame
+        size = len(view)
+        replayed = 0
+        good = 0
+        while good + FRAME.size <= size:
+            magic, count, crc, payload_count, payload_bytes = FRAME.unpack_from(view, good)
+            start = good + FRAME.size
+            records_end = start + count * RECORD_SIZE
+            end = records_end + payload_bytes
+            if magic != FRAME_MAGIC or end > size or zlib.crc32(view[start:end]) != crc:
+                break
+            self._regions.append(view[start:records_end])
+            self._add_payloads(view, records_end, payload_count)
+            replayed += count
+            good = end
+        self.journal_records = replayed
+        return good
+
+    def columns(self, offset: int) -> tuple[RecordColumns, list[int]]:
+        # the restore columns (first-seen order) and the seq of each row
+        rows = b"".join(self._regions)
+        self._regions.clear()
+        words = memoryview(rows).cast("q")
+        seqs = words[0::_SEQ_WORDS].tolist()
+        words.release()
+        codes = rows[_CODE_AT::RECORD_SIZE]
+        i = codes.find(TYPE_DEF)
+        while i != -1:
+            at = i * RECORD_SIZE
+            self.type_names[int.from_bytes(rows[at + _TYPE_AT:at + _TYPE_AT + 2], "little")] = (
+                _raw_id(rows, at).decode("utf-8"))
+            i = codes.find(TYPE_DEF, i + 1)
+        # raw command_id -> offset of its last eviction
+        evicted = {}
+        i = codes.find(EVICTED)
+        while i != -1:
+            evicted[_raw_id(rows, i * RECORD_SIZE)] = i * RECORD_SIZE
+            i = codes.find(EVICTED, i + 1)
+        # command seq -> offset of its last record, in the order the seqs were first seen
+        # (type definitions and evictions have seq -1)
+        last = dict(zip(seqs, range(0, len(rows), RECORD_SIZE)))
+        last.pop(-1, None)
+        self.next_seq = max(last, default=-1) + 1
+        seqs = list(last)
+        offsets = list(last.values())
+        if evicted:
+            keep = [evicted.get(_raw_id(rows, at), -1) < at for at in offsets]
+            seqs = list(compress(seqs, keep))
+            offsets = list(compress(offsets, keep))
+        n = len(offsets)
+        if n and offsets == list(range(offsets[0], offsets[0] + n * RECORD_SIZE, RECORD_SIZE)):
+            state = rows[offsets[0]:offsets[0] + n * RECORD_SIZE]  # nothing superseded in between
+        else:
+            state = b"".join([rows[at:at + RECORD_SIZE] for at in offsets])
+        del rows  # only the state rows are needed from here
+
+        words = memoryview(state).cast("q")
+        stamps = tuple(array("q", words[k::_SEQ_WORDS].tobytes()) for k in range(1, 8))
+        words.release()
+        status = bytes(state[_CODE_AT::RECORD_SIZE])
+        halves = memoryview(state).cast("H")
+        command_types = list(map(self.type_names.get, halves[_TYPE_AT // 2::RECORD_SIZE // 2].tolist(), repeat("")))
+        halves.release()
+        command_ids = [state[at:at + length].decode("utf-8")
+                       for at, length in zip(range(_ID_AT, len(state), RECORD_SIZE), state[_ID_LEN_AT::RECORD_SIZE])]
+        payloads = {}
+        for row in compress(range(n), status.translate(_OPEN_MASK)):
+            found = self._payloads.get(seqs[row])
+            if found is not None:
+                view, start, end = found
+                payloads[row] = json.loads(bytes(view[start:end]))
+        return RecordColumns(command_ids, command_types, status, stamps, offset, payloads), seqs
+
+    def release(self) -> None:
+        # drop every reference to the mmaps so they can be closed
+        self._regions.clear()
+        self._payloads.clear()
+
+
+def _raw_id(rows: bytes, at: int) -> bytes:
+    return rows[at + _ID_AT:at + _ID_AT + rows[at + _ID_LEN_AT]]
+
+
+class _mapped:
+    # read-only mmap of a whole file as a memoryview; None for a missing or empty file
+    def __init__(self, path: Path):
+        self._path = path
+        self._file = None
+        self._mmap = None
+        self._view = None
+
+    def __enter__(self) -> memoryview | None:
+        try:
+            self._file = open(self._path, "rb")
+        except FileNotFoundError:
+            return None
+        if os.fstat(self._file.fileno()).st_size == 0:
+            return None
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        return self._view
+
+    def __exit__(self, *exc) -> None:
+        if self._view is not None:
+            self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
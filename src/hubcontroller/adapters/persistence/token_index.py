@@ -0,0 +1,322 @@
+from __future__ import annotations
+import logging
+import mmap
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterator
+
+from hubcontroller.adapters.persistence.command_journal import command_id_hash, wall_offset_ns
+from hubcontroller.domain.clock import Clock
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<4sII52x")  # magic, slot count, slot size
+HEADER_MAGIC = b"TIX1"
+# token hash (0 = empty slot), wall-clock ns stored, token length, command length,
+# token (STRING40), command (STRING100) - the exec frame field sizes
+SLOT = struct.Struct("<QqBB40s100s2x")
+_HASH = struct.Struct("<Q")
+_TOKEN_AT = 18
+MAX_TOKEN_BYTES = 40
+MAX_COMMAND_BYTES = 100
+_BLOOM_HASHES = 4
+_BLOOM_BITS_PER_SLOT = 16
+
+
+def _token_hash(raw: bytes) -> int:
+    return command_id_hash(raw) or 1  # 0 marks an empty slot
+
+
+class TokenIndex:
+    # Disk-backed exec token index: open-addressing hash table (linear probing, backward-shift
+    # delete, no tombstones) in an mmap'ed file of fixed size, so it survives restarts and never
+    # grows past capacity entries.
+    # - an in-memory Bloom filter answers "never seen" without probing the table; it is rebuilt
+    #   after enough deletes made it stale
+    # - stored order (oldest first, re-store moves to the end) is kept in two in-memory int arrays
+    #   and rebuilt from the stored timestamps on open
+    # Mirrors the subset of OrderedDict[str, tuple[str, int]] that ExecRegistry uses; values are
+    # (command, ns of the bound registry clock), on disk the ns are wall-clock.
+    # Writes go to the shared mapping, so they survive a process crash; sync() msyncs for power loss.
+    def __init__(self, path: str | Path, capacity: int = 8192):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.path = Path(path)
+        self.capacity = capacity
+        n_slots = 1
+        while n_slots * 3 < capacity * 4:  # load factor <= 0.75
+            n_slots *= 2
+        self._n_slots = n_slots
+        self._mask = n_slots - 1
+        self._wall_offset = 0
+        self._size = 0
+        self._head = -1
+        self._tail = -1
+        self._prev = array("i", [-1]) * n_slots
+        self._next = array("i", [-1]) * n_slots
+        self._bloom_mask = n_slots * _BLOOM_BITS_PER_SLOT - 1
+        self._bloom = bytearray(n_slots * _BLOOM_BITS_PER_SLOT // 8)
+        self._bloom_stale = 0
+        self.bloom_rejects = 0
+        self._file = None
+        self._mm: mmap.mmap | None = None
+        self._open()
+
+    def bind_clock(self, clock: Clock) -> None:
+        self._wall_offset = wall_offset_ns(clock)
+
+    # --- file ---
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        entries = self._read_existing()
+        size = HEADER.size + self._n_slots * SLOT.size
+        # re-insert into a fresh table instead of trusting slot positions: a crash mid-delete may
+        # have left a half-shifted probe chain, and the capacity may have changed since the last run.
+        # Built next to the old file and renamed over it, so a crash here keeps the old index.
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(tmp, "w+b")
+        self._file.truncate(size)
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(self._mm, 0, HEADER_MAGIC, self._n_slots, SLOT.size)
+        entries.sort()
+        for wall_ns, raw, command in entries[-self.capacity:]:
+            self._insert(_token_hash(raw), raw, command, wall_ns)
+        self._mm.flush()
+        os.replace(tmp, self.path)
+        if entries:
+            logger.info("Token index %s: restored %d tokens", self.path, self._size)
+
+    def _read_existing(self) -> list[tuple[int, bytes, bytes]]:
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return []
+        if len(data) < HEADER.size:
+            return []
+        magic, n_slots, slot_size = HEADER.unpack_from(data)
+        if magic != HEADER_MAGIC or slot_size != SLOT.size or len(data) < HEADER.size + n_slots * slot_size:
+            logger.error("Token index %s has an unknown layout, starting empty", self.path)
+            return []
+        entries = []
+        end = HEADER.size + n_slots * SLOT.size
+        for id_hash, wall_ns, token_len, command_len, token, command in SLOT.iter_unpack(data[HEADER.size:end]):
+            if id_hash == 0 or token_len > MAX_TOKEN_BYTES or command_len > MAX_COMMAND_BYTES:
+                continue
+            raw = token[:token_len]
+            if _token_hash(raw) != id_hash:
+                continue  # torn slot
+            entries.append((wall_ns, raw, command[:command_len]))
+        return entries
+
+    def sync(self) -> None:
+        if self._mm is not None:
+            self._mm.flush()
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- bloom filter ---
+
+    def _bloom_add(self, h: int) -> None:
+        bloom, mask = self._bloom, self._bloom_mask
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(_BLOOM_HASHES):
+            bit = (h1 + i * h2) & mask
+            bloom[bit >> 3] |= 1 << (bit & 7)
+
+    def _bloom_may_contain(self, h: int) -> bool:
+        bloom, mask = self._bloom, self._bloom_mask
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        for i in range(_BLOOM_HASHES):
+            bit = (h1 + i * h2) & mask
+            if not bloom[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def _rebuild_bloom(self) -> None:
+        self._bloom = bytearray(len(self._bloom))
+        slot = self._head
+        while slot != -1:
+            self._bloom_add(_HASH.unpack_from(self._mm, HEADER.size + slot * SLOT.size)[0])
+            slot = self._next[slot]
+        self._bloom_stale = 0
+
+    # --- table ---
+
+    def _find(self, h: int, raw: bytes) -> int:
+        # slot of the token, or -(free slot + 1) where it would go
+        mm, mask = self._mm, self._mask
+        i = h & mask
+        while True:
+            offset = HEADER.size + i * SLOT.size
+            slot_hash = _HASH.unpack_from(mm, offset)[0]
+            if slot_hash == 0:
+                return -i - 1
+            if slot_hash == h and mm[offset + 16] == len(raw) and mm[offset + _TOKEN_AT:offset + _TOKEN_AT + len(raw)] == raw:
+                return i
+            i = (i + 1) & mask
+
+    def _lookup(self, token: str) -> tuple[int, int, bytes]:
+        raw = token.encode("utf-8")
+        h = _token_hash(raw)
+        if not self._bloom_may_contain(h):
+            self.bloom_rejects += 1
+            return -1, h, raw
+        return self._find(h, raw), h, raw
+
+    def _insert(self, h: int, raw: bytes, command: bytes, wall_ns: int) -> int:
+        if len(raw) > MAX_TOKEN_BYTES:
+            raise ValueError(f"token longer than {MAX_TOKEN_BYTES} bytes")
+        if self._size >= self.capacity:
+            self.popitem(last=False)
+        slot = -self._find(h, raw) - 1
+        command = command[:MAX_COMMAND_BYTES]
+        SLOT.pack_into(self._mm, HEADER.size + slot * SLOT.size, h, wall_ns, len(raw), len(command), raw, command)
+        self._bloom_add(h)
+        self._link_last(slot)
+        self._size += 1
+        return slot
+
+    def _link_last(self, slot: int) -> None:
+        self._prev[slot] = self._tail
+        self._next[slot] = -1
+        if self._tail != -1:
+            self._next[self._tail] = slot
+        else:
+            self._head = slot
+        self._tail = slot
+
+    def _unlink(self, slot: int) -> None:
+        prev, next_ = self._prev[slot], self._next[slot]
+        if prev != -1:
+            self._next[prev] = next_
+        else:
+            self._head = next_
+        if next_ != -1:
+            self._prev[next_] = prev
+        else:
+            self._tail = prev
+
+    def _move_slot(self, src: int, dst: int) -> None:
+        mm = self._mm
+        src_at = HEADER.size + src * SLOT.size
+        dst_at = HEADER.size + dst * SLOT.size
+        mm[dst_at:dst_at + SLOT.size] = mm[src_at:src_at + SLOT.size]
+        prev, next_ = self._prev[src], self._next[src]
+        self._prev[dst], self._next[dst] = prev, next_
+        if prev != -1:
+            self._next[prev] = dst
+        else:
+            self._head = dst
+        if next_ != -1:
+            self._prev[next_] = dst
+        else:
+            self._tail = dst
+
+    def _remove_slot(self, slot: int) -> None:
+        # backward-shift delete: pull later members of the probe chain into the hole
+        self._unlink(slot)
+        mm, mask = self._mm, self._mask
+        hole = slot
+        i = slot
+        while True:
+            i = (i + 1) & mask
+            slot_hash = _HASH.unpack_from(mm, HEADER.size + i * SLOT.size)[0]
+            if slot_hash == 0:
+                break
+            home = slot_hash & mask
+            # entry at i may fill the hole only if its home is not cyclically in (hole, i]
+            if (hole < i and hole < home <= i) or (hole > i and (home > hole or home <= i)):
+                continue
+            self._move_slot(i, hole)
+            hole = i
+        _HASH.pack_into(mm, HEADER.size + hole * SLOT.size, 0)
+        self._size -= 1
+        self._bloom_stale += 1
+        if self._bloom_stale > self.capacity:
+            self._rebuild_bloom()
+
+    def _read(self, slot: int) -> tuple[str, str, int]:
+        _, wall_ns, token_len, command_len, token, command = SLOT.unpack_from(self._mm, HEADER.size + slot * SLOT.size)
+        return token[:token_len].decode("utf-8"), command[:command_len].decode("utf-8"), wall_ns - self._wall_offset
+
+    # --- OrderedDict subset ---
+
+    def __contains__(self, token: str) -> bool:
+        return self._lookup(token)[0] >= 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, token: str) -> tuple[str, int]:
+        slot = self._lookup(token)[0]
+        if slot < 0:
+            raise KeyError(token)
+        _, command, ns = self._read(slot)
+        return command, ns
+
+    def __setitem__(self, token: str, value: tuple[str, int]) -> None:
+        command, ns = value
+        slot, h, raw = self._lookup(token)
+        encoded = command.encode("utf-8")[:MAX_COMMAND_BYTES]
+        wall_ns = ns + self._wall_offset
+        if slot < 0:
+            self._insert(h, raw, encoded, wall_ns)
+            return
+        # assigning to an existing key keeps its position, like a dict
+        SLOT.pack_into(self._mm, HEADER.size + slot * SLOT.size, h, wall_ns, len(raw), len(encoded), raw, encoded)
+
+    def __delitem__(self, token: str) -> None:
+        slot = self._lookup(token)[0]
+        if slot < 0:
+            raise KeyError(token)
+        self._remove_slot(slot)
+
+    def move_to_end(self, token: str) -> None:
+        slot = self._lookup(token)[0]
+        if slot < 0:
+            raise KeyError(token)
+        if slot != self._tail:
+            self._unlink(slot)
+            self._link_last(slot)
+
+    def popitem(self, last: bool = True) -> tuple[str, tuple[str, int]]:
+        slot = self._tail if last else self._head
+        if slot == -1:
+            raise KeyError("popitem(): index is empty")
+        token, command, ns = self._read(slot)
+        self._remove_slot(slot)
+        return token, (command, ns)
+
+    def _slots(self) -> Iterator[int]:
+        slot = self._head
+        while slot != -1:
+            next_ = self._next[slot]
+            yield slot
+            slot = next_
+
+    def keys(self) -> Iterator[str]:
+        for slot in self._slots():
+            yield self._read(slot)[0]
+
+    def values(self) -> Iterator[tuple[str, int]]:
+        for slot in self._slots():
+            _, command, ns = self._read(slot)
+            yield command, ns
+
+    def items(self) -> Iterator[tuple[str, tuple[str, int]]]:
+        for slot in self._slots():
+            token, command, ns = self._read(slot)
+            yield token, (command, ns)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
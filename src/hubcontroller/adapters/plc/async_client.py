@@ -0,0 +1,18 @@
+from hubcontroller.adapters.plc.client import PlcClient
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.adapters.plc.transport.async_plc_adapter import AsyncPlcAdapter
+from hubcontroller.domain.commands import Command
+
+
+class AsyncPlcClient:
+    # encoding and the write both run on the write executor, so the control-frame
+    # encoder stays single-threaded
+    def __init__(self, plc_client: PlcClient, async_adapter: AsyncPlcAdapter):
+        self._plc_client = plc_client
+        self._async_adapter = async_adapter
+
+    async def plc_write_command(self, command: Command) -> PlcSendStatus:
+        return await self._async_adapter.run_write(self._plc_client.plc_write_command, command)
+
+    async def plc_write_commands(self, commands: list[Command]) -> list[PlcSendStatus]:
+        return await self._async_adapter.run_write(self._plc_client.plc_write_commands, commands)
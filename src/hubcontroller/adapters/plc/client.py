@@ -0,0 +1,105 @@
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.adapters.plc.protocol.encoders.frame_encoder import compile_encoder
+from hubcontroller.adapters.plc.protocol.specs import control_specs
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
+from hubcontroller.domain.commands import Command
+
+
+class PlcClient:
+    # The control frame is a single slot: a command may only be written once the PLC has cleared
+    # the trigger of the previous one, otherwise it overwrites a frame the PLC has not taken yet.
+    # After every write (and once at startup, the PLC may still hold a frame) the next write first
+    # reads the trigger word back - once, over the write connection, never waiting: a slot the PLC
+    # has not cleared yet comes back as TIMEOUT and the caller's retry path checks it again later.
+    # Only the dirty range of the frame is written. After a reconnect or the CPU coming back to RUN
+    # the PLC's copy of the control DB may no longer match, so that and a failed write send the
+    # whole frame next time.
+    def __init__(self, plc_adapter: PlcAdapter, control_frame_spec: FrameSpec | None = None):
+        if control_frame_spec is None:
+            control_frame_spec = control_specs.CONTROL_FRAME_SPEC
+        self._plc_adapter = plc_adapter
+        self._control_frame_spec = control_frame_spec
+        self._trigger_offset = control_frame_spec.get_field_offset("trigger")
+        self._slot_busy = True
+        self._link_epoch = self._current_link_epoch()
+        # the PLC clears trigger after reading the frame, so it is written every time
+        self._encoder = compile_encoder(control_frame_spec, always_dirty=("trigger",))
+
+    def command_values(self, command: Command) -> dict:
+        values = dict(command.payload)
+        values["trigger"] = 1
+        values["command"] = command.command_type
+        values["token"] = command.command_id
+        return values
+
+    def _current_link_epoch(self) -> tuple[int, int]:
+        stats = self._plc_adapter.stats
+        return stats.reconnects, stats.run_resumed
+
+    def _check_slot_free(self) -> PlcSendStatus:
+        if not self._slot_busy:
+            return PlcSendStatus.OK
+        try:
+            trigger = self._plc_adapter.read_db_write(db_number=self._control_frame_spec.db_num,
+                                                      start=self._trigger_offset, length=2)
+        except TimeoutError:
+            return PlcSendStatus.TIMEOUT
+        except Exception:
+            return PlcSendStatus.ERROR
+        if any(trigger):
+            return PlcSendStatus.TIMEOUT
+        self._slot_busy = False
+        return PlcSendStatus.OK
+
+    def plc_write_command(self, command: Command) -> PlcSendStatus:
+        # (re)connect first, so a new link is seen before the dirty range is computed
+        try:
+            self._plc_adapter.ensure_connected_write()
+        except TimeoutError:
+            return PlcSendStatus.TIMEOUT
+        except Exception:
+            return PlcSendStatus.ERROR
+        link_epoch = self._current_link_epoch()
+        if link_epoch != self._link_epoch:
+            self._link_epoch = link_epoch
+            self._encoder.invalidate()
+            self._slot_busy = True
+        try:
+            frame = self._encoder.encode(self.command_values(command))
+        except (ValueError, TypeError, AttributeError):
+            return PlcSendStatus.INVALID_PARAMETERS
+
+        status = self._check_slot_free()
+        if status != PlcSendStatus.OK:
+            return status
+
+        dirty = self._encoder.dirty_range()
+        if dirty is None:
+            return PlcSendStatus.OK
+        lo, hi = dirty
+        try:
+            self._plc_adapter.write_db(db_number=self._control_frame_spec.db_num, start=self._control_frame_spec.start + lo, data=frame[lo:hi])
+        except TimeoutError:
+            self._encoder.invalidate()
+            return PlcSendStatus.TIMEOUT
+        except Exception:
+            self._encoder.invalidate()
+            return PlcSendStatus.ERROR
+        self._encoder.mark_written()
+        self._slot_busy = True
+        return PlcSendStatus.OK
+
+    def plc_write_commands(self, commands: list[Command]) -> list[PlcSendStatus]:
+        # The control frame holds one command and the PLC clears trigger once it has taken it,
+        # so a batch is still one slot check + write per command - but each write is only the dirty
+        # range, and once the slot is busy or the transport failed the rest of the batch fails fast
+        # and goes back to the caller's retry together.
+        statuses: list[PlcSendStatus] = []
+        for command in commands:
+            status = self.plc_write_command(command)
+            statuses.append(status)
+            if status == PlcSendStatus.ERROR or status == PlcSendStatus.TIMEOUT:
+                statuses.extend([status] * (len(commands) - len(statuses)))
+                break
+        return statuses
@@ -2,17 +2,23 @@ from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
 from hubcontroller.adapters.plc.protocol.decoders.ack_decoder import AckDecoder
 from hubcontroller.adapters.plc.protocol.specs.ack_specs import FrameSpec
 from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
+from hubcontroller.adapters.plc.transport.read_scheduler import ReadScheduler
 
 class PlcGateway:
-    def __init__(self, plc_adapter: PlcAdapter, ack_decoder: AckDecoder, ack_frame_spec: FrameSpec):
+    def __init__(self, plc_adapter: PlcAdapter, ack_decoder: AckDecoder, ack_frame_spec: FrameSpec, read_scheduler: ReadScheduler | None = None):
         self._plc_adapter = plc_adapter
         self._ack_decoder = ack_decoder
         self._ack_frame_spec = ack_frame_spec
+        # with a scheduler the poll loop calls read_scheduler.poll() once per cycle and
+        # this gateway decodes its slice of the shared buffer
+        self._read_handle = read_scheduler.register(ack_frame_spec) if read_scheduler is not None else None
   
-    def _read_ack_bytes(self) -> bytearray:
+    def _read_ack_bytes(self) -> bytearray | memoryview:
+        if self._read_handle is not None:
+            return self._read_handle.view
         return self._plc_adapter.read_db(db_number=self._ack_frame_spec.db_num, start=self._ack_frame_spec.start, length=self._ack_frame_spec.length)
     
-    def _decode_ack_bytes(self, data: bytearray) -> AckSnapshot:
+    def _decode_ack_bytes(self, data: bytearray | memoryview) -> AckSnapshot:
         return self._ack_decoder.decode(data)
 
     def read_ack_snapshot(self) -> AckSnapshot:
@@ -1,4 +1,5 @@
-from src.hubcontroller.adapters.plc.plc_adapter import PlcAdapter
+from hubcontroller.adapters.plc.transport.async_plc_adapter import AsyncPlcAdapter
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
 
 class AckPoller:
     def __init__(self, plc_adapter: PlcAdapter):
@@ -8,4 +9,10 @@ class AckPoller:
     def poll_ack(self, db_number: int, start: int, length: int) -> bytearray:
         return self._plc_adapter.read_db(db_number, start, length)
 
-    
\ No newline at end of file
+
+class AsyncAckPoller:
+    def __init__(self, plc_adapter: AsyncPlcAdapter):
+        self._plc_adapter = plc_adapter
+
+    async def poll_ack(self, db_number: int, start: int, length: int) -> bytearray:
+        return await self._plc_adapter.read_db(db_number, start, length)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+import struct
+from typing import Generic, Protocol, TypeVar
+
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec, PlcDataType
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
+
+T = TypeVar("T")
+
+_TRIGGER = struct.Struct(">h")
+
+
+class FrameDecoder(Protocol[T]):
+    def decode(self, data: bytes | bytearray | memoryview) -> T: ...
+
+
+class InFlightSource(Protocol):
+    @property
+    def in_flight_count(self) -> int: ...
+
+
+class EdgeTriggeredPoller(Generic[T]):
+    # Polls only the 2-byte trigger word of an ack/exec frame; the full frame is read and
+    # decoded only when the trigger is non-zero. On an idle PLC a poll is one 2-byte read.
+    def __init__(self, plc_adapter: PlcAdapter, frame_spec: FrameSpec, decoder: FrameDecoder[T], trigger_field: str = "trigger"):
+        self._plc_adapter = plc_adapter
+        self._frame_spec = frame_spec
+        self._decoder = decoder
+        trigger = next((f for f in frame_spec.fields if f.name == trigger_field), None)
+        if trigger is None or trigger.dtype != PlcDataType.INT:
+            raise ValueError(f"FrameSpec misconfigured: '{trigger_field}' must be an INT field")
+        self._trigger_offset = frame_spec.get_field_offset(trigger_field)
+        self.trigger_reads = 0
+        self.frame_reads = 0
+
+    def read_trigger(self) -> int:
+        self.trigger_reads += 1
+        data = self._plc_adapter.read_db(db_number=self._frame_spec.db_num, start=self._trigger_offset, length=_TRIGGER.size)
+        return _TRIGGER.unpack_from(data)[0]
+
+    def poll(self) -> T | None:
+        if self.read_trigger() == 0:
+            return None
+        self.frame_reads += 1
+        data = self._plc_adapter.read_db(db_number=self._frame_spec.db_num, start=self._frame_spec.start, length=self._frame_spec.length)
+        return self._decoder.decode(data)
+
+
+class AdaptivePollInterval:
+    # fast while the registry has commands DISPATCHED/ACCEPTED (an ack/exec is expected),
+    # slow when nothing is in flight; stays fast for linger_polls polls after the last hit
+    # so frames the PLC raises on its own are drained quickly too
+    def __init__(self, registry: InFlightSource, fast_s: float = 0.01, slow_s: float = 0.2, linger_polls: int = 10):
+        if not 0 < fast_s <= slow_s:
+            raise ValueError(f"Expected 0 < fast_s <= slow_s, got fast_s={fast_s}, slow_s={slow_s}")
+        self._registry = registry
+        self.fast_s = fast_s
+        self.slow_s = slow_s
+        self._linger_polls = linger_polls
+        self._linger = 0
+
+    def on_poll(self, hit: bool) -> None:
+        if hit:
+            self._linger = self._linger_polls
+        elif self._linger > 0:
+            self._linger -= 1
+
+    def __call__(self) -> float:
+        if self._registry.in_flight_count > 0 or self._linger > 0:
+            return self.fast_s
+        return self.slow_s
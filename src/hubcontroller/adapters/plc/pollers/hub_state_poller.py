@@ -0,0 +1,52 @@
+from __future__ import annotations
+from typing import Protocol
+
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+
+UNKNOWN_HUB_STATE = HubStateSnapshot(mode=HubMode.UNKNOWN, execution_state=ExecutionState.IDLE)
+
+
+class HubStateDecoder(Protocol):
+    def decode(self, data: bytes | bytearray | memoryview) -> HubStateSnapshot: ...
+
+
+class HubStatePoller:
+    # Reads the hub status area every poll and compares the raw bytes with the previous read;
+    # only changed bytes are decoded and published to the HubStateProvider, so an unchanged hub
+    # costs one read and one bytes compare. After stale_after_errors failed reads in a row the
+    # provider gets UNKNOWN_HUB_STATE (the guard then denies what needs a known state).
+    # poll() fits PeriodicTask.
+    def __init__(self, plc_adapter: PlcAdapter, provider: HubStateProvider, frame_spec: FrameSpec,
+                 decoder: HubStateDecoder, stale_after_errors: int = 3):
+        self._plc_adapter = plc_adapter
+        self._provider = provider
+        self._frame_spec = frame_spec
+        self._decoder = decoder
+        self._stale_after_errors = stale_after_errors
+        self._last_raw: bytes | None = None
+        self._errors_in_row = 0
+        self.reads = 0
+        self.decodes = 0
+
+    def poll(self) -> HubStateSnapshot | None:
+        # returns the new snapshot when the state changed, None otherwise
+        try:
+            raw = self._plc_adapter.read_db(db_number=self._frame_spec.db_num, start=self._frame_spec.start,
+                                            length=self._frame_spec.length)
+        except Exception:
+            self._errors_in_row += 1
+            if self._errors_in_row >= self._stale_after_errors:
+                self._last_raw = None
+                self._provider.publish(UNKNOWN_HUB_STATE)
+            raise
+        self._errors_in_row = 0
+        self.reads += 1
+        if raw == self._last_raw:
+            return None
+        snapshot = self._decoder.decode(raw)
+        self.decodes += 1
+        self._last_raw = bytes(raw)
+        return snapshot if self._provider.publish(snapshot) else None
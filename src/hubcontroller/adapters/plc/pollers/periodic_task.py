@@ -0,0 +1,65 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    # Runs poll() as an asyncio task on a fixed cadence: ticks are absolute (start + n * interval),
+    # so poll duration does not drift the schedule. A poll that overruns skips the missed ticks
+    # instead of firing them back-to-back. Exceptions are logged and counted; the loop keeps going.
+    # interval_s may be a callable (e.g. AdaptivePollInterval), re-evaluated after every poll.
+    # clock/sleep default to the running loop's clock and asyncio.sleep; tests pass a fake pair.
+    def __init__(self, name: str, interval_s: float | Callable[[], float], poll: Callable[[], Awaitable[None]],
+                 clock: Callable[[], float] | None = None, sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        if not callable(interval_s) and interval_s <= 0:
+            raise ValueError(f"interval_s must be > 0, got {interval_s}")
+        self.name = name
+        self._interval_s = interval_s
+        self._poll = poll
+        self._clock = clock
+        self._sleep = sleep
+        self._task: asyncio.Task | None = None
+        self.ticks = 0
+        self.missed_ticks = 0
+        self.errors = 0
+
+    @property
+    def interval_s(self) -> float:
+        return self._interval_s() if callable(self._interval_s) else self._interval_s
+
+    def start(self) -> asyncio.Task:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=self.name)
+        return self._task
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        clock = self._clock or asyncio.get_running_loop().time
+        next_tick = clock()
+        while True:
+            try:
+                await self._poll()
+            except Exception:
+                self.errors += 1
+                logger.exception("Periodic task %s failed", self.name)
+            self.ticks += 1
+            interval_s = self.interval_s
+            next_tick += interval_s
+            now = clock()
+            if now >= next_tick:
+                missed = int((now - next_tick) // interval_s) + 1
+                self.missed_ticks += missed
+                next_tick += missed * interval_s
+            await self._sleep(next_tick - now)
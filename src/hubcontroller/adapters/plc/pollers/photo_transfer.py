@@ -0,0 +1,195 @@
+from __future__ import annotations
+import logging
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Protocol
+
+from hubcontroller.adapters.mqtt.client import MqttPublisher
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec, PlcDataType
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcLinkStats
+from hubcontroller.adapters.plc.transport.read_scheduler import (
+    S7_HEADER_SIZE,
+    S7_ITEM_RESPONSE_HEADER,
+    S7_MIN_PDU,
+    ReadItem,
+)
+
+logger = logging.getLogger(__name__)
+
+_DINT = struct.Struct(">i")
+# MQTT message: header + chunk bytes. crc32 is of the whole photo, set on the last chunk only
+# (seq == chunk_count - 1); the receiver checks it after reassembling by offset.
+PHOTO_CHUNK = struct.Struct(">IIIHHI")  # photo_id, size, offset, seq, chunk_count, crc32
+
+
+class PhotoReader(Protocol):
+    # PlcAdapter fits
+    stats: PlcLinkStats
+
+    def read_db(self, db_number: int, start: int, length: int) -> bytes: ...
+
+    def read_multi_db(self, items: list[ReadItem]) -> None: ...
+
+    def pdu_length(self) -> int: ...
+
+
+@dataclass(slots=True)
+class PhotoTransferStats:
+    photos: int = 0
+    chunks: int = 0
+    bytes: int = 0
+    resumed: int = 0   # transfers continued after a read error or reconnect
+    aborted: int = 0   # photo replaced on the PLC mid-transfer
+    rejected: int = 0  # header photo_id or size out of range
+
+
+class PhotoTransfer:
+    # Streams photos from the photo DB to MQTT in PDU-sized chunks.
+    # - every poll() is one header read when idle, or at most chunks_per_poll chunk reads
+    #   while a photo is in transfer; run it through AsyncPlcAdapter.run_read so ack/exec
+    #   reads queued on the read executor get their turn between chunks
+    # - each chunk is read in place right behind a PHOTO_CHUNK header packed into one reusable
+    #   message buffer, so the only copy is the bytes() handed to the publisher (paho keeps the
+    #   payload object for QoS 1 retries, so a buffer that is overwritten cannot be published)
+    # - after every batch of chunk reads the header is read again; if the PLC started the next
+    #   photo meanwhile nothing from the batch is published and the transfer is dropped
+    # - a failed read or a reconnect keeps the transfer position; the next poll re-reads the
+    #   header and continues from the same offset if photo_id/size are unchanged, else starts over
+    # - an MQTT publish error leaves the chunk unsent and it is read again on the next poll
+    # header_spec is PHOTO_HEADER_FRAME_SPEC: the photo DB and where photo_id/size (DINT) sit in it.
+    def __init__(self, reader: PhotoReader, publisher: MqttPublisher, topic: str, header_spec: FrameSpec,
+                 data_offset: int, max_bytes: int, pdu_size: int | None = None, chunks_per_poll: int = 1,
+                 qos: int = 1):
+        if chunks_per_poll <= 0:
+            raise ValueError(f"chunks_per_poll must be > 0, got {chunks_per_poll}")
+        fields = {f.name: f for f in header_spec.fields}
+        for name in ("photo_id", "size"):
+            if name not in fields or fields[name].dtype != PlcDataType.DINT:
+                raise ValueError(f"Photo header spec needs a DINT field '{name}'")
+        self._reader = reader
+        self._publisher = publisher
+        self._topic = topic
+        self._db_num = header_spec.db_num
+        self._header_spec = header_spec
+        self._photo_id_at = fields["photo_id"].offset - header_spec.start
+        self._size_at = fields["size"].offset - header_spec.start
+        self._data_offset = data_offset
+        self._max_bytes = max_bytes
+        self._pdu_size = pdu_size
+        self._chunks_per_poll = chunks_per_poll
+        self._qos = qos
+        self._message = bytearray(PHOTO_CHUNK.size)  # grown to header + chunk once the PDU is known
+        self._view = memoryview(self._message)
+        self._last_done = 0
+        self._photo_id = 0  # 0 = idle
+        self._size = 0
+        self._chunk_size = 0
+        self._chunk_count = 0
+        self._offset = 0
+        self._seq = 0
+        self._crc = 0
+        self._verify = False
+        self._reconnects = reader.stats.reconnects
+        self.stats = PhotoTransferStats()
+
+    @property
+    def active(self) -> bool:
+        # a transfer is in progress; callers may poll faster meanwhile
+        return self._photo_id != 0
+
+    def poll(self) -> bool:
+        # returns True when a photo finished on this poll
+        if self._reader.stats.reconnects != self._reconnects:
+            self._reconnects = self._reader.stats.reconnects
+            self._verify = self.active
+        if not self.active or self._verify:
+            if not self._read_header():
+                return False
+        return self._send_chunks()
+
+    def _header(self) -> tuple[int, int]:
+        spec = self._header_spec
+        data = self._reader.read_db(spec.db_num, spec.start, spec.length)
+        return _DINT.unpack_from(data, self._photo_id_at)[0], _DINT.unpack_from(data, self._size_at)[0]
+
+    def _abort(self) -> None:
+        self.stats.aborted += 1
+        logger.warning("Photo %d replaced on the PLC mid-transfer, dropping it", self._photo_id)
+        self._photo_id = 0
+
+    def _read_header(self) -> bool:
+        photo_id, size = self._header()
+        if self._verify:
+            self._verify = False
+            if photo_id == self._photo_id and size == self._size:
+                self.stats.resumed += 1
+                logger.info("Photo %d: resuming at %d/%d bytes", photo_id, self._offset, size)
+                return True
+            self._abort()
+        if photo_id == 0 or photo_id == self._last_done:
+            return False
+        if photo_id < 0:
+            # PHOTO_CHUNK carries photo_id unsigned
+            self.stats.rejected += 1
+            self._last_done = photo_id
+            logger.error("Photo id %d is negative, skipped", photo_id)
+            return False
+        if not 0 < size <= self._max_bytes:
+            self.stats.rejected += 1
+            self._last_done = photo_id
+            logger.error("Photo %d: size %d outside 1..%d, skipped", photo_id, size, self._max_bytes)
+            return False
+        pdu = self._pdu_size or self._reader.pdu_length() or S7_MIN_PDU
+        # even chunks, so the S7 padding byte never counts against the PDU
+        self._chunk_size = (pdu - S7_HEADER_SIZE - S7_ITEM_RESPONSE_HEADER) & ~1
+        self._chunk_count = -(-size // self._chunk_size)
+        if self._chunk_count > 0xFFFF:
+            raise ValueError(f"Photo of {size} bytes needs more than 65535 chunks of {self._chunk_size} bytes")
+        if len(self._message) < PHOTO_CHUNK.size + self._chunk_size:
+            self._view.release()
+            self._message = bytearray(PHOTO_CHUNK.size + self._chunk_size)
+            self._view = memoryview(self._message)
+        self._photo_id, self._size = photo_id, size
+        self._offset = self._seq = self._crc = 0
+        return True
+
+    def _send_chunks(self) -> bool:
+        # True when the last chunk went out
+        messages = []
+        offset, seq, crc = self._offset, self._seq, self._crc
+        while len(messages) < self._chunks_per_poll and offset < self._size:
+            n = min(self._chunk_size, self._size - offset)
+            try:
+                self._reader.read_multi_db([(self._db_num, self._data_offset + offset, n, self._message, PHOTO_CHUNK.size)])
+            except Exception:
+                self._verify = True
+                raise
+            crc = zlib.crc32(self._view[PHOTO_CHUNK.size:PHOTO_CHUNK.size + n], crc)
+            PHOTO_CHUNK.pack_into(self._message, 0, self._photo_id, self._size, offset, seq, self._chunk_count,
+                                  crc if offset + n == self._size else 0)
+            messages.append((bytes(self._view[:PHOTO_CHUNK.size + n]), n, crc))
+            offset += n
+            seq += 1
+        try:
+            header = self._header()
+        except Exception:
+            self._verify = True
+            raise
+        if header != (self._photo_id, self._size):
+            # the PLC started the next photo while this batch was being read
+            self._abort()
+            return False
+        for message, n, crc in messages:
+            self._publisher.publish(self._topic, message, qos=self._qos)
+            self._crc = crc
+            self._offset += n
+            self._seq += 1
+            self.stats.chunks += 1
+            self.stats.bytes += n
+        if self._offset < self._size:
+            return False
+        self.stats.photos += 1
+        self._last_done = self._photo_id
+        self._photo_id = 0
+        return True
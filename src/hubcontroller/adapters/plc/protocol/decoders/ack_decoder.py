@@ -1,11 +1,13 @@
 from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
-from hubcontroller.adapters.plc.protocol.specs.ack_specs import ACK_FRAME_SPEC, PlcDataType, FieldSpec
+from hubcontroller.adapters.plc.protocol.specs import ack_specs
+from hubcontroller.adapters.plc.protocol.specs.ack_specs import PlcDataType, FieldSpec
 import struct
 from typing import Any
 
 class AckDecoder:
 
-    def decode(self, data: bytearray) -> AckSnapshot:
+    def decode(self, data: bytearray | memoryview) -> AckSnapshot:
+        ACK_FRAME_SPEC = ack_specs.ACK_FRAME_SPEC
         if len(data) < ACK_FRAME_SPEC.length:
             raise ValueError(f"Data length mismatch: {len(data)} != {ACK_FRAME_SPEC.length}")
         values = {}
@@ -18,6 +20,8 @@ class AckDecoder:
     def decode_field(self, data: bytearray, field: FieldSpec, index: int) -> Any:
         if field.dtype == PlcDataType.INT:
             return self.decode_int(data, index)
+        elif field.dtype == PlcDataType.DINT:
+            return self.decode_dint(data, index)
         elif field.dtype == PlcDataType.STRING:
             return self.decode_string(data, index, field.max_len)
         elif field.dtype == PlcDataType.BOOL:
@@ -36,6 +40,11 @@ class AckDecoder:
         if index + 2 > len(data):
             raise ValueError(f"Index out of bounds: {index}")
         return int.from_bytes(data[index:index+2], byteorder='big', signed=True)
+
+    def decode_dint(self, data: bytearray, index: int) -> int:
+        if index + 4 > len(data):
+            raise ValueError(f"Index out of bounds: {index}")
+        return int.from_bytes(data[index:index+4], byteorder='big', signed=True)
     
     def decode_string(self, data: bytearray, index: int, max_length: int) -> str:
         end = index + max_length + 2
@@ -47,7 +56,7 @@ class AckDecoder:
             raise ValueError(f"Declared max length mismatch: {declared_max} < {max_length}")
         if current_len > declared_max:
             current_len = min(current_len, max_length)
-        raw = data[index+2:index+2+current_len]
+        raw = bytes(data[index+2:index+2+current_len])
         return raw.decode('utf-8', errors='replace').strip()
     
     def decode_bool(self, data: bytearray, index: int, bit_index: int) -> bool:
@@ -0,0 +1,15 @@
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.adapters.plc.protocol.specs import exec_specs
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec
+
+
+class ExecDecoder:
+    # also decodes RESEND_FRAME_SPEC, which shares the exec layout
+    def __init__(self, frame_spec: FrameSpec | None = None):
+        if frame_spec is None:
+            frame_spec = exec_specs.EXEC_FRAME_SPEC
+        self._decoder = compile_decoder(frame_spec, ExecSnapshot)
+
+    def decode(self, data: bytes | bytearray | memoryview) -> ExecSnapshot:
+        return self._decoder.decode(data)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import struct
+from dataclasses import fields as dataclass_fields
+from typing import Callable, Generic, TypeVar
+
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec, PlcDataType
+
+T = TypeVar("T")
+
+# big-endian S7 layouts; BOOL reads its whole byte and masks the bit afterwards
+_FIXED_FORMATS = {
+    PlcDataType.INT: "h",
+    PlcDataType.DINT: "i",
+    PlcDataType.BYTE: "B",
+    PlcDataType.BOOL: "B",
+    PlcDataType.FLOAT: "f",
+    PlcDataType.DOUBLE: "d",
+}
+
+
+# field table entry kinds
+_VALUE, _BIT, _STRING = 0, 1, 2
+
+
+class CompiledFrameDecoder(Generic[T]):
+    # Built once per FrameSpec by compile_decoder():
+    # - all fixed-size fields are unpacked by one precomputed struct.Struct (gaps become pad bytes)
+    # - S7 STRING fields are read from precomputed slice offsets of a memoryview (no frame copy)
+    # - the snapshot is built positionally in the snapshot dataclass field order
+    # decode is a closure over the struct and a per-field table of (kind, position, arg, name), so a
+    # poll does one unpack plus one table walk and looks nothing up by name.
+    decode: Callable[[bytes | bytearray | memoryview], T]
+
+    def __init__(self, frame_spec: FrameSpec, snapshot_cls: type[T]):
+        self._frame_spec = frame_spec
+        self._snapshot_cls = snapshot_cls
+
+        by_name = {f.name: f for f in frame_spec.fields}
+        order = [f.name for f in dataclass_fields(snapshot_cls)]
+        if set(order) != set(by_name):
+            raise ValueError(
+                f"{snapshot_cls.__name__} fields {sorted(order)} do not match FrameSpec fields {sorted(by_name)}"
+            )
+
+        # one struct read per distinct (offset, format); several BOOLs can share a byte
+        reads = sorted({
+            (f.offset - frame_spec.start, _FIXED_FORMATS[f.dtype])
+            for f in frame_spec.fields if f.dtype != PlcDataType.STRING
+        })
+        frame_struct, struct_offset, slot_of = _compile_struct(reads)
+
+        table: list[tuple[int, int, int, str]] = []
+        for name in order:
+            field = by_name[name]
+            index = field.offset - frame_spec.start
+            if field.dtype == PlcDataType.STRING:
+                table.append((_STRING, index, field.max_len, name))
+            elif field.dtype == PlcDataType.BOOL:
+                table.append((_BIT, slot_of[(index, _FIXED_FORMATS[field.dtype])], 1 << field.bit_index, name))
+            else:
+                table.append((_VALUE, slot_of[(index, _FIXED_FORMATS[field.dtype])], 0, name))
+        self.decode = _decode_function(snapshot_cls, frame_spec.length, frame_struct, struct_offset, tuple(table))
+
+    @property
+    def frame_spec(self) -> FrameSpec:
+        return self._frame_spec
+
+
+def _decode_function(cls: type[T], length: int, frame_struct: struct.Struct | None, struct_offset: int,
+                     table: tuple[tuple[int, int, int, str], ...]) -> Callable[[bytes | bytearray | memoryview], T]:
+    unpack_from = frame_struct.unpack_from if frame_struct is not None else None
+
+    def decode(data: bytes | bytearray | memoryview) -> T:
+        if len(data) < length:
+            raise ValueError(f"Data length mismatch: {len(data)} != {length}")
+        view = data if type(data) is memoryview else memoryview(data)
+        values = unpack_from(view, struct_offset) if unpack_from is not None else ()
+        args = []
+        for kind, at, arg, name in table:
+            if kind == _VALUE:
+                args.append(values[at])
+            elif kind == _BIT:
+                args.append(bool(values[at] & arg))
+            else:
+                if view[at] < arg:
+                    raise ValueError(f"Field '{name}': declared max length mismatch: {view[at]} < {arg}")
+                n = min(view[at + 1], arg)
+                args.append(str(view[at + 2:at + 2 + n], "utf-8", "replace").strip())
+        return cls(*args)
+
+    return decode
+
+
+def _compile_struct(reads: list[tuple[int, str]]) -> tuple[struct.Struct | None, int, dict[tuple[int, str], int]]:
+    if not reads:
+        return None, 0, {}
+    start = reads[0][0]
+    fmt = [">"]
+    cursor = start
+    slot_of: dict[tuple[int, str], int] = {}
+    for slot, (index, code) in enumerate(reads):
+        if index < cursor:
+            raise ValueError(f"Overlapping fixed-size fields at frame index {index}")
+        if index > cursor:
+            fmt.append(f"{index - cursor}x")
+        fmt.append(code)
+        slot_of[(index, code)] = slot
+        cursor = index + struct.calcsize(">" + code)
+    return struct.Struct("".join(fmt)), start, slot_of
+
+
+def compile_decoder(frame_spec: FrameSpec, snapshot_cls: type[T]) -> CompiledFrameDecoder[T]:
+    return CompiledFrameDecoder(frame_spec, snapshot_cls)
@@ -0,0 +1,32 @@
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.models.hub_status_frame import HubStatusFrame
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+
+HUB_MODE_CODES = {
+    0: HubMode.UNKNOWN,
+    1: HubMode.ERROR,
+    2: HubMode.SAFETY_STOP,
+    3: HubMode.HOMING_ACTIVE,
+    4: HubMode.HOMING_READY,
+    5: HubMode.CYCLE_READY,
+    6: HubMode.CYCLE_ACTIVE,
+}
+
+EXECUTION_STATE_CODES = {
+    0: ExecutionState.IDLE,
+    1: ExecutionState.EXECUTING,
+    2: ExecutionState.ACTION_NEEDED,
+    3: ExecutionState.FAILED,
+}
+
+
+class HubStatusDecoder:
+    # unknown codes decode to HubMode.UNKNOWN / ExecutionState.FAILED, so the guard stays closed
+    def __init__(self, frame_spec: FrameSpec):
+        self._decoder = compile_decoder(frame_spec, HubStatusFrame)
+
+    def decode(self, data: bytes | bytearray | memoryview) -> HubStateSnapshot:
+        frame = self._decoder.decode(data)
+        return HubStateSnapshot(mode=HUB_MODE_CODES.get(frame.mode, HubMode.UNKNOWN),
+                                execution_state=EXECUTION_STATE_CODES.get(frame.execution_state, ExecutionState.FAILED))
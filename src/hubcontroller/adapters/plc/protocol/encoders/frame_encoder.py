@@ -0,0 +1,117 @@
+from __future__ import annotations
+import struct
+from typing import Any, Iterable, Mapping
+
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec, PlcDataType, field_end_offset
+
+_FIXED_STRUCTS = {
+    PlcDataType.INT: struct.Struct(">h"),
+    PlcDataType.DINT: struct.Struct(">i"),
+    PlcDataType.BYTE: struct.Struct(">B"),
+    PlcDataType.FLOAT: struct.Struct(">f"),
+    PlcDataType.DOUBLE: struct.Struct(">d"),
+}
+_DEFAULTS = {
+    PlcDataType.INT: 0,
+    PlcDataType.DINT: 0,
+    PlcDataType.BYTE: 0,
+    PlcDataType.BOOL: False,
+    PlcDataType.FLOAT: 0.0,
+    PlcDataType.DOUBLE: 0.0,
+    PlcDataType.STRING: "",
+}
+
+
+class CompiledFrameEncoder:
+    # Mirror of CompiledFrameDecoder: fills one preallocated frame buffer from a values mapping.
+    # A shadow copy of the last written frame gives the minimal dirty byte range, so callers
+    # write only what changed. Fields in always_dirty are always part of that range
+    # (e.g. a trigger word the PLC clears on its side). The shadow is only as good as the PLC's
+    # copy: after a reconnect, a CPU restart or a failed write call invalidate() and the next
+    # encode() marks the whole frame dirty.
+    def __init__(self, frame_spec: FrameSpec, always_dirty: Iterable[str] = ()):
+        self._frame_spec = frame_spec
+        self._buffer = bytearray(frame_spec.length)
+        self._shadow = bytearray(frame_spec.length)
+        self._view = memoryview(self._buffer)
+        shadow_view = memoryview(self._shadow)
+        self._written = False
+        self._dirty: tuple[int, int] | None = None
+
+        max_string = max((f.max_len for f in frame_spec.fields if f.dtype == PlcDataType.STRING), default=0)
+        self._zeros = memoryview(bytes(max_string))
+
+        forced = set(always_dirty)
+        unknown = forced - {f.name for f in frame_spec.fields}
+        if unknown:
+            raise ValueError(f"always_dirty fields not in FrameSpec: {sorted(unknown)}")
+
+        # (name, dtype, index, end, struct|max_len|bit mask, buffer slice, shadow slice, forced)
+        self._plan = []
+        for field in frame_spec.fields:
+            index = field.offset - frame_spec.start
+            end = field_end_offset(field) - frame_spec.start
+            if field.dtype == PlcDataType.STRING:
+                arg = field.max_len
+            elif field.dtype == PlcDataType.BOOL:
+                arg = 1 << field.bit_index
+            else:
+                arg = _FIXED_STRUCTS[field.dtype]
+            self._plan.append((field.name, field.dtype, index, end, arg,
+                               self._view[index:end], shadow_view[index:end], field.name in forced))
+
+    @property
+    def frame_spec(self) -> FrameSpec:
+        return self._frame_spec
+
+    @property
+    def buffer(self) -> memoryview:
+        return self._view
+
+    def encode(self, values: Mapping[str, Any]) -> memoryview:
+        buf = self._buffer
+        view = self._view
+        lo, hi = len(buf), 0
+        for name, dtype, index, end, arg, field_view, shadow_view, forced in self._plan:
+            value = values.get(name, _DEFAULTS[dtype])
+            if dtype == PlcDataType.STRING:
+                raw = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+                n = len(raw)
+                if n > arg:
+                    raise ValueError(f"Field '{name}': {n} bytes exceed max_len {arg}")
+                buf[index] = arg
+                buf[index + 1] = n
+                view[index + 2:index + 2 + n] = raw
+                view[index + 2 + n:end] = self._zeros[:arg - n]
+            elif dtype == PlcDataType.BOOL:
+                buf[index] = (buf[index] | arg) if value else (buf[index] & ~arg & 0xFF)
+            else:
+                try:
+                    arg.pack_into(buf, index, value)
+                except struct.error as e:
+                    raise ValueError(f"Field '{name}': cannot encode {value!r} as {dtype.value}: {e}") from e
+            if forced or not self._written or field_view != shadow_view:
+                lo = min(lo, index)
+                hi = max(hi, end)
+        self._dirty = (lo, hi) if hi > lo else None
+        return view
+
+    def dirty_range(self) -> tuple[int, int] | None:
+        # [start, end) relative to frame_spec.start, or None when nothing changed
+        return self._dirty
+
+    def invalidate(self) -> None:
+        self._written = False
+        self._dirty = None
+
+    def mark_written(self) -> None:
+        # call after a successful db_write of the dirty range
+        if self._dirty is not None:
+            lo, hi = self._dirty
+            self._shadow[lo:hi] = self._view[lo:hi]
+        self._written = True
+        self._dirty = None
+
+
+def compile_encoder(frame_spec: FrameSpec, always_dirty: Iterable[str] = ()) -> CompiledFrameEncoder:
+    return CompiledFrameEncoder(frame_spec, always_dirty)
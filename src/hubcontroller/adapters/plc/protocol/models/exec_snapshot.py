@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class ExecSnapshot:
+    trigger: int
+    command: str
+    error: int
+    message: str
+    token: str
+    mission_id: int
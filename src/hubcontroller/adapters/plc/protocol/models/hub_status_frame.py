@@ -0,0 +1,6 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True, slots=True)
+class HubStatusFrame:
+    mode: int
+    execution_state: int
@@ -0,0 +1,23 @@
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length, lazy_frame_specs
+from hubcontroller.config.settings import Settings
+
+# command frame written to the PLC; token carries command_id and comes back in ack/exec frames
+CONTROL_FIELDS = (
+    FieldSpec(name="trigger", offset=0, dtype=PlcDataType.INT),
+    FieldSpec(name="command", offset=2, dtype=PlcDataType.STRING, max_len=100),
+    FieldSpec(name="token", offset=104, dtype=PlcDataType.STRING, max_len=40),
+    FieldSpec(name="mission_id", offset=146, dtype=PlcDataType.INT),
+)
+
+
+def build_control_frame_spec(settings: Settings) -> FrameSpec:
+    return FrameSpec(
+        db_num=settings.plc_control_write,
+        start=0,
+        length=get_max_length(CONTROL_FIELDS),
+        fields=CONTROL_FIELDS
+    )
+
+
+# CONTROL_FRAME_SPEC is built on first access
+__getattr__ = lazy_frame_specs(__name__, globals(), {"CONTROL_FRAME_SPEC": build_control_frame_spec})
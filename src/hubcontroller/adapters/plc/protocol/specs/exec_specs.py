@@ -0,0 +1,37 @@
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length, lazy_frame_specs
+from hubcontroller.config.settings import Settings
+
+# exec and resend frames share the ack layout
+EXEC_FIELDS = (
+    FieldSpec(name="trigger", offset=0, dtype=PlcDataType.INT),
+    FieldSpec(name="command", offset=2, dtype=PlcDataType.STRING, max_len=100),
+    FieldSpec(name="error", offset=104, dtype=PlcDataType.INT),
+    FieldSpec(name="message", offset=106, dtype=PlcDataType.STRING, max_len=100),
+    FieldSpec(name="token", offset=208, dtype=PlcDataType.STRING, max_len=40),
+    FieldSpec(name="mission_id", offset=250, dtype=PlcDataType.INT),
+)
+
+
+def build_exec_frame_spec(settings: Settings) -> FrameSpec:
+    return FrameSpec(
+        db_num=settings.plc_exec_read,
+        start=0,
+        length=get_max_length(EXEC_FIELDS),
+        fields=EXEC_FIELDS
+    )
+
+
+def build_resend_frame_spec(settings: Settings) -> FrameSpec:
+    return FrameSpec(
+        db_num=settings.plc_resend_read,
+        start=0,
+        length=get_max_length(EXEC_FIELDS),
+        fields=EXEC_FIELDS
+    )
+
+
+# EXEC_FRAME_SPEC / RESEND_FRAME_SPEC are built on first access
+__getattr__ = lazy_frame_specs(__name__, globals(), {
+    "EXEC_FRAME_SPEC": build_exec_frame_spec,
+    "RESEND_FRAME_SPEC": build_resend_frame_spec,
+})
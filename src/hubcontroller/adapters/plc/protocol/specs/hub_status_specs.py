@@ -0,0 +1,20 @@
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length, lazy_frame_specs
+from hubcontroller.config.settings import Settings
+
+# hub status area at the start of the control read DB; codes are mapped in HubStatusDecoder
+HUB_STATUS_FIELDS = (
+    FieldSpec(name="mode", offset=0, dtype=PlcDataType.INT),
+    FieldSpec(name="execution_state", offset=2, dtype=PlcDataType.INT),
+)
+
+def build_hub_status_frame_spec(settings: Settings) -> FrameSpec:
+    return FrameSpec(
+        db_num=settings.plc_control_read,
+        start=0,
+        length=get_max_length(HUB_STATUS_FIELDS),
+        fields=HUB_STATUS_FIELDS
+    )
+
+
+# HUB_STATUS_FRAME_SPEC is built on first access
+__getattr__ = lazy_frame_specs(__name__, globals(), {"HUB_STATUS_FRAME_SPEC": build_hub_status_frame_spec})
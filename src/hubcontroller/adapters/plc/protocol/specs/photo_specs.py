@@ -0,0 +1,25 @@
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length, lazy_frame_specs
+from hubcontroller.config.settings import Settings
+
+# photo DB: header, then the image bytes from PHOTO_DATA_OFFSET. The PLC writes the image and
+# size first and the photo_id last; a new non-zero photo_id means a new photo is ready.
+PHOTO_HEADER_FIELDS = (
+    FieldSpec(name="photo_id", offset=0, dtype=PlcDataType.DINT),
+    FieldSpec(name="size", offset=4, dtype=PlcDataType.DINT),
+)
+
+PHOTO_DATA_OFFSET = 8
+PHOTO_MAX_BYTES = 65536 - PHOTO_DATA_OFFSET  # whole DB within 64 KiB
+
+
+def build_photo_header_frame_spec(settings: Settings) -> FrameSpec:
+    return FrameSpec(
+        db_num=settings.plc_photos_read,
+        start=0,
+        length=get_max_length(PHOTO_HEADER_FIELDS),
+        fields=PHOTO_HEADER_FIELDS
+    )
+
+
+# PHOTO_HEADER_FRAME_SPEC is built on first access; PhotoTransfer reads photo_id/size through it
+__getattr__ = lazy_frame_specs(__name__, globals(), {"PHOTO_HEADER_FRAME_SPEC": build_photo_header_frame_spec})
@@ -0,0 +1,47 @@
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
+
+T = TypeVar("T")
+
+
+class AsyncPlcAdapter:
+    # asyncio front of PlcAdapter. Blocking snap7 calls run on one single-thread executor
+    # per connection (read / write, same split as client_read/client_write), so a slow
+    # write never holds up ack polling and the event loop itself never blocks.
+    def __init__(self, plc_adapter: PlcAdapter):
+        self._plc_adapter = plc_adapter
+        self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plc-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="plc-write")
+
+    @property
+    def plc_adapter(self) -> PlcAdapter:
+        return self._plc_adapter
+
+    async def run_read(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        # anything that uses the read connection (gateways, scheduler.poll) goes through here
+        return await asyncio.get_running_loop().run_in_executor(self._read_executor, partial(fn, *args, **kwargs))
+
+    async def run_write(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._write_executor, partial(fn, *args, **kwargs))
+
+    async def connect_clients(self) -> None:
+        await asyncio.gather(self.run_read(self._plc_adapter.connect_read), self.run_write(self._plc_adapter.connect_write))
+
+    async def read_db(self, db_number: int, start: int, length: int) -> bytes:
+        return await self.run_read(self._plc_adapter.read_db, db_number, start, length)
+
+    async def read_multi_db(self, items: list[tuple[int, int, int, bytearray, int]]) -> None:
+        await self.run_read(self._plc_adapter.read_multi_db, items)
+
+    async def write_db(self, db_number: int, start: int, data: bytes) -> None:
+        await self.run_write(self._plc_adapter.write_db, db_number, start, data)
+
+    async def close(self) -> None:
+        await asyncio.gather(self.run_read(self._plc_adapter.disconnect_read), self.run_write(self._plc_adapter.disconnect_write))
+        self._read_executor.shutdown(wait=True)
+        self._write_executor.shutdown(wait=True)
@@ -1,104 +1,279 @@
-import snap7
+from __future__ import annotations
+import ctypes
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
 
-class PlcAdapter:
-    def __init__(self, plc_ip: str, rack: int, slot: int, tcp_port: int):
+CPU_RUN = "S7CpuStatusRun"
+
+
+def _default_client_factory() -> Any:
+    # imported lazily: stand-in clients (tests, simulator) do not need the native library
+    import snap7
+    return snap7.client.Client()
+
+
+class PlcNotRunningError(ConnectionError):
+    # the link is up but the CPU is not in RUN (STOP, HOLD, ...): no I/O until a probe sees RUN
+    pass
+
+
+class PlcBackingOffError(ConnectionError):
+    # no link and the reconnect backoff is not over yet: failed fast, no connect attempt made
+    pass
+
+
+@dataclass(slots=True)
+class PlcLinkStats:
+    probes: int = 0      # get_cpu_state() calls
+    reconnects: int = 0  # successful (re)connects
+    io_errors: int = 0   # failed reads/writes
+    connect_failures: int = 0
+    run_resumed: int = 0  # CPU back in RUN after a probe saw it outside RUN (DBs may have been reset)
+
+
+class PlcConnection:
+    # One snap7 client with its own health state.
+    # The I/O path trusts the socket state (get_connected(), no round-trip); CPU state is only
+    # probed every probe_interval_s or right after an I/O error. Reconnects back off
+    # exponentially with jitter, failing fast in between instead of hammering the PLC.
+    # A CPU that is not in RUN makes the link unhealthy without dropping it: I/O fails fast with
+    # PlcNotRunningError and the CPU state is re-probed with the same backoff until it is RUN again.
+    def __init__(self, name: str, plc_ip: str, rack: int, slot: int, tcp_port: int, stats: PlcLinkStats,
+                 client_factory: Callable[[], Any], probe_interval_s: float, backoff_initial_s: float,
+                 backoff_max_s: float, clock: Callable[[], float], rng: Callable[[], float]):
+        self.name = name
         self._plc_ip = plc_ip
         self._rack = rack
         self._slot = slot
         self._tcp_port = tcp_port
-        self.client_read = None
-        self.client_write = None
+        self._stats = stats
+        self._client_factory = client_factory
+        self._probe_interval_s = probe_interval_s
+        self._backoff_initial_s = backoff_initial_s
+        self._backoff_max_s = backoff_max_s
+        self._clock = clock
+        self._rng = rng
+        self.client = None
+        self.lock = threading.Lock()  # snap7 clients are not thread-safe
+        self._next_probe = 0.0
+        self._backoff_s = 0.0
+        self._next_attempt = 0.0
+        self.cpu_state: str | None = None  # last probed state that was not RUN, None while running
 
-    def connect_read(self):
+    def connect(self) -> None:
         try:
-            if self.client_read is not None and not self.is_connected_read():
-                self.disconnect_read()
-            
-            if self.client_read is None:
-                self.client_read = snap7.client.Client()
-                self.client_read.connect(address=self._plc_ip, rack=self._rack, slot=self._slot, tcp_port=self._tcp_port)
+            if self.client is not None and not self.is_connected():
+                self.disconnect()
+
+            if self.client is None:
+                now = self._clock()
+                if now < self._next_attempt:
+                    raise PlcBackingOffError(f"PLC {self.name} connection backing off for {self._next_attempt - now:.3f}s")
+                self.client = self._client_factory()
+                self.client.connect(address=self._plc_ip, rack=self._rack, slot=self._slot, tcp_port=self._tcp_port)
+                self._stats.reconnects += 1
+                self._backoff_s = 0.0
+                # a CPU last seen outside RUN is re-checked on the first I/O of the new link
+                self._next_probe = now if self.cpu_state is not None else now + self._probe_interval_s
+        except PlcBackingOffError:
+            raise
         except Exception as e:
-            self.disconnect_read()
+            self._stats.connect_failures += 1
+            self._schedule_retry()
+            self.disconnect()
             raise
 
+    def _schedule_retry(self) -> None:
+        self._backoff_s = min(self._backoff_max_s, self._backoff_s * 2 or self._backoff_initial_s)
+        # equal jitter: half fixed, half random, so hubs that lost the PLC together do not reconnect in lockstep
+        self._next_attempt = self._clock() + self._backoff_s / 2 + self._rng() * self._backoff_s / 2
 
-    def connect_write(self):
+    def is_connected(self) -> bool:
+        if self.client is None:
+            return False
         try:
-            if self.client_write is not None and not self.is_connected_write():
-                self.disconnect_write()
-            
-            if self.client_write is None:
-                self.client_write = snap7.client.Client()
-                self.client_write.connect(address=self._plc_ip, rack=self._rack, slot=self._slot, tcp_port=self._tcp_port)
+            return bool(self.client.get_connected())
         except Exception as e:
-            self.disconnect_write()
-            raise
+            return False
+
+    def get_plc_state(self) -> str | None:
+        if self.client is None:
+            return None
+        self._stats.probes += 1
+        self._next_probe = self._clock() + self._probe_interval_s
+        try:
+            state = self.client.get_cpu_state()
+        except Exception as e:
+            return None
+        if isinstance(state, int):
+            import snap7
+            return snap7.types.cpu_statuses.get(state)
+        return state
+
+    def probe(self) -> bool:
+        # False when the link is gone (connection dropped); a CPU outside RUN keeps the link and
+        # schedules the next probe with backoff
+        state = self.get_plc_state()
+        if state == CPU_RUN:
+            if self.cpu_state is not None:
+                self.cpu_state = None
+                self._backoff_s = 0.0
+                self._stats.run_resumed += 1
+            return True
+        if state is None:
+            self.disconnect()
+            return False
+        self.cpu_state = state
+        self._schedule_retry()
+        self._next_probe = self._next_attempt
+        return True
+
+    def _check_running(self) -> None:
+        if self.cpu_state is not None:
+            raise PlcNotRunningError(f"PLC {self.name}: CPU not in RUN ({self.cpu_state})")
+
+    def ensure_connected(self) -> None:
+        if not self.is_connected():
+            self.connect()
+        elif self._clock() >= self._next_probe:
+            if not self.probe():
+                self.connect()
+        self._check_running()
+
+    def on_io_error(self) -> None:
+        # drop the connection only if the PLC is really gone, not on a bad address or a stopped CPU
+        self._stats.io_errors += 1
+        if not self.is_connected() or not self.probe():
+            self.disconnect()
+
+    def disconnect(self) -> None:
+        try:
+            if self.client is not None:
+                self.client.disconnect()
+                self.client.destroy()
+                self.client = None
+        except Exception as e:
+            if self.client is not None:
+                self.client.destroy()
+                self.client = None
+
+
+class PlcAdapter:
+    def __init__(self, plc_ip: str, rack: int, slot: int, tcp_port: int, probe_interval_s: float = 5.0,
+                 backoff_initial_s: float = 0.2, backoff_max_s: float = 10.0,
+                 client_factory: Callable[[], Any] = _default_client_factory,
+                 clock: Callable[[], float] = time.monotonic, rng: Callable[[], float] = random.random):
+        self._plc_ip = plc_ip
+        self._rack = rack
+        self._slot = slot
+        self._tcp_port = tcp_port
+        self.stats = PlcLinkStats()
+        settings = (plc_ip, rack, slot, tcp_port, self.stats, client_factory, probe_interval_s,
+                    backoff_initial_s, backoff_max_s, clock, rng)
+        self.read_connection = PlcConnection("read", *settings)
+        self.write_connection = PlcConnection("write", *settings)
+
+    @property
+    def client_read(self):
+        return self.read_connection.client
+
+    @property
+    def client_write(self):
+        return self.write_connection.client
+
+    def connect_read(self):
+        self.read_connection.connect()
+
+    def connect_write(self):
+        self.write_connection.connect()
 
     def connect_clients(self):
         self.connect_read()
         self.connect_write()
 
     def is_connected_read(self) -> bool:
-        if self.client_read is None:
-            return False
-        return self.get_plc_state(self.client_read) == 'S7CpuStatusRun'
+        return self.read_connection.is_connected()
 
     def is_connected_write(self) -> bool:
-        if self.client_write is None:
-            return False
-        return self.get_plc_state(self.client_write) == 'S7CpuStatusRun'
+        return self.write_connection.is_connected()
 
-    def get_plc_state(self, client: snap7.client.Client) -> str | None:
-        try:
-            state = client.get_cpu_state()
-        except Exception as e:
-            return None
-        return snap7.types.cpu_statuses.get(state)
+    def get_plc_state(self, client: Any) -> str | None:
+        connection = self.write_connection if client is self.client_write else self.read_connection
+        return connection.get_plc_state()
 
     def disconnect_write(self):
-        try:
-            if self.client_write is not None:
-                self.client_write.disconnect()
-                self.client_write.destroy()
-                self.client_write = None
-
-        except Exception as e:
-            if self.client_write is not None: 
-                self.client_write.destroy()
-                self.client_write = None
-
+        self.write_connection.disconnect()
 
     def disconnect_read(self):
-        try:
-            if self.client_read is not None:
-                self.client_read.disconnect()
-                self.client_read.destroy()
-                self.client_read = None
-        except Exception as e:
-            if self.client_read is not None: 
-                self.client_read.destroy()
-                self.client_read = None
+        self.read_connection.disconnect()
 
     def read_db(self, db_number: int, start: int, length: int) -> bytes:
-        try:
-            self.ensure_connected_read()
-            return self.client_read.db_read(db_number, start, length)
-        except Exception as e:
-            self.disconnect_read()
-            raise
+        return self._read_db(self.read_connection, db_number, start, length)
+
+    def read_db_write(self, db_number: int, start: int, length: int) -> bytes:
+        # read-back for the writer (control slot trigger): on the write connection, so it never
+        # waits for the read lock the pollers hold, nor makes them wait
+        return self._read_db(self.write_connection, db_number, start, length)
+
+    def _read_db(self, connection: PlcConnection, db_number: int, start: int, length: int) -> bytes:
+        with connection.lock:
+            connection.ensure_connected()
+            try:
+                return connection.client.db_read(db_number, start, length)
+            except Exception as e:
+                connection.on_io_error()
+                raise
+
+    def read_multi_db(self, items: list[tuple[int, int, int, bytearray, int]]) -> None:
+        # one read_multi_vars round-trip; each item is read in place into (buffer, offset)
+        import snap7
+        connection = self.read_connection
+        with connection.lock:
+            connection.ensure_connected()
+            try:
+                data_items = (snap7.types.S7DataItem * len(items))()
+                targets = []  # keep the ctypes views alive until the call returns
+                for data_item, (db_number, start, size, buffer, offset) in zip(data_items, items):
+                    data_item.Area = ctypes.c_int32(snap7.types.S7AreaDB)
+                    data_item.WordLen = ctypes.c_int32(snap7.types.S7WLByte)
+                    data_item.Result = ctypes.c_int32(0)
+                    data_item.DBNumber = ctypes.c_int32(db_number)
+                    data_item.Start = ctypes.c_int32(start)
+                    data_item.Amount = ctypes.c_int32(size)
+                    target = (ctypes.c_uint8 * size).from_buffer(buffer, offset)
+                    targets.append(target)
+                    data_item.pData = ctypes.cast(target, ctypes.POINTER(ctypes.c_uint8))
+                connection.client.read_multi_vars(data_items)
+                for data_item, (db_number, start, size, _, _) in zip(data_items, items):
+                    if data_item.Result != 0:
+                        raise RuntimeError(f"read_multi_vars item DB{db_number}.{start}[{size}] failed with result {data_item.Result}")
+            except Exception as e:
+                connection.on_io_error()
+                raise
+
+    def pdu_length(self) -> int:
+        connection = self.read_connection
+        with connection.lock:
+            connection.ensure_connected()
+            return connection.client.get_pdu_length()
 
     def write_db(self, db_number: int, start: int, data: bytes) -> None:
-        try:
-            self.ensure_connected_write()
-            self.client_write.db_write(db_number, start, data)
-        except Exception as e:
-            self.disconnect_write()     
-            raise
+        connection = self.write_connection
+        with connection.lock:
+            connection.ensure_connected()
+            try:
+                connection.client.db_write(db_number, start, data)
+            except Exception as e:
+                connection.on_io_error()
+                raise
 
     def ensure_connected_read(self) -> None:
-        if self.client_read is None or not self.is_connected_read():
-            self.connect_read()
-    
+        with self.read_connection.lock:
+            self.read_connection.ensure_connected()
+
     def ensure_connected_write(self) -> None:
-        if self.client_write is None or not self.is_connected_write():
-            self.connect_write()
\ No newline at end of file
+        with self.write_connection.lock:
+            self.write_connection.ensure_connected()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec
+
+# S7 ReadVar framing: telegram header + function/item-count, per item a 4-byte
+# data header (payload padded to even length) in the response and a 12-byte
+# address in the request; snap7 accepts at most 20 items per request.
+S7_HEADER_SIZE = 14
+S7_ITEM_RESPONSE_HEADER = 4
+S7_ITEM_REQUEST_SIZE = 12
+S7_MAX_VARS = 20
+S7_MIN_PDU = 240
+
+# (db_number, start, size, target buffer, offset in target)
+ReadItem = tuple[int, int, int, bytearray, int]
+
+
+class MultiReader(Protocol):
+    def read_multi_db(self, items: list[ReadItem]) -> None: ...
+
+    def pdu_length(self) -> int: ...
+
+
+@dataclass(eq=False, slots=True)
+class ReadHandle:
+    db_num: int
+    start: int
+    length: int
+    view: memoryview | None = None  # set by register(), zeroed until the first poll(); a later register() may re-point it
+
+
+@dataclass(slots=True)
+class _Block:
+    db_num: int
+    start: int
+    end: int
+    handles: list[ReadHandle] = field(default_factory=list)
+    buffer: bytearray = field(default_factory=bytearray)
+
+
+class ReadScheduler:
+    # Coalesces the read areas of all gateways into as few round-trips as possible:
+    # - ranges in the same DB that overlap or are at most max_gap bytes apart become one block
+    # - blocks are cut into items that fit one PDU and packed into read_multi_vars batches
+    # - each block is read straight into its own preallocated buffer and every registered
+    #   area gets a zero-copy memoryview slice of it
+    # Blocks and views are laid out by every register(), so a handle's view is usable right away;
+    # only the PDU-sized batches need the reader and are planned by the first poll().
+    def __init__(self, reader: MultiReader, pdu_size: int | None = None, max_gap: int = 0):
+        self._reader = reader
+        self._pdu_size = pdu_size
+        self._max_gap = max_gap
+        self._handles: list[ReadHandle] = []
+        self._blocks: list[_Block] = []
+        self._batches: list[list[ReadItem]] = []
+        self._planned = False
+
+    def register(self, frame_spec: FrameSpec) -> ReadHandle:
+        return self.register_area(frame_spec.db_num, frame_spec.start, frame_spec.length)
+
+    def register_area(self, db_num: int, start: int, length: int) -> ReadHandle:
+        if length <= 0:
+            raise ValueError(f"Read area length must be > 0, got {length}")
+        handle = ReadHandle(db_num=db_num, start=start, length=length)
+        self._handles.append(handle)
+        self._layout()
+        self._planned = False
+        return handle
+
+    @property
+    def round_trips(self) -> int:
+        return len(self._batches)
+
+    def _layout(self) -> None:
+        blocks: list[_Block] = []
+        for handle in sorted(self._handles, key=lambda h: (h.db_num, h.start)):
+            last = blocks[-1] if blocks else None
+            if last is not None and last.db_num == handle.db_num and handle.start <= last.end + self._max_gap:
+                last.end = max(last.end, handle.start + handle.length)
+                last.handles.append(handle)
+            else:
+                blocks.append(_Block(db_num=handle.db_num, start=handle.start, end=handle.start + handle.length, handles=[handle]))
+        for block in blocks:
+            block.buffer = bytearray(block.end - block.start)
+            view = memoryview(block.buffer)
+            for handle in block.handles:
+                offset = handle.start - block.start
+                handle.view = view[offset:offset + handle.length]
+        self._blocks = blocks
+
+    def plan(self) -> None:
+        pdu = self._pdu_size or self._reader.pdu_length() or S7_MIN_PDU
+        max_item = pdu - S7_HEADER_SIZE - S7_ITEM_RESPONSE_HEADER
+
+        items: list[ReadItem] = []
+        for block in self._blocks:
+            for offset in range(0, len(block.buffer), max_item):
+                size = min(max_item, len(block.buffer) - offset)
+                items.append((block.db_num, block.start + offset, size, block.buffer, offset))
+
+        # first-fit-decreasing packing of items into PDU-sized requests
+        batches: list[list[ReadItem]] = []
+        room: list[int] = []
+        for item in sorted(items, key=lambda i: i[2], reverse=True):
+            cost = S7_ITEM_RESPONSE_HEADER + item[2] + (item[2] & 1)
+            for i, batch in enumerate(batches):
+                fits_request = S7_HEADER_SIZE + S7_ITEM_REQUEST_SIZE * (len(batch) + 1) <= pdu
+                if len(batch) < S7_MAX_VARS and fits_request and cost <= room[i]:
+                    batch.append(item)
+                    room[i] -= cost
+                    break
+            else:
+                batches.append([item])
+                room.append(pdu - S7_HEADER_SIZE - cost)
+
+        self._batches = batches
+        self._planned = True
+
+    def poll(self) -> None:
+        if not self._planned:
+            self.plan()
+        for batch in self._batches:
+            self._reader.read_multi_db(batch)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+import os
+import threading
+from dataclasses import dataclass, field, fields
+from typing import Any, Callable, Mapping
+
+
+class ConfigError(ValueError):
+    # every problem found in one pass, so a broken .env is fixed in one go
+    def __init__(self, errors: list[str]):
+        self.errors = errors
+        super().__init__("Invalid configuration:\n  " + "\n  ".join(errors))
+
+
+def _db_number(raw: str) -> int:
+    value = int(raw)
+    if not 1 <= value <= 65535:
+        raise ValueError(f"{value} is not a DB number (1..65535)")
+    return value
+
+
+def _port(raw: str) -> int:
+    value = int(raw)
+    if not 1 <= value <= 65535:
+        raise ValueError(f"{value} is not a TCP port (1..65535)")
+    return value
+
+
+def _count(raw: str) -> int:
+    value = int(raw)
+    if value < 0:
+        raise ValueError(f"{value} is negative")
+    return value
+
+
+def _env(name: str, parse: Callable[[str], Any] = str, required: bool = True):
+    return field(metadata={"env": name, "parse": parse, "required": required})
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    plc_control_ip: str = _env("PLC_CONTROL_IP")
+    plc_control_read: int = _env("PLC_CONTROL_READ", _db_number)
+    plc_control_write: int = _env("PLC_CONTROL_WRITE", _db_number)
+    plc_photos_read: int = _env("PLC_PHOTOS_READ", _db_number)
+    plc_exec_read: int = _env("PLC_EXEC_READ", _db_number)
+    plc_ack_read_db: int = _env("PLC_ACK_READ_DB", _db_number)
+    plc_livebit: int = _env("PLC_LIVEBIT", _db_number)
+    plc_resend_read: int = _env("PLC_RESEND_READ", _db_number)
+
+    hub_device_ip: str = _env("PLC_CONTROL_IP")
+    hub_device_serial_number: str | None = _env("HUB_DEVICE_SERIAL_NUMBER", required=False)
+    hub_number_of_uavs: int = _env("HUB_NUMBER_OF_UAVS", _count)
+    hub_number_of_battery: int = _env("HUB_NUMBER_OF_BATTERY", _count)
+
+    ack_topic: str | None = _env("SERVER_MQTT_ACK_TOPIC", required=False)
+    heartbeat_hub_topic: str | None = _env("SERVER_MQTT_HUB_HEARTBEAT_TOPIC", required=False)
+    control_topic: str | None = _env("SERVER_MQTT_CONTROL_TOPIC", required=False)
+    app_topic: str | None = _env("SERVER_MQTT_APP_TOPIC", required=False)
+    photo_hub_topic: str | None = _env("SERVER_MQTT_PHOTO_TOPIC", required=False)
+
+    mqtt_password: str | None = _env("SERVER_MQTT_PASSWORD", required=False)
+    mqtt_username: str | None = _env("SERVER_MQTT_USERNAME", required=False)
+    mqtt_server_address: str | None = _env("SERVER_IP_ADDRESS", required=False)
+    mqtt_server_port: int = _env("SERVER_MQTT_PORT", _port)
+    mqtt_client_id: str | None = _env("SERVER_MQTT_CLIENT_HUB_ID", required=False)
+    csv_path_ack: str | None = _env("CSV_PATH_ACK", required=False)
+    csv_path_control: str | None = _env("CSV_PATH_CONTROL", required=False)
+    csv_path_exec: str | None = _env("CSV_PATH_EXEC", required=False)
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str]) -> Settings:
+        values = {}
+        errors = []
+        for f in fields(cls):
+            name, parse = f.metadata["env"], f.metadata["parse"]
+            raw = environ.get(name)
+            if raw is None or raw.strip() == "":
+                if f.metadata["required"] and f"{name}: missing" not in errors:
+                    errors.append(f"{name}: missing")
+                values[f.name] = None
+                continue
+            try:
+                values[f.name] = parse(raw.strip())
+            except ValueError as e:
+                error = f"{name}={raw!r}: {e}"
+                if error not in errors:
+                    errors.append(error)
+        if errors:
+            raise ConfigError(errors)
+        return cls(**values)
+
+
+def load_settings(environ: Mapping[str, str] | None = None, dotenv: bool = True) -> Settings:
+    # dotenv is imported only here: nothing that merely imports hubcontroller pays for it
+    if environ is None:
+        if dotenv:
+            try:
+                from dotenv import load_dotenv
+            except ImportError:
+                pass
+            else:
+                load_dotenv()
+        environ = os.environ
+    return Settings.from_env(environ)
+
+
+_settings: Settings | None = None
+_settings_lock = threading.Lock()
+_configure_hooks: list[Callable[[], None]] = []
+
+
+def get_settings() -> Settings:
+    # parsed and validated once, on first use
+    global _settings
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = load_settings()
+            settings = _settings
+    return settings
+
+
+def on_configure(hook: Callable[[], None]) -> None:
+    # hook runs after every configure(), to drop what was derived from the previous settings
+    _configure_hooks.append(hook)
+
+
+def configure(settings: Settings | None) -> None:
+    # explicit settings (tests, simulator, embedding); None makes the next get_settings() reload.
+    # Values derived from the settings are rebuilt on their next lookup; objects already handed
+    # out (a spec a gateway was built with) keep the old values.
+    global _settings
+    with _settings_lock:
+        _settings = settings
+    for hook in _configure_hooks:
+        hook()
@@ -0,0 +1,87 @@
+import asyncio
+from typing import Callable, Iterable
+
+from hubcontroller.adapters.plc.async_client import AsyncPlcClient
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry, TransitionResult
+from hubcontroller.domain.retry_scheduler import RetryScheduler
+
+
+class AsyncCommandProcessor(CommandProcessor):
+    # Same admission/guard/registry flow as CommandProcessor; the PLC write goes through
+    # AsyncPlcClient and retry backoff awaits asyncio.sleep, so intake of other commands
+    # continues while one is backing off. plc_client is an AsyncPlcClient; there is no retry_scheduler
+    # (its writes are synchronous), the awaited backoff already keeps intake going.
+    # A command stays RECEIVED while its write is awaited, so a copy arriving meanwhile would pass
+    # should_dispatch; ids with a write in progress are tracked and such copies are DUPLICATEs.
+    def __init__(self, command_registry: CommandRegistry, handlers: dict[str, Callable[[Command], None]],
+                 state_provider: HubStateProvider, guard: Guard, plc_client: AsyncPlcClient,
+                 retry_scheduler: RetryScheduler | None = None):
+        if retry_scheduler is not None:
+            raise ValueError("AsyncCommandProcessor does not support a retry_scheduler")
+        super().__init__(command_registry, handlers, state_provider, guard, plc_client)
+        self._dispatching: set[str] = set()
+
+    def _admit_command(self, command: Command) -> tuple[bool, TransitionResult | None]:
+        dispatch, result = super()._admit_command(command)
+        if dispatch and command.command_id in self._dispatching:
+            return False, TransitionResult.DUPLICATE
+        return dispatch, result
+
+    async def _dispatch_command_to_plc_retry(self, command: Command, first_status: PlcSendStatus | None = None) -> PlcSendStatus:
+        if first_status is not None and self._is_final_send_status(first_status):
+            return first_status
+        last_status = first_status or PlcSendStatus.ERROR
+        for attempt in range(0 if first_status is None else 1, self.retry_attempts):
+            if attempt > 0:
+                await asyncio.sleep(self._retry_delay_s(attempt))
+            last_status = await self._plc_client.plc_write_command(command)
+            if self._is_final_send_status(last_status):
+                return last_status
+        return last_status
+
+    async def _dispatch_batch_retry(self, commands: list[Command], statuses: list[PlcSendStatus]) -> list[PlcSendStatus]:
+        statuses = list(statuses)
+        for attempt in range(1, self.retry_attempts):
+            failed = [i for i, status in enumerate(statuses) if not self._is_final_send_status(status)]
+            if not failed:
+                break
+            await asyncio.sleep(self._retry_delay_s(attempt))
+            for i, status in zip(failed, await self._plc_client.plc_write_commands([commands[i] for i in failed])):
+                statuses[i] = status
+        return statuses
+
+    async def on_command(self, command: Command) -> TransitionResult | None:
+        dispatch, result = self._admit_command(command)
+        if not dispatch:
+            return result
+        self._dispatching.add(command.command_id)
+        try:
+            status = await self._dispatch_command_to_plc_retry(command)
+        finally:
+            self._dispatching.discard(command.command_id)
+        return self._on_send_status(command, status)
+
+    async def on_commands(self, batch: Iterable[Command]) -> list[TransitionResult | None]:
+        batch = list(batch)
+        results, to_send = self._admit_batch(batch)
+        in_progress = [i for i in to_send if batch[i].command_id in self._dispatching]
+        for i in in_progress:
+            results[i] = TransitionResult.DUPLICATE
+        if in_progress:
+            to_send = [i for i in to_send if batch[i].command_id not in self._dispatching]
+        if not to_send:
+            return results
+        commands = [batch[i] for i in to_send]
+        ids = {command.command_id for command in commands}
+        self._dispatching.update(ids)
+        try:
+            statuses = await self._plc_client.plc_write_commands(commands)
+            statuses = await self._dispatch_batch_retry(commands, statuses)
+        finally:
+            self._dispatching.difference_update(ids)
+        return self._finish_batch(batch, results, to_send, statuses)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Protocol
+
+NS_PER_S = 1_000_000_000
+EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+
+
+def seconds_to_ns(seconds: float) -> int:
+    return round(seconds * NS_PER_S)
+
+
+class Clock(Protocol):
+    # integer nanoseconds for deadline math; only ordering/differences are meaningful
+    def now_ns(self) -> int: ...
+
+    # wall-clock UTC for the edges (CSV, MQTT payloads)
+    def to_utc(self, ns: int) -> datetime: ...
+
+
+class MonotonicClock:
+    def __init__(self):
+        # wall time is sampled once; later NTP steps do not move monotonic deadlines
+        self._anchor_mono_ns = time.monotonic_ns()
+        self._anchor_wall_ns = time.time_ns()
+
+    def now_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def to_utc(self, ns: int) -> datetime:
+        wall_ns = self._anchor_wall_ns + (ns - self._anchor_mono_ns)
+        return EPOCH_UTC + timedelta(microseconds=wall_ns // 1000)
+
+
+class DatetimeClock:
+    # adapts the Stage 1 `clock: Callable[[], datetime]` injection; ns are epoch-based
+    def __init__(self, now: Callable[[], datetime]):
+        self._now = now
+
+    def now_ns(self) -> int:
+        now = self._now()
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        return (now - EPOCH_UTC) // _ONE_US * 1000
+
+    def to_utc(self, ns: int) -> datetime:
+        return EPOCH_UTC + timedelta(microseconds=ns // 1000)
+
+
+class ManualClock:
+    # fake monotonic clock for tests and benchmarks
+    def __init__(self, start_ns: int = 0, wall_start: datetime = EPOCH_UTC):
+        self._t = start_ns
+        self._start_ns = start_ns
+        self._wall_start = wall_start
+
+    def now_ns(self) -> int:
+        return self._t
+
+    def advance(self, second: float) -> None:
+        self._t += seconds_to_ns(second)
+
+    def to_utc(self, ns: int) -> datetime:
+        return self._wall_start + timedelta(microseconds=(ns - self._start_ns) // 1000)
+
+
+def as_clock(clock: Clock | Callable[[], datetime] | None) -> Clock:
+    if clock is None:
+        return MonotonicClock()
+    if hasattr(clock, "now_ns"):
+        return clock
+    return DatetimeClock(clock)
@@ -0,0 +1,377 @@
+from __future__ import annotations
+import heapq
+from array import array
+from datetime import datetime
+from itertools import compress
+from sys import intern
+from typing import Any, Iterator, Mapping, Sequence
+from weakref import WeakValueDictionary
+
+from hubcontroller.domain.clock import Clock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.registry import NO_TS, CommandRecord, CommandRegistry, RecordColumns
+
+_STATUSES = tuple(CommandStatus)
+_STATUS_CODE = {status: code for code, status in enumerate(_STATUSES)}
+_TERMINAL_CODES = frozenset(_STATUS_CODE[s] for s in (CommandStatus.EXECUTED, CommandStatus.REJECTED, CommandStatus.FAILED, CommandStatus.TIMEOUT))
+_TS_FIELDS = ("received_ns", "dispatched_ns", "accepted_ns", "executed_ns", "rejected_ns", "timeout_ns", "failed_ns")
+_OPEN_MASK = bytes(code < _STATUS_CODE[CommandStatus.EXECUTED] for code in range(256))  # bytes.translate table
+
+
+def _ts_property(column: int, name: str) -> property:
+    def fget(self: CompactRecordView) -> int | None:
+        if self._detached is not None:
+            return getattr(self._detached, name)
+        store = self._store
+        value = store._ts[column][self._slot]
+        return None if value == NO_TS else value - store._base
+
+    def fset(self: CompactRecordView, value: int | None) -> None:
+        if self._detached is not None:
+            setattr(self._detached, name, value)
+            return
+        store = self._store
+        store._ts[column][self._slot] = NO_TS if value is None else value + store._base
+
+    return property(fget, fset)
+
+
+def _at_property(name: str) -> property:
+    def fget(self: CompactRecordView) -> datetime | None:
+        ns = getattr(self, name)
+        return None if ns is None else self._store.clock.to_utc(ns)
+
+    return property(fget)
+
+
+class CompactRecordView:
+    # CommandRecord-compatible view over one slot of ArrayRecordStore; .command is rebuilt from the
+    # columns on every access (equal to the one received, not the same object).
+    # When the slot is freed (gc/eviction) the view keeps a detached copy, like a dropped dataclass would.
+    __slots__ = ("_store", "_slot", "_detached", "__weakref__")
+
+    def __init__(self, store: ArrayRecordStore, slot: int):
+        self._store = store
+        self._slot = slot
+        self._detached: CommandRecord | None = None
+
+    @property
+    def command(self) -> Command:
+        if self._detached is not None:
+            return self._detached.command
+        return self._store._command(self._slot)
+
+    @property
+    def status(self) -> CommandStatus:
+        if self._detached is not None:
+            return self._detached.status
+        return _STATUSES[self._store._status[self._slot]]
+
+    @status.setter
+    def status(self, value: CommandStatus) -> None:
+        if self._detached is not None:
+            self._detached.status = value
+            return
+        self._store._status[self._slot] = _STATUS_CODE[value]
+
+    @property
+    def clock(self) -> Clock:
+        return self._store.clock
+
+    received_ns = _ts_property(0, "received_ns")
+    dispatched_ns = _ts_property(1, "dispatched_ns")
+    accepted_ns = _ts_property(2, "accepted_ns")
+    executed_ns = _ts_property(3, "executed_ns")
+    rejected_ns = _ts_property(4, "rejected_ns")
+    timeout_ns = _ts_property(5, "timeout_ns")
+    failed_ns = _ts_property(6, "failed_ns")
+
+    received_at = _at_property("received_ns")
+    dispatched_at = _at_property("dispatched_ns")
+    accepted_at = _at_property("accepted_ns")
+    executed_at = _at_property("executed_ns")
+    rejected_at = _at_property("rejected_ns")
+    timeout_at = _at_property("timeout_ns")
+    failed_at = _at_property("failed_ns")
+
+    def is_terminal(self) -> bool:
+        if self._detached is not None:
+            return self._detached.is_terminal()
+        return self._store._status[self._slot] in _TERMINAL_CODES
+
+    def _detach(self) -> None:
+        self._detached = self._store._materialize(self._slot)
+
+    def __repr__(self) -> str:
+        return f"CompactRecordView(command={self.command!r}, status={self.status!r})"
+
+
+class ArrayRecordStore:
+    # Struct-of-arrays record store indexed by slot id: command_id and command_type (interned)
+    # in lists, one int8 status column, one int64 column per timestamp; payloads are kept only
+    # for the commands that have one. Freed slots go to a free-list and are reused.
+    # No per-record object is left besides the command_id string:
+    # - command_id -> slot is an open-addressing table of int32 slot ids (linear probing on the
+    #   str hash, backward-shift delete, load factor <= 0.5), like TokenIndex
+    # - age order (oldest first) is a doubly linked list in two int32 columns
+    # Timestamps are stored as registry ns + base. The base is 0 unless load() took journal columns,
+    # which are wall-clock ns and are kept as they are.
+    # Mirrors the subset of OrderedDict[str, CommandRecord] that CommandRegistry uses.
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self._base = 0
+        self._size = 0
+        self._table = array("i", [-1]) * 8
+        self._mask = 7
+        self._ids: list[str | None] = []
+        self._types: list[str | None] = []
+        self._payloads: dict[int, Mapping[str, Any]] = {}
+        self._status = array("b")
+        self._ts = tuple(array("q") for _ in _TS_FIELDS)
+        self._prev = array("i")
+        self._next = array("i")
+        self._head = -1
+        self._tail = -1
+        self._free = array("i")
+        self._views: WeakValueDictionary[int, CompactRecordView] = WeakValueDictionary()
+
+    def add(self, cmd: Command, status: CommandStatus, received_ns: int) -> CompactRecordView:
+        command_type = cmd.command_type
+        if type(command_type) is str:
+            command_type = intern(command_type)
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = cmd.command_id
+            self._types[slot] = command_type
+            self._status[slot] = _STATUS_CODE[status]
+            self._ts[0][slot] = received_ns + self._base
+            for column in self._ts[1:]:
+                column[slot] = NO_TS
+        else:
+            slot = len(self._ids)
+            self._ids.append(cmd.command_id)
+            self._types.append(command_type)
+            self._status.append(_STATUS_CODE[status])
+            self._ts[0].append(received_ns + self._base)
+            for column in self._ts[1:]:
+                column.append(NO_TS)
+            self._prev.append(-1)
+            self._next.append(-1)
+        if cmd.payload:
+            self._payloads[slot] = cmd.payload
+        if (self._size + 1) * 2 > len(self._table):
+            self._rebuild(len(self._table) * 2, list(self._order()))
+        self._table[self._probe(cmd.command_id)] = slot
+        self._size += 1
+        self._link_last(slot)
+        return self._view(slot)
+
+    def load(self, columns: RecordColumns) -> None:
+        # bulk restore into an empty store (journal recovery): slot i is row i, every column is
+        # copied as a whole and the table is built in one pass
+        if self._size:
+            raise ValueError("load() needs an empty store")
+        n = len(columns.command_ids)
+        self._ids = list(columns.command_ids)
+        self._types = list(columns.command_types)
+        self._payloads = dict(columns.payloads)
+        self._status = array("b", columns.status)
+        self._ts = tuple(array("q", column) for column in columns.stamps)
+        self._base = columns.offset
+        self._prev = array("i", range(-1, n - 1))
+        self._next = array("i", range(1, n + 1))
+        if n:
+            self._next[n - 1] = -1
+        self._head, self._tail = (0, n - 1) if n else (-1, -1)
+        self._free = array("i")
+        self._size = n
+        size = 8
+        while size < n * 2:
+            size *= 2
+        self._rebuild(size, range(n))
+
+    # --- command_id table ---
+
+    def _probe(self, command_id: str) -> int:
+        # table position of command_id, or of the empty entry where it would go
+        table, ids, mask = self._table, self._ids, self._mask
+        i = hash(command_id) & mask
+        while True:
+            slot = table[i]
+            if slot == -1 or ids[slot] == command_id:
+                return i
+            i = (i + 1) & mask
+
+    def _rebuild(self, size: int, slots: Sequence[int]) -> None:
+        # a fresh table at the given size; nothing is deleted meanwhile, so plain insertion is enough
+        mask = size - 1
+        table = array("i", [-1]) * size
+        ids = self._ids
+        for slot in slots:
+            i = hash(ids[slot]) & mask
+            while table[i] != -1:
+                i = (i + 1) & mask
+            table[i] = slot
+        self._table = table
+        self._mask = mask
+
+    def _remove_at(self, i: int) -> int:
+        # backward-shift delete: pull later members of the probe chain into the hole
+        table, ids, mask = self._table, self._ids, self._mask
+        removed = table[i]
+        hole = i
+        while True:
+            i = (i + 1) & mask
+            slot = table[i]
+            if slot == -1:
+                break
+            home = hash(ids[slot]) & mask
+            # entry at i may fill the hole only if its home is not cyclically in (hole, i]
+            if (hole < i and hole < home <= i) or (hole > i and (home > hole or home <= i)):
+                continue
+            table[hole] = slot
+            hole = i
+        table[hole] = -1
+        self._size -= 1
+        return removed
+
+    # --- age order ---
+
+    def _link_last(self, slot: int) -> None:
+        self._prev[slot] = self._tail
+        self._next[slot] = -1
+        if self._tail != -1:
+            self._next[self._tail] = slot
+        else:
+            self._head = slot
+        self._tail = slot
+
+    def _unlink(self, slot: int) -> None:
+        prev, next_ = self._prev[slot], self._next[slot]
+        if prev != -1:
+            self._next[prev] = next_
+        else:
+            self._head = next_
+        if next_ != -1:
+            self._prev[next_] = prev
+        else:
+            self._tail = prev
+
+    def _view(self, slot: int) -> CompactRecordView:
+        # callers holding a view keep getting the same object (identity like the dict store)
+        view = self._views.get(slot)
+        if view is None:
+            view = CompactRecordView(self, slot)
+            self._views[slot] = view
+        return view
+
+    def _command(self, slot: int) -> Command:
+        payload = self._payloads.get(slot)
+        return Command(self._ids[slot], self._types[slot], {} if payload is None else payload)
+
+    def _materialize(self, slot: int) -> CommandRecord:
+        values = [column[slot] for column in self._ts]
+        return CommandRecord(self._command(slot), _STATUSES[self._status[slot]],
+                             *(None if v == NO_TS else v - self._base for v in values), clock=self.clock)
+
+    def _release(self, slot: int) -> CommandRecord:
+        view = self._views.pop(slot, None)
+        if view is not None:
+            view._detach()
+            record = view._detached
+        else:
+            record = self._materialize(slot)
+        self._unlink(slot)
+        self._ids[slot] = None
+        self._types[slot] = None
+        self._payloads.pop(slot, None)
+        self._free.append(slot)
+        return record
+
+    # --- OrderedDict subset ---
+
+    def get(self, command_id: str) -> CompactRecordView | None:
+        slot = self._table[self._probe(command_id)]
+        return None if slot == -1 else self._view(slot)
+
+    def __contains__(self, command_id: str) -> bool:
+        return self._table[self._probe(command_id)] != -1
+
+    def __getitem__(self, command_id: str) -> CompactRecordView:
+        slot = self._table[self._probe(command_id)]
+        if slot == -1:
+            raise KeyError(command_id)
+        return self._view(slot)
+
+    def __delitem__(self, command_id: str) -> None:
+        i = self._probe(command_id)
+        if self._table[i] == -1:
+            raise KeyError(command_id)
+        self._release(self._remove_at(i))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _order(self) -> Iterator[int]:
+        slot = self._head
+        while slot != -1:
+            next_ = self._next[slot]
+            yield slot
+            slot = next_
+
+    def values(self) -> Iterator[CompactRecordView]:
+        for slot in self._order():
+            yield self._view(slot)
+
+    def items(self) -> Iterator[tuple[str, CompactRecordView]]:
+        for slot in self._order():
+            yield self._ids[slot], self._view(slot)
+
+    def popitem(self, last: bool = True) -> tuple[str, CommandRecord]:
+        slot = self._tail if last else self._head
+        if slot == -1:
+            raise KeyError("popitem(): store is empty")
+        command_id = self._ids[slot]
+        self._remove_at(self._probe(command_id))
+        return command_id, self._release(slot)
+
+
+class CompactCommandRegistry(CommandRegistry):
+    # Same state machine as CommandRegistry, records live in ArrayRecordStore columns
+    # and get_record()/transitions hand out CompactRecordView objects.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._by_command_id = ArrayRecordStore(self._clock)
+
+    def _add_record(self, cmd: Command, received_ns: int) -> CompactRecordView:
+        return self._by_command_id.add(cmd, CommandStatus.RECEIVED, received_ns)
+
+    def restore_columns(self, columns: RecordColumns) -> int:
+        # into an empty registry the store takes the columns as they are; only open commands get
+        # a view here, for their deadline
+        store = self._by_command_id
+        if len(store):
+            return super().restore_columns(columns)
+        store.load(columns)
+        status = columns.status
+        n = len(status)
+        in_flight = status.count(_STATUS_CODE[CommandStatus.DISPATCHED]) + status.count(_STATUS_CODE[CommandStatus.ACCEPTED])
+        self._in_flight += in_flight
+        self._terminal += n - in_flight - status.count(_STATUS_CODE[CommandStatus.RECEIVED])
+        deadlines = self._deadlines
+        for slot in compress(range(n), status.translate(_OPEN_MASK)):
+            record = store._view(slot)
+            deadline = self._stage_deadline(record)
+            if deadline is not None:
+                deadlines.append((deadline, store._ids[slot], record.status.value))
+        heapq.heapify(deadlines)
+        if self.max_entries is not None and n > self.max_entries:
+            self._evict_oldest(n - self.max_entries)
+        return n
+
+    def _restore_record(self, cmd: Command, status: CommandStatus, stamps: Sequence[int | None]) -> CompactRecordView:
+        record = self._by_command_id.add(cmd, status, stamps[0])
+        for name, ns in zip(_TS_FIELDS[1:], stamps[1:]):
+            if ns is not None:
+                setattr(record, name, ns)
+        return record
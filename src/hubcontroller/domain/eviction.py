@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from enum import Enum
+
+
+class GcMode(str, Enum):
+    SCAN = "scan"        # walk every entry, no ordering assumptions
+    ORDERED = "ordered"  # entries are stored in time order -> evict from the oldest end
+
+
+@dataclass(slots=True)
+class EvictionStats:
+    ttl: int = 0       # removed by gc_ttl()
+    capacity: int = 0  # removed because max_entries was reached
+    open: int = 0      # of those, removed before they reached a terminal state
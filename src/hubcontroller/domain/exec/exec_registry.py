@@ -1,28 +1,65 @@
-from adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
-from datetime import datetime, timezone
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.domain.clock import Clock, as_clock, seconds_to_ns
+from hubcontroller.domain.eviction import EvictionStats, GcMode
+from collections import OrderedDict
+from datetime import datetime
 from typing import Callable
 
 class ExecRegistry:
-    def __init__(self, ttl_s: float = 600.0, clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
-        self._execs: dict[str, tuple[str, datetime]] = {}
+    def __init__(self, ttl_s: float = 600.0, clock: Clock | Callable[[], datetime] | None = None,
+                 gc_mode: GcMode = GcMode.ORDERED, max_entries: int | None = None, store=None):
+        # least recently stored first; re-storing a token moves it to the end.
+        # store: a persistent stand-in for the OrderedDict (adapters.persistence.token_index.TokenIndex),
+        # so tokens seen before a restart are still duplicates; its capacity caps max_entries
+        self._execs: OrderedDict[str, tuple[str, int]] = OrderedDict() if store is None else store
         self._ttl_s = ttl_s
-        self._clock = clock
-    
+        self._clock = as_clock(clock)
+        self.gc_mode = gc_mode
+        if store is not None:
+            store.bind_clock(self._clock)
+            max_entries = store.capacity if max_entries is None else min(max_entries, store.capacity)
+        self.max_entries = max_entries
+        self.eviction_stats = EvictionStats()
+
+    def now_ns(self) -> int:
+        return self._clock.now_ns()
+
     def now_utc(self) -> datetime:
-        return self._clock()
-    
+        return self._clock.to_utc(self._clock.now_ns())
+
     def is_duplicate(self, snapshot: ExecSnapshot) -> bool:
         return snapshot.token in self._execs
-        
+
     def store_exec(self, snapshot: ExecSnapshot) -> None:
-        now = self.now_utc()
+        now = self.now_ns()
+        if snapshot.token in self._execs:
+            self._execs.move_to_end(snapshot.token)
+        elif self.max_entries is not None and len(self._execs) >= self.max_entries:
+            n = len(self._execs) - self.max_entries + 1
+            for _ in range(n):
+                self._execs.popitem(last=False)
+            self.eviction_stats.capacity += n
         self._execs[snapshot.token] = (snapshot.command, now)
 
-    def gc_ttl(self) -> None:
-        now = self.now_utc()
+    def gc_ttl(self) -> int:
+        now = self.now_ns()
+        ttl_ns = seconds_to_ns(self._ttl_s)
+        if self.gc_mode == GcMode.ORDERED:
+            deleted = 0
+            while self._execs:
+                _, sent_at = next(iter(self._execs.values()))
+                if now - sent_at < ttl_ns:
+                    break
+                self._execs.popitem(last=False)
+                deleted += 1
+            self.eviction_stats.ttl += deleted
+            return deleted
+
         to_delete = []
         for token, (_, sent_at) in self._execs.items():
-            if (now - sent_at).total_seconds() >= self._ttl_s:
+            if now - sent_at >= ttl_ns:
                 to_delete.append(token)
         for token in to_delete:
             del self._execs[token]
+        self.eviction_stats.ttl += len(to_delete)
+        return len(to_delete)
@@ -1,5 +1,9 @@
+import json
+import sys
 from enum import Enum
 from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping
 
 from hubcontroller.domain.hub_state import HubStateSnapshot, HubMode
 from hubcontroller.domain.commands import Command
@@ -28,22 +32,81 @@ allowed_in_cycle_ready = {"start_cycle", "machine_off", "safety_stop"}
 allowed_in_homing_active = {"stop_homing", "machine_off", "safety_stop"}
 allowed_in_homing_ready = {"start_homing", "machine_off", "safety_stop"}
 
+KNOWN_COMMAND_TYPES = frozenset().union(allowed_in_error, allowed_in_unknown, allowed_in_safety_stop, allowed_in_cycle_active,
+                                        allowed_in_cycle_ready, allowed_in_homing_active, allowed_in_homing_ready)
+
+
+# HubMode -> (command types allowed in that mode, reason when a command is not allowed)
+DEFAULT_POLICY: dict[HubMode, tuple[frozenset[str], GuardDecisionReason]] = {
+    HubMode.UNKNOWN: (frozenset(allowed_in_unknown), GuardDecisionReason.HUB_STATE_UNKNOWN),
+    HubMode.SAFETY_STOP: (frozenset(allowed_in_safety_stop), GuardDecisionReason.SAFETY_STOP_ACTIVE),
+    HubMode.ERROR: (frozenset(allowed_in_error), GuardDecisionReason.HUB_ERROR),
+    HubMode.HOMING_ACTIVE: (frozenset(allowed_in_homing_active), GuardDecisionReason.HUB_BUSY),
+    HubMode.HOMING_READY: (frozenset(allowed_in_homing_ready), GuardDecisionReason.ACTION_NEEDED),
+    HubMode.CYCLE_READY: (frozenset(allowed_in_cycle_ready), GuardDecisionReason.ACTION_NEEDED),
+    HubMode.CYCLE_ACTIVE: (frozenset(allowed_in_cycle_active), GuardDecisionReason.ACTION_NEEDED),
+}
+
+ALLOWED = GuardDecision(allowed=True, reason=None)
+DENIED = {reason: GuardDecision(allowed=False, reason=reason.value) for reason in GuardDecisionReason}
+
+
+def policy_from_config(config: Mapping[str, Mapping[str, Any]]) -> dict[HubMode, tuple[frozenset[str], GuardDecisionReason]]:
+    # {"cycle_ready": {"allowed": ["start_cycle", ...], "reason": "action_needed"}, ...}
+    # modes missing from the config deny every command (see GuardTable)
+    policy = {}
+    for mode_name, rule in config.items():
+        try:
+            mode = HubMode(mode_name)
+            reason = GuardDecisionReason(rule.get("reason", GuardDecisionReason.ACTION_NEEDED.value))
+        except ValueError as e:
+            raise ValueError(f"Guard policy misconfigured for mode '{mode_name}': {e}") from e
+        allowed = rule.get("allowed", ())
+        if isinstance(allowed, str) or not all(isinstance(t, str) for t in allowed):
+            raise ValueError(f"Guard policy misconfigured for mode '{mode_name}': 'allowed' must be a list of command types")
+        policy[mode] = (frozenset(allowed), reason)
+    return policy
+
+
+def load_guard_policy(path: str | Path) -> dict[HubMode, tuple[frozenset[str], GuardDecisionReason]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return policy_from_config(json.load(f))
+
+
+class GuardTable:
+    # Policy compiled into a dense (mode x command_type) table of preallocated GuardDecisions.
+    # Modes and known command types are numbered once; lookup() is two dict gets and one list index.
+    # Command types the policy never mentions share the last column. A mode the policy has no rule
+    # for denies everything, with the reason the default policy gives for that mode.
+    def __init__(self, policy: Mapping[HubMode, tuple[frozenset[str], GuardDecisionReason]] = DEFAULT_POLICY):
+        types = sorted(set().union(*(allowed for allowed, _ in policy.values())))
+        self.type_index = {sys.intern(t): i for i, t in enumerate(types)}
+        self._other = len(types)
+        self._width = len(types) + 1
+        self.mode_index = {mode: i for i, mode in enumerate(HubMode)}
+        table = []
+        for mode in HubMode:
+            rule = policy.get(mode)
+            if rule is None:
+                # a partial policy must not open SAFETY_STOP/ERROR/UNKNOWN: no rule, nothing allowed
+                rule = (frozenset(), DEFAULT_POLICY[mode][1])
+            allowed, reason = rule
+            denied = DENIED[reason]
+            table.extend(ALLOWED if t in allowed else denied for t in types)
+            table.append(denied)
+        self._table = tuple(table)
+        self._row = {mode: i * self._width for mode, i in self.mode_index.items()}
+
+    def lookup(self, mode: HubMode, command_type: str) -> GuardDecision:
+        return self._table[self._row[mode] + self.type_index.get(command_type, self._other)]
+
 
 class Guard:
+    def __init__(self, policy: Mapping[HubMode, tuple[frozenset[str], GuardDecisionReason]] = DEFAULT_POLICY):
+        self._table = GuardTable(policy)
+
     def check(self, command: Command, hub_state_snapshot: HubStateSnapshot) -> GuardDecision:
-        if hub_state_snapshot is None or (hub_state_snapshot.mode == HubMode.UNKNOWN and command.command_type not in allowed_in_unknown):
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_STATE_UNKNOWN.value)
-        elif hub_state_snapshot.mode == HubMode.SAFETY_STOP and command.command_type not in allowed_in_safety_stop:
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.SAFETY_STOP_ACTIVE.value)
-        elif hub_state_snapshot.mode == HubMode.ERROR and command.command_type not in allowed_in_error:
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_ERROR.value)
-        elif hub_state_snapshot.mode == HubMode.HOMING_ACTIVE and command.command_type not in allowed_in_homing_active:
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_BUSY.value)
-        elif hub_state_snapshot.mode == HubMode.HOMING_READY and command.command_type not in allowed_in_homing_ready:
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
-        elif hub_state_snapshot.mode == HubMode.CYCLE_READY and command.command_type not in allowed_in_cycle_ready:
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
-        elif hub_state_snapshot.mode == HubMode.CYCLE_ACTIVE and command.command_type not in allowed_in_cycle_active:
-            return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
-        else:
-            return GuardDecision(allowed=True, reason=None)
+        # decisions are shared singletons; without a snapshot nothing is allowed
+        if hub_state_snapshot is None:
+            return DENIED[GuardDecisionReason.HUB_STATE_UNKNOWN]
+        return self._table.lookup(hub_state_snapshot.mode, command.command_type)
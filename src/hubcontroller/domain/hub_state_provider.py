@@ -1,10 +1,29 @@
+from typing import Callable
+
 from hubcontroller.domain.hub_state import HubStateSnapshot
 
+HubStateListener = Callable[[HubStateSnapshot], None]
+
 
 class HubStateProvider:
+    # get_snapshot() is a plain attribute read of an immutable snapshot: readers never lock,
+    # publish() (one writer, e.g. HubStatePoller) swaps the reference and notifies on change
     def __init__(self, hub_state: HubStateSnapshot):
         self._hub_state = hub_state
-
+        self._listeners: list[HubStateListener] = []
 
     def get_snapshot(self) -> HubStateSnapshot:
-        return self._hub_state
\ No newline at end of file
+        return self._hub_state
+
+    def subscribe(self, listener: HubStateListener) -> Callable[[], None]:
+        # returns an unsubscribe callable; listeners run on the publisher's thread
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def publish(self, hub_state: HubStateSnapshot) -> bool:
+        if hub_state == self._hub_state:
+            return False
+        self._hub_state = hub_state
+        for listener in self._listeners:
+            listener(hub_state)
+        return True
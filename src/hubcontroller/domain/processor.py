@@ -1,25 +1,31 @@
 from hubcontroller.domain.commands import Command, CommandStatus
 from hubcontroller.domain.registry import CommandRegistry, Transition, TransitionResult
 from hubcontroller.domain.hub_state_provider import HubStateProvider
-from hubcontroller.adapters.plc.commands import PlcSendStatus
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
 from hubcontroller.adapters.plc.client import PlcClient
-from guard import Guard
-from typing import Callable
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.retry_scheduler import RetryScheduler
+from typing import Callable, Iterable
 import time
 
 
 class CommandProcessor:
-    def __init__(self, command_registry: CommandRegistry, handlers: dict[str, Callable[[Command], None]], state_provider: HubStateProvider, guard: Guard, plc_client: PlcClient):
+    retry_attempts = 3
+    retry_base_delay_s = 0.1
+
+    def __init__(self, command_registry: CommandRegistry, handlers: dict[str, Callable[[Command], None]], state_provider: HubStateProvider, guard: Guard, plc_client: PlcClient,
+                 retry_scheduler: RetryScheduler | None = None):
         self._command_registry = command_registry
         self._handlers = handlers
         self._state_provider = state_provider
         self._guard = guard
         self._plc_client = plc_client
+        # with a scheduler a failed write is retried from tick() instead of sleeping in on_command
+        self._retry_scheduler = retry_scheduler
 
     def should_dispatch(self, t: Transition) -> bool:
         if t.record is None:
             return False
-            int(control_frame_dict["command_ids"])
 
         if t.result != TransitionResult.DUPLICATE:
             return True
@@ -29,34 +35,127 @@ class CommandProcessor:
         t = self._command_registry.on_rejected(command.command_id)
         return t.result
     
-    def _dispatch_command_to_plc_retry(self, command: Command) -> PlcSendStatus:
-        
-        last_status = PlcSendStatus.ERROR
-        for attempt in range(3):
+    def _retry_delay_s(self, attempt: int) -> float:
+        return self.retry_base_delay_s * (2 ** (attempt - 1))
+
+    @staticmethod
+    def _is_final_send_status(status: PlcSendStatus) -> bool:
+        return status == PlcSendStatus.OK or status == PlcSendStatus.INVALID_PARAMETERS
+
+    def _dispatch_command_to_plc_retry(self, command: Command, first_status: PlcSendStatus | None = None) -> PlcSendStatus:
+        # first_status: outcome of an attempt already made (batch write), retried from attempt 1
+        if first_status is not None and self._is_final_send_status(first_status):
+            return first_status
+        last_status = first_status or PlcSendStatus.ERROR
+        for attempt in range(0 if first_status is None else 1, self.retry_attempts):
             if attempt > 0:
-                time.sleep(0.1*(2**(attempt-1)))
+                time.sleep(self._retry_delay_s(attempt))
             last_status = self._plc_client.plc_write_command(command)
-            if last_status == PlcSendStatus.OK: 
+            if self._is_final_send_status(last_status):
                 return last_status
-            if last_status == PlcSendStatus.INVALID_PARAMETERS: 
-                return last_status   
         return last_status
 
-    def on_command(self, command: Command) -> TransitionResult | None:
+    def _dispatch_batch_retry(self, commands: list[Command], statuses: list[PlcSendStatus]) -> list[PlcSendStatus]:
+        # the commands still failing are retried together, so one bad write costs the batch one
+        # backoff sequence, not one per command
+        statuses = list(statuses)
+        for attempt in range(1, self.retry_attempts):
+            failed = [i for i, status in enumerate(statuses) if not self._is_final_send_status(status)]
+            if not failed:
+                break
+            time.sleep(self._retry_delay_s(attempt))
+            for i, status in zip(failed, self._plc_client.plc_write_commands([commands[i] for i in failed])):
+                statuses[i] = status
+        return statuses
+
+    def _admit_command(self, command: Command) -> tuple[bool, TransitionResult | None]:
+        # (dispatch?, result to return when not dispatching)
         state = self._state_provider.get_snapshot()
         t = self._command_registry.on_received(command)
 
         if not self.should_dispatch(t):
-            return t.result
+            return False, t.result
 
         if command.command_type not in self._handlers:
-            return self._reject_command(command)
+            return False, self._reject_command(command)
 
         decision = self._guard.check(command, state)
         if decision.allowed is False:
-            return self._reject_command(command)
+            return False, self._reject_command(command)
+        return True, None
+
+    def on_command(self, command: Command) -> TransitionResult | None:
+        dispatch, result = self._admit_command(command)
+        if not dispatch:
+            return result
+        if self._retry_scheduler is not None:
+            status = self._plc_client.plc_write_command(command)
+            if not self._is_final_send_status(status) and not self._retry_scheduler.schedule(command):
+                return self._give_up(command)
+            return self._on_send_status(command, status)
+        return self._on_send_status(command, self._dispatch_command_to_plc_retry(command))
+
+    def tick(self) -> int:
+        # periodic: due retries first, then stage deadlines; returns number of expired commands
+        if self._retry_scheduler is not None:
+            self._retry_scheduler.run_due()
+        return self._command_registry.expire_timeouts()
+
+    def _admit_batch(self, batch: list[Command]) -> tuple[list[TransitionResult | None], list[int]]:
+        # one snapshot, one registry pass and one guard evaluation per command for the whole batch;
+        # returns per-command results and the indexes of commands to write to the PLC
+        state = self._state_provider.get_snapshot()
+        transitions = self._command_registry.on_received_many(batch)
+        results: list[TransitionResult | None] = [None] * len(batch)
+        to_send: list[int] = []
+        scheduled: set[str] = set()
+        for i, (command, t) in enumerate(zip(batch, transitions)):
+            if not self.should_dispatch(t) or command.command_id in scheduled:
+                # the second copy of a command within one batch counts as a duplicate
+                results[i] = t.result
+            elif command.command_type not in self._handlers:
+                results[i] = self._reject_command(command)
+            elif self._guard.check(command, state).allowed is False:
+                results[i] = self._reject_command(command)
+            else:
+                scheduled.add(command.command_id)
+                to_send.append(i)
+        return results, to_send
+
+    def _finish_batch(self, batch: list[Command], results: list[TransitionResult | None], to_send: list[int],
+                      statuses: list[PlcSendStatus]) -> list[TransitionResult | None]:
+        dispatched = []
+        for i, status in zip(to_send, statuses):
+            if status == PlcSendStatus.OK:
+                dispatched.append(batch[i].command_id)
+            else:
+                results[i] = self._on_send_status(batch[i], status)
+        self._command_registry.on_dispatched_many(dispatched)
+        return results
+
+    def on_commands(self, batch: Iterable[Command]) -> list[TransitionResult | None]:
+        # batch counterpart of on_command: results come back in batch order
+        batch = list(batch)
+        results, to_send = self._admit_batch(batch)
+        if not to_send:
+            return results
+        commands = [batch[i] for i in to_send]
+        statuses = self._plc_client.plc_write_commands(commands)
+        if self._retry_scheduler is None:
+            return self._finish_batch(batch, results, to_send, self._dispatch_batch_retry(commands, statuses))
+        gave_up = [i for i, command, status in zip(to_send, commands, statuses)
+                   if not self._is_final_send_status(status) and not self._retry_scheduler.schedule(command)]
+        results = self._finish_batch(batch, results, to_send, statuses)
+        for i in gave_up:
+            results[i] = self._give_up(batch[i])
+        return results
+
+    def _give_up(self, command: Command) -> TransitionResult:
+        # the write failed and the retry scheduler is full: TIMEOUT now rather than sitting
+        # RECEIVED, unretried, until accept_timeout_s
+        return self._command_registry.on_timeout(command.command_id).result
 
-        plc_send_status = self._dispatch_command_to_plc_retry(command)
+    def _on_send_status(self, command: Command, plc_send_status: PlcSendStatus) -> TransitionResult | None:
         if plc_send_status == PlcSendStatus.OK:
             self._command_registry.on_dispatched(command.command_id)
             return None
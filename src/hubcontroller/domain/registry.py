@@ -1,22 +1,65 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import heapq
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
-from typing import Callable
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
 
+from hubcontroller.domain.clock import Clock, MonotonicClock, as_clock, seconds_to_ns
 from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.eviction import EvictionStats, GcMode
+
+_DEFAULT_CLOCK = MonotonicClock()
+_IN_FLIGHT = frozenset({CommandStatus.DISPATCHED, CommandStatus.ACCEPTED})
+_OPEN = _IN_FLIGHT | {CommandStatus.RECEIVED}
+NO_TS = -(1 << 63)  # "not reached" in RecordColumns timestamp columns
 
 @dataclass(slots=True)
 class CommandRecord:
     command: Command
     status: CommandStatus
-    received_at: datetime
-    dispatched_at: datetime | None = None
-    accepted_at: datetime | None = None
-    executed_at: datetime | None = None
-    rejected_at: datetime | None = None
-    timeout_at: datetime | None = None
-    failed_at: datetime | None = None
+    # monotonic ns from the registry clock; *_at properties convert to UTC datetime
+    received_ns: int
+    dispatched_ns: int | None = None
+    accepted_ns: int | None = None
+    executed_ns: int | None = None
+    rejected_ns: int | None = None
+    timeout_ns: int | None = None
+    failed_ns: int | None = None
+    clock: Clock = field(default=_DEFAULT_CLOCK, repr=False, compare=False)
+
+    def _utc(self, ns: int | None) -> datetime | None:
+        return None if ns is None else self.clock.to_utc(ns)
+
+    @property
+    def received_at(self) -> datetime:
+        return self.clock.to_utc(self.received_ns)
+
+    @property
+    def dispatched_at(self) -> datetime | None:
+        return self._utc(self.dispatched_ns)
+
+    @property
+    def accepted_at(self) -> datetime | None:
+        return self._utc(self.accepted_ns)
+
+    @property
+    def executed_at(self) -> datetime | None:
+        return self._utc(self.executed_ns)
+
+    @property
+    def rejected_at(self) -> datetime | None:
+        return self._utc(self.rejected_ns)
+
+    @property
+    def timeout_at(self) -> datetime | None:
+        return self._utc(self.timeout_ns)
+
+    @property
+    def failed_at(self) -> datetime | None:
+        return self._utc(self.failed_ns)
 
     def is_terminal(self) -> bool:
         return self.status in {CommandStatus.EXECUTED, CommandStatus.REJECTED, CommandStatus.FAILED, CommandStatus.TIMEOUT}
@@ -34,139 +77,396 @@ class Transition:
     result: TransitionResult
     changed: bool
 
+@dataclass(slots=True)
+class RecordColumns:
+    # bulk restore input (journal replay): one entry per command, oldest first
+    command_ids: list[str]
+    command_types: list[str]
+    status: bytes  # CommandStatus order
+    stamps: tuple[array, ...]  # 7 int64 columns in CommandStatus order, NO_TS = not reached
+    offset: int  # registry ns = stamp - offset
+    payloads: dict[int, Mapping[str, Any]]  # row -> payload, open commands that had one
+
+    def rows(self) -> Iterator[tuple[Command, CommandStatus, list[int | None]]]:
+        statuses = tuple(CommandStatus)
+        offset = self.offset
+        get_payload = self.payloads.get
+        for row, (command_id, command_type, code, *stamps) in enumerate(
+                zip(self.command_ids, self.command_types, self.status, *self.stamps)):
+            payload = get_payload(row)
+            yield (Command(command_id, command_type, {} if payload is None else payload), statuses[code],
+                   [None if ns == NO_TS else ns - offset for ns in stamps])
+
+# called with the record right after its status changed (RECEIVED included); the record is live,
+# copy what you need before returning. Listeners run on the caller's thread and must not block.
+TransitionListener = Callable[[CommandRecord], None]
+# called with a record gc_ttl() or capacity eviction just dropped, in its last state
+EvictionListener = Callable[[CommandRecord], None]
+
 class CommandRegistry:
-    def __init__(self, accept_timeout_s: float = 15.0, exec_timeout_s: float = 80.0, ttl_s: float = 600.0, clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+    def __init__(self, accept_timeout_s: float = 15.0, exec_timeout_s: float = 80.0, ttl_s: float = 600.0, clock: Clock | Callable[[], datetime] | None = None,
+                 gc_mode: GcMode = GcMode.ORDERED, max_entries: int | None = None):
         self.accept_timeout_s = accept_timeout_s  # seconds
         self.exec_timeout_s = exec_timeout_s # seconds
         self.dispatch_timeout_s = 5.0 # seconds
         self.ttl_s = ttl_s # seconds
-        self._by_command_id: dict[str, CommandRecord] = {}
-        self._clock = clock
-        
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        self.gc_mode = gc_mode
+        self.max_entries = max_entries
+        self.eviction_stats = EvictionStats()
+        # insertion order == received_at order, oldest first
+        self._by_command_id: OrderedDict[str, CommandRecord] = OrderedDict()
+        self._clock = as_clock(clock)
+        # min-heap (deadline_ns, command_id, status value) -> tick pops only what is due; atomic items
+        # only, so the gc untracks the tuples and stale entries piling up in a burst cost full collections nothing
+        self._deadlines: list[tuple[int, str, str]] = []
+        self._indexed_timeouts = self._stage_timeouts()
+        self._timeouts_ns = tuple(seconds_to_ns(s) for s in self._indexed_timeouts)
+        # records in DISPATCHED/ACCEPTED, kept up to date by the transitions (pollers read it every cycle)
+        self._in_flight = 0
+        # terminal records; capacity eviction looks for them only while there are any
+        self._terminal = 0
+        self._listeners: list[TransitionListener] = []
+        self._eviction_listeners: list[EvictionListener] = []
+        # non-OK transition outcomes (duplicates, out-of-order events, ...); OK ones are what listeners see
+        self.result_counts: dict[TransitionResult, int] = dict.fromkeys(TransitionResult, 0)
+
+    def subscribe(self, listener: TransitionListener) -> Callable[[], None]:
+        # returns an unsubscribe callable
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def subscribe_evictions(self, listener: EvictionListener) -> Callable[[], None]:
+        self._eviction_listeners.append(listener)
+        return lambda: self._eviction_listeners.remove(listener)
+
+    def _notify(self, record: CommandRecord) -> None:
+        for listener in self._listeners:
+            listener(record)
+
+    def _notify_evicted(self, record: CommandRecord) -> None:
+        for listener in self._eviction_listeners:
+            listener(record)
+
+    def _unchanged(self, record: CommandRecord | None, result: TransitionResult) -> Transition:
+        self.result_counts[result] += 1
+        return Transition(record=record, result=result, changed=False)
+
+    @property
+    def in_flight_count(self) -> int:
+        return self._in_flight
+
+    def now_ns(self) -> int:
+        return self._clock.now_ns()
+
     def now_utc(self) -> datetime:
-        return self._clock()
-    
+        return self._clock.to_utc(self._clock.now_ns())
+
+    def _stage_timeouts(self) -> tuple[float, float, float]:
+        return (self.accept_timeout_s, self.dispatch_timeout_s, self.exec_timeout_s)
+
+    def _stage_deadline(self, record: CommandRecord) -> int | None:
+        accept_ns, dispatch_ns, exec_ns = self._timeouts_ns
+        if record.status == CommandStatus.RECEIVED:
+            return record.received_ns + accept_ns
+        if record.status == CommandStatus.DISPATCHED and record.dispatched_ns is not None:
+            return record.dispatched_ns + dispatch_ns
+        if record.status == CommandStatus.ACCEPTED and record.accepted_ns is not None:
+            return record.accepted_ns + exec_ns
+        return None
+
+    def _schedule_deadline(self, record: CommandRecord) -> None:
+        deadline = self._stage_deadline(record)
+        if deadline is not None:
+            heapq.heappush(self._deadlines, (deadline, record.command.command_id, record.status.value))
+
+    def _rebuild_deadlines(self) -> None:
+        # timeouts are public attributes; if someone changed them, re-key every live record
+        self._indexed_timeouts = self._stage_timeouts()
+        self._timeouts_ns = tuple(seconds_to_ns(s) for s in self._indexed_timeouts)
+        self._deadlines.clear()
+        for record in self._by_command_id.values():
+            self._schedule_deadline(record)
+
+    def _add_record(self, cmd: Command, received_ns: int) -> CommandRecord:
+        record = CommandRecord(command= cmd, status= CommandStatus.RECEIVED, received_ns= received_ns, clock= self._clock)
+        self._by_command_id[cmd.command_id] = record
+        return record
+
+    def restore_records(self, rows: Iterable[tuple[Command, CommandStatus, Sequence[int | None]]]) -> int:
+        # recovery path (journal replay): puts records back as they were, without notifying listeners.
+        # rows: (command, status, the 7 *_ns timestamps in CommandStatus order), in received order so
+        # ORDERED gc still sees the oldest first
+        restored = 0
+        by_command_id = self._by_command_id
+        deadlines = self._deadlines
+        restore = self._restore_record
+        # tuple membership compares by identity first; the frozensets would hash each enum in Python
+        in_flight = tuple(_IN_FLIGHT)
+        received = CommandStatus.RECEIVED
+        for cmd, status, stamps in rows:
+            if cmd.command_id in by_command_id:
+                self._forget(by_command_id[cmd.command_id])
+                del by_command_id[cmd.command_id]
+            record = restore(cmd, status, stamps)
+            restored += 1
+            if status is received or status in in_flight:
+                if status is not received:
+                    self._in_flight += 1
+                deadline = self._stage_deadline(record)
+                if deadline is not None:
+                    deadlines.append((deadline, cmd.command_id, status.value))
+            else:
+                self._terminal += 1
+        heapq.heapify(deadlines)
+        if self.max_entries is not None and len(by_command_id) > self.max_entries:
+            self._evict_oldest(len(by_command_id) - self.max_entries)
+        return restored
+
+    def restore_columns(self, columns: RecordColumns) -> int:
+        # bulk form of restore_records; CompactCommandRegistry takes the columns as they are
+        return self.restore_records(columns.rows())
+
+    def _restore_record(self, cmd: Command, status: CommandStatus, stamps: Sequence[int | None]) -> CommandRecord:
+        record = CommandRecord(cmd, status, *stamps, self._clock)
+        self._by_command_id[cmd.command_id] = record
+        return record
+
+    def records(self) -> Iterator[CommandRecord]:
+        # live records, oldest first
+        return iter(self._by_command_id.values())
+
     def get_record(self, command_id: str) -> CommandRecord | None:
         return self._by_command_id.get(command_id) 
 
     def on_received(self, cmd: Command) -> Transition:
+        return self._on_received(cmd, self.now_ns())
+
+    def on_received_many(self, cmds: Iterable[Command]) -> list[Transition]:
+        # one clock read for the batch; a command_id repeated within the batch is a DUPLICATE
+        now = self.now_ns()
+        return [self._on_received(cmd, now) for cmd in cmds]
+
+    def _on_received(self, cmd: Command, now: int) -> Transition:
         if cmd.command_id in self._by_command_id:
-            return Transition(record = self._by_command_id[cmd.command_id], result= TransitionResult.DUPLICATE, changed= False)
+            return self._unchanged(self._by_command_id[cmd.command_id], TransitionResult.DUPLICATE)
         else:
-            record = CommandRecord(command= cmd, status= CommandStatus.RECEIVED, received_at= self.now_utc())
-            self._by_command_id[cmd.command_id] = record
+            if self.max_entries is not None and len(self._by_command_id) >= self.max_entries:
+                self._evict_oldest(len(self._by_command_id) - self.max_entries + 1)
+            record = self._add_record(cmd, now)
+            self._schedule_deadline(record)
+            if self._listeners:
+                self._notify(record)
             return Transition(record = record, result= TransitionResult.OK, changed= True)
     
     def on_dispatched(self, command_id: str) -> Transition:
+        return self._on_dispatched(command_id, self.now_ns())
+
+    def on_dispatched_many(self, command_ids: Iterable[str]) -> list[Transition]:
+        now = self.now_ns()
+        return [self._on_dispatched(command_id, now) for command_id in command_ids]
+
+    def _on_dispatched(self, command_id: str, now: int) -> Transition:
         record = self.get_record(command_id)
         if record is None:
-            return Transition(record=None, result=TransitionResult.UNKNOWN_COMMAND, changed=False)
+            return self._unchanged(None, TransitionResult.UNKNOWN_COMMAND)
         else:
             if record.status == CommandStatus.DISPATCHED:
-                return Transition(record=record, result=TransitionResult.DUPLICATE, changed=False)
+                return self._unchanged(record, TransitionResult.DUPLICATE)
             elif record.is_terminal():
-                return Transition(record=record, result=TransitionResult.TERMINAL, changed=False)
+                return self._unchanged(record, TransitionResult.TERMINAL)
             elif record.status != CommandStatus.RECEIVED:
-                return Transition(record=record, result=TransitionResult.INVALID_STATE, changed=False)
+                return self._unchanged(record, TransitionResult.INVALID_STATE)
             else:
                 record.status = CommandStatus.DISPATCHED
-                record.dispatched_at = self.now_utc()
+                record.dispatched_ns = now
+                self._in_flight += 1
+                self._schedule_deadline(record)
+                if self._listeners:
+                    self._notify(record)
                 return Transition(record=record, result=TransitionResult.OK, changed=True)
 
     def on_accepted(self, command_id: str) -> Transition:
         record = self.get_record(command_id)
         if record is  None:
-            return Transition(record=None, result=TransitionResult.UNKNOWN_COMMAND, changed= False)
+            return self._unchanged(None, TransitionResult.UNKNOWN_COMMAND)
         else:
             if record.status == CommandStatus.ACCEPTED:
-                return Transition(record= record, result= TransitionResult.DUPLICATE, changed= False)
+                return self._unchanged(record, TransitionResult.DUPLICATE)
             elif record.is_terminal():
-                return Transition(record= record, result= TransitionResult.TERMINAL, changed= False)
+                return self._unchanged(record, TransitionResult.TERMINAL)
             elif record.status != CommandStatus.DISPATCHED:
-                return Transition(record= record, result= TransitionResult.INVALID_STATE, changed= False)
+                return self._unchanged(record, TransitionResult.INVALID_STATE)
             else:
                 record.status = CommandStatus.ACCEPTED
-                record.accepted_at = self.now_utc()
+                record.accepted_ns = self.now_ns()
+                self._schedule_deadline(record)
+                if self._listeners:
+                    self._notify(record)
                 return Transition(record = record, result= TransitionResult.OK, changed= True)
         
     def on_executed(self, command_id: str) -> Transition:
         record = self.get_record(command_id)
         if record is None:
-            return Transition(record=None, result= TransitionResult.UNKNOWN_COMMAND, changed= False)
+            return self._unchanged(None, TransitionResult.UNKNOWN_COMMAND)
         else:
             if record.status == CommandStatus.EXECUTED:
-                return Transition( record= record, result= TransitionResult.DUPLICATE, changed= False)
+                return self._unchanged(record, TransitionResult.DUPLICATE)
             elif record.is_terminal():
-                return Transition(record= record, result= TransitionResult.TERMINAL, changed= False)
+                return self._unchanged(record, TransitionResult.TERMINAL)
             elif record.status != CommandStatus.ACCEPTED:
-                return Transition(record= record, result= TransitionResult.INVALID_STATE, changed= False)
+                return self._unchanged(record, TransitionResult.INVALID_STATE)
             else:
                 record.status = CommandStatus.EXECUTED
-                record.executed_at = self.now_utc()
+                record.executed_ns = self.now_ns()
+                self._in_flight -= 1
+                self._terminal += 1
+                if self._listeners:
+                    self._notify(record)
                 return Transition(record = record, result= TransitionResult.OK, changed= True)
         
     def on_rejected(self, command_id: str) -> Transition:
         record = self.get_record(command_id)
         if record is None:
-            return Transition(record=None, result= TransitionResult.UNKNOWN_COMMAND, changed= False)
+            return self._unchanged(None, TransitionResult.UNKNOWN_COMMAND)
         else:
             if record.status == CommandStatus.REJECTED:
-                return Transition(record= record, result= TransitionResult.DUPLICATE, changed= False)
+                return self._unchanged(record, TransitionResult.DUPLICATE)
             elif record.is_terminal():
-                return Transition(record= record, result= TransitionResult.TERMINAL, changed= False)
+                return self._unchanged(record, TransitionResult.TERMINAL)
             elif record.status != CommandStatus.RECEIVED:
-                return Transition(record= record, result= TransitionResult.INVALID_STATE, changed= False)
+                return self._unchanged(record, TransitionResult.INVALID_STATE)
             else:
                 record.status = CommandStatus.REJECTED
-                record.rejected_at = self.now_utc()
+                record.rejected_ns = self.now_ns()
+                self._terminal += 1
+                if self._listeners:
+                    self._notify(record)
                 return Transition(record= record, result= TransitionResult.OK, changed=True)
 
     def on_failed(self, command_id: str) -> Transition:
         record = self.get_record(command_id)
         if record is None:
-            return Transition(record=None, result= TransitionResult.UNKNOWN_COMMAND, changed= False)
+            return self._unchanged(None, TransitionResult.UNKNOWN_COMMAND)
         else:
             if record.status == CommandStatus.FAILED:
-                return Transition(record= record, result= TransitionResult.DUPLICATE, changed= False)
+                return self._unchanged(record, TransitionResult.DUPLICATE)
             elif record.is_terminal():
-                return Transition(record= record, result= TransitionResult.TERMINAL, changed= False)
+                return self._unchanged(record, TransitionResult.TERMINAL)
             elif record.status not in {CommandStatus.DISPATCHED, CommandStatus.ACCEPTED}:
-                return Transition(record= record, result= TransitionResult.INVALID_STATE, changed= False)
+                return self._unchanged(record, TransitionResult.INVALID_STATE)
             else:
                 record.status = CommandStatus.FAILED
-                record.failed_at = self.now_utc()
+                record.failed_ns = self.now_ns()
+                self._in_flight -= 1
+                self._terminal += 1
+                if self._listeners:
+                    self._notify(record)
+                return Transition(record= record, result= TransitionResult.OK, changed=True)
+
+    def on_timeout(self, command_id: str) -> Transition:
+        # explicit timeout of a non-terminal command (e.g. retry scheduler gave up on the PLC write)
+        record = self.get_record(command_id)
+        if record is None:
+            return self._unchanged(None, TransitionResult.UNKNOWN_COMMAND)
+        else:
+            if record.status == CommandStatus.TIMEOUT:
+                return self._unchanged(record, TransitionResult.DUPLICATE)
+            elif record.is_terminal():
+                return self._unchanged(record, TransitionResult.TERMINAL)
+            else:
+                if record.status in _IN_FLIGHT:
+                    self._in_flight -= 1
+                record.status = CommandStatus.TIMEOUT
+                record.timeout_ns = self.now_ns()
+                self._terminal += 1
+                if self._listeners:
+                    self._notify(record)
                 return Transition(record= record, result= TransitionResult.OK, changed=True)
 
     def expire_timeouts(self) -> int:
-        now = self.now_utc()
+        now = self.now_ns()
+        if self._indexed_timeouts != self._stage_timeouts():
+            self._rebuild_deadlines()
         expired = 0
-        for record in self._by_command_id.values():
-            if record.is_terminal(): continue
-            if record.status == CommandStatus.RECEIVED:
-                if (now - record.received_at).total_seconds() >= self.accept_timeout_s:
-                    record.status = CommandStatus.TIMEOUT
-                    record.timeout_at = now
-                    expired += 1
-            elif record.status == CommandStatus.ACCEPTED :
-                if record.accepted_at is None: continue
-                if (now - record.accepted_at).total_seconds() >= self.exec_timeout_s:
-                    record.status = CommandStatus.TIMEOUT
-                    record.timeout_at = now
-                    expired += 1
-            elif record.status == CommandStatus.DISPATCHED:
-                if record.dispatched_at is None: continue
-                if (now - record.dispatched_at).total_seconds() >= self.dispatch_timeout_s:
-                    record.status = CommandStatus.TIMEOUT
-                    record.timeout_at = now
-                    expired += 1
+        deadlines = self._deadlines
+        while deadlines and deadlines[0][0] <= now:
+            deadline, command_id, status = heapq.heappop(deadlines)
+            record = self._by_command_id.get(command_id)
+            # stale entry: record moved on, was gc'ed or re-received under the same id
+            if record is None or record.status != status or self._stage_deadline(record) != deadline:
+                continue
+            if record.status in _IN_FLIGHT:
+                self._in_flight -= 1
+            record.status = CommandStatus.TIMEOUT
+            record.timeout_ns = now
+            self._terminal += 1
+            expired += 1
+            if self._listeners:
+                self._notify(record)
         return expired
     
+    def _forget(self, record: CommandRecord) -> None:
+        # a record dropped by gc/eviction no longer counts as in flight or terminal
+        status = record.status
+        if status in _IN_FLIGHT:
+            self._in_flight -= 1
+        elif status not in _OPEN:
+            self._terminal -= 1
+
+    def _evict_oldest(self, n: int) -> None:
+        # oldest terminal records first; an evicted in-flight command would turn its ack into
+        # UNKNOWN_COMMAND and make a resend look new, so open ones go only when no terminal is left
+        by_command_id = self._by_command_id
+        terminal = []
+        wanted = min(n, self._terminal)
+        if wanted:
+            for command_id, record in by_command_id.items():
+                if record.is_terminal():
+                    terminal.append((command_id, record))
+                    if len(terminal) == wanted:
+                        break
+        for command_id, record in terminal:
+            del by_command_id[command_id]
+            if self._eviction_listeners:
+                self._notify_evicted(record)
+        self._terminal -= len(terminal)
+        for _ in range(n - len(terminal)):
+            _, record = by_command_id.popitem(last=False)
+            self._forget(record)
+            if self._eviction_listeners:
+                self._notify_evicted(record)
+        self.eviction_stats.capacity += n
+        self.eviction_stats.open += n - len(terminal)
+
     def gc_ttl(self) -> int:
-        now = self.now_utc()
+        now = self.now_ns()
+        ttl_ns = seconds_to_ns(self.ttl_s)
+        if self.gc_mode == GcMode.ORDERED:
+            deleted = 0
+            while self._by_command_id:
+                record = next(iter(self._by_command_id.values()))
+                if now - record.received_ns < ttl_ns:
+                    break
+                _, record = self._by_command_id.popitem(last=False)
+                self._forget(record)
+                if self._eviction_listeners:
+                    self._notify_evicted(record)
+                deleted += 1
+            self.eviction_stats.ttl += deleted
+            return deleted
+
         to_delete = []
         for command_id, record in self._by_command_id.items():
-            if (now - record.received_at).total_seconds() >= self.ttl_s:
+            if now - record.received_ns >= ttl_ns:
                 to_delete.append(command_id)
         
-        for cmd_id in to_delete: del self._by_command_id[cmd_id]
-        return len(to_delete)
\ No newline at end of file
+        for cmd_id in to_delete:
+            record = self._by_command_id[cmd_id]
+            self._forget(record)
+            del self._by_command_id[cmd_id]
+            if self._eviction_listeners:
+                self._notify_evicted(record)
+        self.eviction_stats.ttl += len(to_delete)
+        return len(to_delete)
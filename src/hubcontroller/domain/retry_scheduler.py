@@ -0,0 +1,110 @@
+from __future__ import annotations
+import heapq
+import itertools
+from dataclasses import dataclass
+from typing import Callable
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.domain.clock import seconds_to_ns
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.registry import CommandRegistry
+
+
+@dataclass(slots=True)
+class RetryStats:
+    scheduled: int = 0
+    attempts: int = 0
+    dispatched: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    dropped: int = 0    # not scheduled, max_in_flight retries already pending
+    abandoned: int = 0  # record left RECEIVED (or disappeared) while waiting
+
+
+class RetryScheduler:
+    # PLC writes that failed with ERROR/TIMEOUT wait here instead of sleeping on the processor thread.
+    # run_due() is driven by the processor tick (next to expire_timeouts) and retries what is due,
+    # at most max_per_tick writes per tick so a flapping link cannot starve healthy commands.
+    # The command stays RECEIVED until a write returns OK (-> DISPATCHED), INVALID_PARAMETERS
+    # (-> REJECTED) or registry.dispatch_timeout_s has passed since it was received (-> TIMEOUT).
+    # Backoff doubles from base_delay_s up to max_delay_s. plc_write is the processor's
+    # PlcClient.plc_write_command, so retries go over the same write connection.
+    def __init__(self, registry: CommandRegistry, plc_write: Callable[[Command], PlcSendStatus], max_in_flight: int = 32,
+                 base_delay_s: float = 0.1, max_delay_s: float = 1.0, max_per_tick: int = 4):
+        self._registry = registry
+        self._plc_write = plc_write
+        self.max_in_flight = max_in_flight
+        self._base_delay_ns = seconds_to_ns(base_delay_s)
+        self._max_delay_ns = seconds_to_ns(max_delay_s)
+        self._max_per_tick = max_per_tick
+        # (due_ns, seq, command, attempt); seq keeps FIFO order for equal due times
+        self._heap: list[tuple[int, int, Command, int]] = []
+        self._pending: set[str] = set()
+        self._seq = itertools.count()
+        self.stats = RetryStats()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, command_id: str) -> bool:
+        return command_id in self._pending
+
+    def schedule(self, command: Command) -> bool:
+        # called after the first attempt failed; False when the retry cap is reached
+        if command.command_id in self._pending:
+            return True
+        if len(self._pending) >= self.max_in_flight:
+            self.stats.dropped += 1
+            return False
+        self._pending.add(command.command_id)
+        self._push(command, 1, self._registry.now_ns())
+        self.stats.scheduled += 1
+        return True
+
+    def _push(self, command: Command, attempt: int, now: int) -> None:
+        delay = min(self._base_delay_ns << (attempt - 1), self._max_delay_ns)
+        record = self._registry.get_record(command.command_id)
+        due = now + delay
+        if record is not None:
+            # wake up at the dispatch deadline at the latest, to report the timeout on time
+            due = min(due, record.received_ns + seconds_to_ns(self._registry.dispatch_timeout_s))
+        heapq.heappush(self._heap, (due, next(self._seq), command, attempt))
+
+    def next_due_ns(self) -> int | None:
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self) -> int:
+        # returns the number of PLC writes made
+        registry = self._registry
+        now = registry.now_ns()
+        timeout_ns = seconds_to_ns(registry.dispatch_timeout_s)
+        heap = self._heap
+        writes = 0
+        while heap and heap[0][0] <= now and writes < self._max_per_tick:
+            _, _, command, attempt = heapq.heappop(heap)
+            record = registry.get_record(command.command_id)
+            if record is None or record.status != CommandStatus.RECEIVED or record.command is not command:
+                # timed out, gc'ed or re-received under the same id meanwhile
+                self._pending.discard(command.command_id)
+                self.stats.abandoned += 1
+                continue
+            if now - record.received_ns >= timeout_ns:
+                self._pending.discard(command.command_id)
+                registry.on_timeout(command.command_id)
+                self.stats.timed_out += 1
+                continue
+
+            status = self._plc_write(command)
+            writes += 1
+            self.stats.attempts += 1
+            if status == PlcSendStatus.OK:
+                self._pending.discard(command.command_id)
+                registry.on_dispatched(command.command_id)
+                self.stats.dispatched += 1
+            elif status == PlcSendStatus.INVALID_PARAMETERS:
+                self._pending.discard(command.command_id)
+                registry.on_rejected(command.command_id)
+                self.stats.rejected += 1
+            else:
+                self._push(command, attempt + 1, now)
+        return writes
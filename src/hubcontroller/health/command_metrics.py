@@ -0,0 +1,85 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+from hubcontroller.domain.commands import CommandStatus
+from hubcontroller.domain.registry import CommandRecord, CommandRegistry, TransitionResult
+from hubcontroller.health.metrics import LogHistogram
+from hubcontroller.health.prometheus import PrometheusWriter
+
+# received -> dispatched -> accepted -> executed
+STAGES = ("receive_to_dispatch", "dispatch_to_accept", "accept_to_execute")
+_TERMINAL = frozenset({CommandStatus.EXECUTED, CommandStatus.REJECTED, CommandStatus.FAILED, CommandStatus.TIMEOUT})
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+@dataclass(slots=True)
+class CommandTypeMetrics:
+    stages: tuple[LogHistogram, ...] = field(default_factory=lambda: tuple(LogHistogram() for _ in STAGES))
+    outcomes: dict[CommandStatus, int] = field(default_factory=lambda: dict.fromkeys(_TERMINAL, 0))
+
+
+class CommandMetrics:
+    # registry.subscribe(metrics.on_transition): on every terminal transition the stage latencies
+    # the command went through are recorded per command_type, non-terminal transitions return
+    # after one set lookup. Non-OK TransitionResult counts come from registry.result_counts.
+    # Runs on the registry thread; write_prometheus() may run on the HTTP thread (reads only).
+    def __init__(self, registry: CommandRegistry | None = None, prefix: str = "hubcontroller"):
+        self._registry = registry
+        self._prefix = prefix
+        self.by_type: dict[str, CommandTypeMetrics] = {}
+
+    def attach(self, registry: CommandRegistry):
+        self._registry = registry
+        return registry.subscribe(self.on_transition)
+
+    def on_transition(self, record: CommandRecord) -> None:
+        status = record.status
+        if status not in _TERMINAL:
+            return
+        command_type = record.command.command_type
+        metrics = self.by_type.get(command_type)
+        if metrics is None:
+            metrics = self.by_type[command_type] = CommandTypeMetrics()
+        metrics.outcomes[status] += 1
+        # stages are sequential; stop at the first one the command never reached
+        dispatched = record.dispatched_ns
+        if dispatched is None:
+            return
+        to_dispatch, to_accept, to_execute = metrics.stages
+        to_dispatch.observe_ns(dispatched - record.received_ns)
+        accepted = record.accepted_ns
+        if accepted is None:
+            return
+        to_accept.observe_ns(accepted - dispatched)
+        if record.executed_ns is not None:
+            to_execute.observe_ns(record.executed_ns - accepted)
+
+    def write_prometheus(self, out: PrometheusWriter) -> None:
+        latency = f"{self._prefix}_command_stage_latency_seconds"
+        out.header(latency, "summary", "Command stage latency (HDR histogram quantiles)")
+        for command_type, metrics in list(self.by_type.items()):
+            for histogram, stage in zip(metrics.stages, STAGES):
+                if histogram.count == 0:
+                    continue
+                labels = {"command_type": command_type, "stage": stage}
+                for q in QUANTILES:
+                    out.sample(latency, {**labels, "quantile": str(q)}, histogram.quantile_ns(q) / 1e9)
+                out.sample(f"{latency}_sum", labels, histogram.sum_ns / 1e9)
+                out.sample(f"{latency}_count", labels, histogram.count)
+
+        outcomes = f"{self._prefix}_commands_total"
+        out.header(outcomes, "counter", "Commands by terminal status")
+        for command_type, metrics in list(self.by_type.items()):
+            for status, n in metrics.outcomes.items():
+                out.sample(outcomes, {"command_type": command_type, "status": status.value}, n)
+
+        if self._registry is not None:
+            results = f"{self._prefix}_transition_results_total"
+            out.header(results, "counter", "Registry transitions that changed nothing, by result")
+            for result, n in self._registry.result_counts.items():
+                if result is TransitionResult.OK:
+                    continue
+                out.sample(results, {"result": result.value}, n)
+            in_flight = f"{self._prefix}_commands_in_flight"
+            out.header(in_flight, "gauge", "Commands DISPATCHED or ACCEPTED")
+            out.sample(in_flight, {}, self._registry.in_flight_count)
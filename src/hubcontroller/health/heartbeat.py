@@ -0,0 +1,172 @@
+from __future__ import annotations
+import gc
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Protocol
+
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcLinkStats
+from hubcontroller.domain.clock import seconds_to_ns
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.health.metrics import LogHistogram
+
+logger = logging.getLogger(__name__)
+
+_LIVEBIT = (b"\x00", b"\x01")
+
+
+class LivebitWriter(Protocol):
+    # PlcAdapter fits; write_db goes over the write connection
+    stats: PlcLinkStats
+
+    def write_db(self, db_number: int, start: int, data: bytes) -> None: ...
+
+
+class HeartbeatSink(Protocol):
+    # MqttOutbound fits: non-blocking, a queued heartbeat is replaced by the newer one
+    def publish_heartbeat(self, topic: str, payload: dict) -> bool: ...
+
+
+class InFlightSource(Protocol):
+    @property
+    def in_flight_count(self) -> int: ...
+
+
+@dataclass(slots=True)
+class HeartbeatStats:
+    beats: int = 0
+    missed: int = 0  # deadlines skipped because a beat overran the period
+    livebit_errors: int = 0
+    publish_dropped: int = 0
+    full_collections: int = 0
+    lateness: LogHistogram = field(default_factory=lambda: LogHistogram(unit_ns=10_000, max_ns=10 * 10**9))
+
+
+class HeartbeatEngine:
+    # Own thread, own timer: wakes at absolute deadlines (start + n * period), so neither the
+    # beat duration nor a late wake-up drifts the schedule; a beat that overran the period skips
+    # the missed deadlines instead of firing them back-to-back.
+    # Every beat toggles the livebit with a 1-byte write on the write connection first, then
+    # publishes the heartbeat (non-blocking enqueue), so plc_ok reports this beat's write; the write
+    # may wait for a command write holding the connection lock, the next deadline does not move.
+    # With CPU-bound Python code on other threads a woken thread waits up to one interpreter
+    # switch interval (sys.getswitchinterval(), 5 ms by default) for the GIL, so the engine wakes
+    # spin_s before the deadline and spins, holding the GIL, until the deadline itself. The same
+    # wait follows every blocking call in a beat (the livebit write meeting a command write on the
+    # connection lock), so switch_interval_s, if set, lowers the interval while the engine runs.
+    # Lateness (beat start - deadline) goes to stats.lateness. A full gc collection holds the GIL
+    # for its whole duration and nothing can preempt it, so with gc_interval_s set the engine takes
+    # full collections over: start() stops the interpreter from running them and the engine runs
+    # one right after a beat, at most every gc_interval_s, where it has the whole period before the
+    # next deadline. stop() gives them back.
+    def __init__(self, plc: LivebitWriter, sink: HeartbeatSink, topic: str, hub_state: HubStateProvider,
+                 registry: InFlightSource, livebit_db: int, livebit_offset: int = 0, period_s: float = 1.0,
+                 spin_s: float | None = None, switch_interval_s: float | None = None,
+                 gc_interval_s: float | None = None, clock: Callable[[], int] = time.monotonic_ns):
+        if period_s <= 0:
+            raise ValueError(f"period_s must be > 0, got {period_s}")
+        if switch_interval_s is not None and switch_interval_s <= 0:
+            raise ValueError(f"switch_interval_s must be > 0, got {switch_interval_s}")
+        if gc_interval_s is not None and gc_interval_s <= 0:
+            raise ValueError(f"gc_interval_s must be > 0, got {gc_interval_s}")
+        self._plc = plc
+        self._sink = sink
+        self._topic = topic
+        self._hub_state = hub_state
+        self._registry = registry
+        self._livebit_db = livebit_db
+        self._livebit_offset = livebit_offset
+        self._period_ns = seconds_to_ns(period_s)
+        self._switch_interval_s = switch_interval_s
+        self._saved_switch_interval: float | None = None
+        self._spin_ns = seconds_to_ns(sys.getswitchinterval() if spin_s is None else spin_s)
+        self._gc_interval_ns = None if gc_interval_s is None else seconds_to_ns(gc_interval_s)
+        self._gc_threshold: tuple[int, int, int] | None = None
+        self._clock = clock
+        self._livebit = 0
+        self._livebit_ok = False
+        self._seq = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.stats = HeartbeatStats()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        if self._switch_interval_s is not None:
+            self._saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(self._switch_interval_s)
+        if self._gc_interval_ns is not None:
+            # young generations keep their thresholds; the interpreter never starts a full collection
+            self._gc_threshold = gc.get_threshold()
+            gc.set_threshold(self._gc_threshold[0], self._gc_threshold[1], 2**31 - 1)
+        self._thread = threading.Thread(target=self._run, name="heartbeat", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_s: float = 1.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+            self._thread = None
+        if self._gc_threshold is not None:
+            gc.set_threshold(*self._gc_threshold)
+            self._gc_threshold = None
+        if self._saved_switch_interval is not None:
+            sys.setswitchinterval(self._saved_switch_interval)
+            self._saved_switch_interval = None
+
+    def _run(self) -> None:
+        clock, period_ns, spin_ns, stats = self._clock, self._period_ns, self._spin_ns, self.stats
+        gc_interval_ns = self._gc_interval_ns
+        deadline = clock() + period_ns
+        next_gc = deadline + (gc_interval_ns or 0)
+        while not self._stop.wait(max(0, deadline - spin_ns - clock()) / 1e9):
+            now = clock()
+            while now < deadline:
+                now = clock()
+            stats.lateness.observe_ns(now - deadline)
+            try:
+                self.beat()
+            except Exception:
+                logger.exception("Heartbeat failed")
+            if gc_interval_ns is not None and now >= next_gc:
+                gc.collect()
+                stats.full_collections += 1
+                next_gc = now + gc_interval_ns
+            deadline += period_ns
+            now = clock()
+            if now >= deadline:
+                missed = (now - deadline) // period_ns + 1
+                stats.missed += missed
+                deadline += missed * period_ns
+
+    def payload(self) -> dict:
+        snapshot = self._hub_state.get_snapshot()
+        link = self._plc.stats
+        return {
+            "seq": self._seq,
+            "mode": snapshot.mode.value,
+            "execution_state": snapshot.execution_state.value,
+            "in_flight": self._registry.in_flight_count,
+            "plc_ok": self._livebit_ok,
+            "plc_reconnects": link.reconnects,
+            "plc_io_errors": link.io_errors,
+        }
+
+    def beat(self) -> None:
+        self._seq += 1
+        self.stats.beats += 1
+        self._livebit ^= 1
+        try:
+            self._plc.write_db(self._livebit_db, self._livebit_offset, _LIVEBIT[self._livebit])
+            self._livebit_ok = True
+        except Exception as e:
+            self.stats.livebit_errors += 1
+            if self._livebit_ok:
+                logger.warning("Livebit write failed: %s", e)
+            self._livebit_ok = False
+        if not self._sink.publish_heartbeat(self._topic, self.payload()):
+            self.stats.publish_dropped += 1
@@ -0,0 +1,118 @@
+from __future__ import annotations
+import math
+import threading
+from array import array
+from bisect import bisect_left
+
+# seconds; 0.5 ms .. 5 s, roughly x2-x2.5 per bucket
+DEFAULT_LATENCY_BUCKETS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DEFAULT_DEPTH_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class Histogram:
+    # Fixed-bucket histogram (Prometheus "le" semantics: bucket i counts values <= bounds[i],
+    # last bucket is +Inf). observe() is a bisect and two adds under a lock.
+    def __init__(self, bounds: tuple[float, ...] = DEFAULT_LATENCY_BUCKETS_S):
+        if list(bounds) != sorted(set(bounds)):
+            raise ValueError("Histogram bounds must be strictly increasing")
+        self.bounds = tuple(bounds)
+        self._counts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    def bucket_counts(self) -> list[int]:
+        with self._lock:
+            return list(self._counts)
+
+    def quantile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-quantile (max for the +Inf bucket)
+        with self._lock:
+            if self._count == 0:
+                return 0.0
+            rank = q * self._count
+            seen = 0
+            for i, n in enumerate(self._counts):
+                seen += n
+                if seen >= rank and n:
+                    return self.bounds[i] if i < len(self.bounds) else self._max
+            return self._max
+
+
+class LogHistogram:
+    # HDR-style log-linear histogram of integer nanoseconds: values are kept at unit_ns resolution,
+    # every power of two is split into 2**sub_bits linear sub-buckets (~3% relative error for
+    # sub_bits=5), values above max_ns land in the last bucket. Memory is fixed (a few hundred
+    # counters) whatever is observed. Single writer, no lock: readers on other threads may see a
+    # count that is one observation behind the buckets.
+    def __init__(self, unit_ns: int = 1000, max_ns: int = 100 * 10**9, sub_bits: int = 5):
+        self.unit_ns = unit_ns
+        self._sub_bits = sub_bits
+        self._sub_count = 1 << sub_bits
+        max_units = max(max_ns // unit_ns, self._sub_count)
+        self._counts = array("Q", bytes(8 * (self._index(max_units) + 2)))
+        self._last = len(self._counts) - 1
+        self.count = 0
+        self.sum_ns = 0
+        self.max_ns = 0
+
+    def _index(self, units: int) -> int:
+        if units < self._sub_count:
+            return units
+        shift = units.bit_length() - self._sub_bits - 1
+        return (shift + 1) * self._sub_count + (units >> shift) - self._sub_count
+
+    def _upper_units(self, index: int) -> int:
+        # largest value (in units) that maps to index
+        if index < self._sub_count:
+            return index
+        shift = index // self._sub_count - 1
+        return ((index % self._sub_count + self._sub_count + 1) << shift) - 1
+
+    def observe_ns(self, ns: int) -> None:
+        if ns < 0:
+            ns = 0
+        i = self._index(ns // self.unit_ns)
+        self._counts[i if i < self._last else self._last] += 1
+        self.count += 1
+        self.sum_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def quantile_ns(self, q: float) -> int:
+        # upper edge of the bucket holding the q-quantile, never above the observed max
+        counts = self._counts
+        total = sum(counts)
+        if total == 0:
+            return 0
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for i, n in enumerate(counts):
+            seen += n
+            if seen >= rank:
+                if i == self._last:
+                    return self.max_ns
+                return min((self._upper_units(i) + 1) * self.unit_ns - 1, self.max_ns)
+        return self.max_ns
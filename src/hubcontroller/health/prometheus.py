@@ -0,0 +1,112 @@
+from __future__ import annotations
+import logging
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Protocol
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class PrometheusWriter:
+    # Prometheus text exposition format 0.0.4, built line by line
+    def __init__(self):
+        self._lines: list[str] = []
+
+    def header(self, name: str, kind: str, help_text: str) -> None:
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, labels: dict[str, str], value: float) -> None:
+        if labels:
+            rendered = ",".join(f'{key}="{escape_label(str(v))}"' for key, v in labels.items())
+            self._lines.append(f"{name}{{{rendered}}} {format_value(value)}")
+        else:
+            self._lines.append(f"{name} {format_value(value)}")
+
+    def text(self) -> str:
+        return "\n".join(self._lines) + "\n"
+
+
+class PrometheusSource(Protocol):
+    def write_prometheus(self, out: PrometheusWriter) -> None: ...
+
+
+def render(*sources: PrometheusSource) -> str:
+    out = PrometheusWriter()
+    for source in sources:
+        source.write_prometheus(out)
+    return out.text()
+
+
+class MetricsServer:
+    # GET /metrics on a local port, served from a daemon thread. Rendering happens per scrape
+    # on the HTTP thread, the hot path only ever touches the counters.
+    def __init__(self, render_text: Callable[[], str], host: str = "127.0.0.1", port: int = 9464):
+        self._render_text = render_text
+        self._host = host
+        self._port = port
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def port(self) -> int:
+        # the bound port, useful with port=0
+        return self._server.server_address[1] if self._server is not None else self._port
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        render_text = self._render_text
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                try:
+                    body = render_text().encode("utf-8")
+                except Exception:
+                    logger.exception("Metrics render failed")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("metrics %s - " + format, self.client_address[0], *args)
+
+        self._server = ThreadingHTTPServer((self._host, self._port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        logger.info("Metrics endpoint on http://%s:%d/metrics", self._host, self.port)
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._server = None
+        self._thread = None
@@ -0,0 +1,309 @@
+from __future__ import annotations
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.decoders.hub_status_decoder import EXECUTION_STATE_CODES, HUB_MODE_CODES
+from hubcontroller.adapters.plc.protocol.encoders.frame_encoder import compile_encoder
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec
+from hubcontroller.adapters.plc.transport.plc_adapter import CPU_RUN
+from hubcontroller.domain.hub_state import ExecutionState, HubMode
+
+CPU_STOP = "S7CpuStatusStop"
+
+# seconds drawn per command from the simulator's seeded rng
+Latency = Callable[[random.Random], float]
+
+
+def fixed(seconds: float) -> Latency:
+    return lambda rng: seconds
+
+
+def uniform(low_s: float, high_s: float) -> Latency:
+    return lambda rng: rng.uniform(low_s, high_s)
+
+
+def lognormal(median_s: float, sigma: float = 0.5) -> Latency:
+    # long right tail, like a real cycle time
+    mu = math.log(median_s)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+@dataclass(slots=True)
+class PlcBehaviour:
+    accept_latency: Latency = fixed(0.0)
+    execute_latency: Latency = fixed(0.0)
+    ack_drop_rate: float = 0.0  # command read but never acked nor executed
+    reject_rate: float = 0.0    # acked with error=1, not executed
+    resend_rate: float = 0.0    # resend request instead of an ack; the next write of the token is taken normally
+    fail_rate: float = 0.0      # accepted, exec frame with error=1
+    seed: int = 0
+
+
+@dataclass(slots=True)
+class SimulatorStats:
+    commands: int = 0
+    acks: int = 0
+    execs: int = 0
+    dropped: int = 0
+    rejected: int = 0
+    resends: int = 0
+    failed: int = 0
+    livebit_toggles: int = 0
+    reads: int = 0
+    writes: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class _ControlFrame:
+    trigger: int
+    command: str
+    token: str
+    mission_id: int
+
+
+@dataclass(slots=True)
+class _Mailbox:
+    # single-slot PLC -> hub frame: the next frame goes out once the hub cleared the trigger
+    spec: FrameSpec
+    encoder: object
+    trigger_at: int
+    pending: deque = field(default_factory=deque)
+
+
+class SimulatedPlc:
+    # Pure-Python stand-in for the S7 PLC program, hosting the control, ack, exec, resend,
+    # hub status and livebit DBs laid out by the same FrameSpecs the hub uses.
+    # - a control frame with trigger != 0 is taken (trigger cleared) on the write that set it;
+    #   ack and exec frames are then posted after latencies drawn from PlcBehaviour
+    # - ack/exec/resend areas are single-slot mailboxes with the hub clearing the trigger,
+    #   frames queue up behind a slot the hub has not consumed yet
+    # - the program runs inside client calls (no thread of its own), on the simulator clock;
+    #   with the CPU in STOP it does not run and queued frames wait
+    # client() fits PlcAdapter(client_factory=...). Thread-safe: the adapter's read and write
+    # clients may run on different threads.
+    def __init__(self, control_spec: FrameSpec, ack_spec: FrameSpec, exec_spec: FrameSpec, resend_spec: FrameSpec,
+                 hub_status_spec: FrameSpec, livebit_db: int, behaviour: PlcBehaviour | None = None,
+                 clock: Callable[[], float] = time.monotonic, pdu_length: int = 480):
+        self.behaviour = behaviour or PlcBehaviour()
+        self._rng = random.Random(self.behaviour.seed)
+        self._clock = clock
+        self.pdu_length = pdu_length
+        self._lock = threading.Lock()
+        self.cpu_state = CPU_RUN
+        self.reachable = True
+        self.stats = SimulatorStats()
+
+        sizes: dict[int, int] = {livebit_db: 1}
+        for spec in (control_spec, ack_spec, exec_spec, resend_spec, hub_status_spec):
+            sizes[spec.db_num] = max(sizes.get(spec.db_num, 0), spec.start + spec.length)
+        self.dbs = {db: bytearray(size) for db, size in sizes.items()}
+        # like a downloaded DB: STRING headers carry their max length, everything else is 0
+        for spec in (control_spec, ack_spec, exec_spec, resend_spec):
+            self.dbs[spec.db_num][spec.start:spec.start + spec.length] = compile_encoder(spec).encode({})
+
+        self._control_spec = control_spec
+        self._control_decoder = compile_decoder(control_spec, _ControlFrame)
+        self._control_trigger_at = control_spec.get_field_offset("trigger")
+        self._hub_status_spec = hub_status_spec
+        self._hub_status_encoder = compile_encoder(hub_status_spec)
+        self._livebit_db = livebit_db
+        self._livebit = 0
+        self._ack = self._mailbox(ack_spec)
+        self._exec = self._mailbox(exec_spec)
+        self._resend = self._mailbox(resend_spec)
+        # (due, seq, mailbox, frame values); seq keeps posting order for equal due times
+        self._timeline: list[tuple[float, int, _Mailbox, dict]] = []
+        self._seq = itertools.count()
+        self._resend_requested: set[str] = set()
+        self._executing = 0
+        self._mode_code = 5  # cycle_ready
+        self._write_hub_status()
+
+    @classmethod
+    def from_settings(cls, settings, behaviour: PlcBehaviour | None = None, **kwargs) -> SimulatedPlc:
+        from hubcontroller.adapters.plc.protocol.specs.ack_specs import build_ack_frame_spec
+        from hubcontroller.adapters.plc.protocol.specs.control_specs import build_control_frame_spec
+        from hubcontroller.adapters.plc.protocol.specs.exec_specs import build_exec_frame_spec, build_resend_frame_spec
+        from hubcontroller.adapters.plc.protocol.specs.hub_status_specs import build_hub_status_frame_spec
+        return cls(build_control_frame_spec(settings), build_ack_frame_spec(settings), build_exec_frame_spec(settings),
+                   build_resend_frame_spec(settings), build_hub_status_frame_spec(settings), settings.plc_livebit,
+                   behaviour, **kwargs)
+
+    def _mailbox(self, spec: FrameSpec) -> _Mailbox:
+        return _Mailbox(spec=spec, encoder=compile_encoder(spec), trigger_at=spec.get_field_offset("trigger"))
+
+    def client(self) -> SimulatedS7Client:
+        return SimulatedS7Client(self)
+
+    # --- scripting ---
+
+    def stop_cpu(self) -> None:
+        with self._lock:
+            self.cpu_state = CPU_STOP
+
+    def start_cpu(self) -> None:
+        with self._lock:
+            self.cpu_state = CPU_RUN
+
+    def set_hub_mode(self, mode: HubMode) -> None:
+        with self._lock:
+            self._mode_code = next(code for code, m in HUB_MODE_CODES.items() if m == mode)
+            self._write_hub_status()
+
+    @property
+    def pending_frames(self) -> int:
+        # frames scheduled or waiting for a free mailbox
+        with self._lock:
+            return len(self._timeline) + sum(len(m.pending) for m in (self._ack, self._exec, self._resend))
+
+    # --- program ---
+
+    def _write_hub_status(self) -> None:
+        state = ExecutionState.EXECUTING if self._executing else ExecutionState.IDLE
+        state_code = next(code for code, s in EXECUTION_STATE_CODES.items() if s == state)
+        spec = self._hub_status_spec
+        frame = self._hub_status_encoder.encode({"mode": self._mode_code, "execution_state": state_code})
+        self.dbs[spec.db_num][spec.start:spec.start + spec.length] = frame
+
+    def _take_control_frame(self) -> None:
+        spec = self._control_spec
+        db = self.dbs[spec.db_num]
+        if db[self._control_trigger_at] == 0 and db[self._control_trigger_at + 1] == 0:
+            return
+        frame = self._control_decoder.decode(memoryview(db)[spec.start:spec.start + spec.length])
+        db[self._control_trigger_at:self._control_trigger_at + 2] = b"\x00\x00"
+        self.stats.commands += 1
+        behaviour, rng, now = self.behaviour, self._rng, self._clock()
+        values = {"trigger": 1, "command": frame.command, "token": frame.token, "mission_id": frame.mission_id}
+        if frame.token not in self._resend_requested and rng.random() < behaviour.resend_rate:
+            self._resend_requested.add(frame.token)
+            self.stats.resends += 1
+            self._post(now, self._resend, values)
+            return
+        self._resend_requested.discard(frame.token)
+        if rng.random() < behaviour.ack_drop_rate:
+            self.stats.dropped += 1
+            return
+        accepted_at = now + behaviour.accept_latency(rng)
+        if rng.random() < behaviour.reject_rate:
+            self.stats.rejected += 1
+            self._post(accepted_at, self._ack, {**values, "error": 1, "message": "rejected by simulator"})
+            return
+        self._post(accepted_at, self._ack, values)
+        executed_at = accepted_at + behaviour.execute_latency(rng)
+        if rng.random() < behaviour.fail_rate:
+            self.stats.failed += 1
+            self._post(executed_at, self._exec, {**values, "error": 1, "message": "failed in simulator"})
+        else:
+            self._post(executed_at, self._exec, values)
+
+    def _post(self, due: float, mailbox: _Mailbox, values: dict) -> None:
+        heapq.heappush(self._timeline, (due, next(self._seq), mailbox, values))
+
+    def _run(self) -> None:
+        if self.cpu_state != CPU_RUN:
+            return
+        self._take_control_frame()
+        now = self._clock()
+        timeline = self._timeline
+        while timeline and timeline[0][0] <= now:
+            _, _, mailbox, values = heapq.heappop(timeline)
+            mailbox.pending.append(values)
+            if mailbox is self._ack and not values.get("error"):
+                self._executing += 1
+            elif mailbox is self._exec:
+                self._executing -= 1
+        for mailbox in (self._ack, self._exec, self._resend):
+            db = self.dbs[mailbox.spec.db_num]
+            at = mailbox.trigger_at
+            if mailbox.pending and db[at] == 0 and db[at + 1] == 0:
+                values = mailbox.pending.popleft()
+                spec = mailbox.spec
+                db[spec.start:spec.start + spec.length] = mailbox.encoder.encode(values)
+                if mailbox is self._ack:
+                    self.stats.acks += 1
+                elif mailbox is self._exec:
+                    self.stats.execs += 1
+        self._write_hub_status()
+
+    # --- client side, called with the link up ---
+
+    def read(self, db_number: int, start: int, length: int) -> bytearray:
+        with self._lock:
+            self.stats.reads += 1
+            self._run()
+            db = self.dbs[db_number]
+            if start + length > len(db):
+                raise RuntimeError(f"CPU : Address out of range DB{db_number}.{start}[{length}]")
+            return bytearray(db[start:start + length])
+
+    def write(self, db_number: int, start: int, data: bytes) -> None:
+        with self._lock:
+            self.stats.writes += 1
+            db = self.dbs[db_number]
+            if start + len(data) > len(db):
+                raise RuntimeError(f"CPU : Address out of range DB{db_number}.{start}[{len(data)}]")
+            db[start:start + len(data)] = data
+            if db_number == self._livebit_db and start == 0 and data and data[0] != self._livebit:
+                self._livebit = data[0]
+                self.stats.livebit_toggles += 1
+            self._run()
+
+
+class SimulatedS7Client:
+    # the part of snap7.client.Client that PlcConnection/PlcAdapter use
+    def __init__(self, plc: SimulatedPlc):
+        self._plc = plc
+        self._connected = False
+
+    def connect(self, address: str, rack: int, slot: int, tcp_port: int = 102) -> None:
+        if not self._plc.reachable:
+            raise RuntimeError("TCP : Unreachable peer")
+        self._connected = True
+
+    def get_connected(self) -> bool:
+        return self._connected and self._plc.reachable
+
+    def get_cpu_state(self) -> str:
+        self._check_link()
+        return self._plc.cpu_state
+
+    def get_pdu_length(self) -> int:
+        return self._plc.pdu_length
+
+    def _check_link(self) -> None:
+        if not self.get_connected():
+            self._connected = False
+            raise RuntimeError("ISO : An error occurred during recv TCP : Connection reset by peer")
+
+    def db_read(self, db_number: int, start: int, size: int) -> bytearray:
+        self._check_link()
+        return self._plc.read(db_number, start, size)
+
+    def db_write(self, db_number: int, start: int, data: bytes) -> None:
+        self._check_link()
+        self._plc.write(db_number, start, bytes(data))
+
+    def read_multi_vars(self, items) -> tuple[int, object]:
+        # snap7 S7DataItem array: DBNumber/Start/Amount in, bytes copied to pData, Result per item
+        import ctypes
+        self._check_link()
+        for item in items:
+            data = self._plc.read(item.DBNumber, item.Start, item.Amount)
+            ctypes.memmove(item.pData, bytes(data), item.Amount)
+            item.Result = 0
+        return 0, items
+
+    def disconnect(self) -> None:
+        self._connected = False
+
+    def destroy(self) -> None:
+        self._connected = False
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+
+import pytest
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.adapters.plc.pollers.periodic_task import PeriodicTask
+from hubcontroller.adapters.plc.transport.async_plc_adapter import AsyncPlcAdapter
+from hubcontroller.domain.async_processor import AsyncCommandProcessor
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.registry import CommandRegistry, TransitionResult
+
+
+class BlockedWriteAdapter:
+    # write_db blocks until the test releases it
+    def __init__(self):
+        self.release = threading.Event()
+        self.read_threads: set[str] = set()
+        self.write_threads: set[str] = set()
+
+    def read_db(self, db_number, start, length):
+        self.read_threads.add(threading.current_thread().name)
+        return bytearray(length)
+
+    def write_db(self, db_number, start, data):
+        self.write_threads.add(threading.current_thread().name)
+        assert self.release.wait(5.0)
+
+    def disconnect_read(self):
+        pass
+
+    def disconnect_write(self):
+        pass
+
+
+class FakeClock:
+    # virtual loop time: sleep() advances it and yields once to the loop
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self) -> float:
+        return self.t
+
+    async def sleep(self, s: float) -> None:
+        self.t += s
+        await asyncio.sleep(0)
+
+
+async def until(predicate):
+    while not predicate():
+        await asyncio.sleep(0)
+
+
+def test_blocked_write_does_not_delay_reads():
+    async def scenario():
+        fake = BlockedWriteAdapter()
+        adapter = AsyncPlcAdapter(fake)
+        write = asyncio.create_task(adapter.write_db(1, 0, b"\x01"))
+        # reads complete while the write is still stuck on the write executor
+        for _ in range(10):
+            assert await adapter.read_db(1, 0, 4) == bytearray(4)
+        assert not write.done()
+        fake.release.set()
+        await write
+        await adapter.close()
+        return fake
+
+    fake = asyncio.run(scenario())
+    assert len(fake.read_threads) == 1 and len(fake.write_threads) == 1
+    assert fake.read_threads != fake.write_threads
+
+
+def test_periodic_task_keeps_fixed_cadence_and_survives_errors():
+    clock = FakeClock()
+    calls = []
+
+    async def poll():
+        calls.append(clock())
+        clock.t += 0.005  # poll duration does not shift the next tick
+        if len(calls) == 2:
+            raise RuntimeError("read failed")
+
+    async def scenario():
+        task = PeriodicTask("ack-poll", 0.02, poll, clock=clock, sleep=clock.sleep)
+        task.start()
+        await until(lambda: len(calls) >= 6)
+        await task.stop()
+        return task
+
+    task = asyncio.run(scenario())
+    assert task.errors == 1 and task.missed_ticks == 0
+    # ticks are anchored to the first one, not to the end of the previous poll
+    for n, t in enumerate(calls):
+        assert t == pytest.approx(n * 0.02)
+
+
+def test_periodic_task_skips_missed_ticks():
+    clock = FakeClock()
+    calls = []
+
+    async def slow_poll():
+        calls.append(clock())
+        clock.t += 0.05
+
+    async def scenario():
+        task = PeriodicTask("slow", 0.02, slow_poll, clock=clock, sleep=clock.sleep)
+        task.start()
+        await until(lambda: len(calls) >= 4)
+        await task.stop()
+        return task
+
+    task = asyncio.run(scenario())
+    # a 50 ms poll on a 20 ms cadence runs on every third tick, the two in between are skipped
+    assert calls == pytest.approx([0.0, 0.06, 0.12, 0.18])
+    assert task.missed_ticks == 2 * task.ticks
+
+
+class GatedPlcClient:
+    # AsyncPlcClient stand-in: every write waits for the test to open the gate
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.writes: list[str] = []
+
+    async def plc_write_command(self, command):
+        self.writes.append(command.command_id)
+        await self.gate.wait()
+        return PlcSendStatus.OK
+
+    async def plc_write_commands(self, commands):
+        return [await self.plc_write_command(command) for command in commands]
+
+
+def test_copy_arriving_while_the_write_is_awaited_is_not_written_again():
+    async def scenario():
+        registry = CommandRegistry(clock=ManualClock())
+        state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+        plc = GatedPlcClient()
+        processor = AsyncCommandProcessor(registry, {"start_cycle": None}, state, Guard(), plc)
+        command = Command(command_id="c1", command_type="start_cycle", payload={})
+
+        first = asyncio.create_task(processor.on_command(command))
+        await until(lambda: plc.writes)
+        assert await processor.on_command(command) == TransitionResult.DUPLICATE
+        assert await processor.on_commands([command]) == [TransitionResult.DUPLICATE]
+        plc.gate.set()
+        assert await first is None
+        return registry, plc
+
+    registry, plc = asyncio.run(scenario())
+    assert plc.writes == ["c1"]
+    assert registry.get_record("c1").status == CommandStatus.DISPATCHED
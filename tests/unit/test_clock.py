@@ -0,0 +1,34 @@
+from datetime import datetime, timezone, timedelta
+from hubcontroller.domain.clock import DatetimeClock, ManualClock, MonotonicClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.registry import CommandRegistry
+
+def make_command(command_id: str) -> Command:
+    return Command(
+        command_id= command_id,
+        command_type="test",
+        payload= {'x':'s'}
+        )
+
+def test_registry_on_manual_monotonic_clock():
+    wall_start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    clock = ManualClock(start_ns=5_000, wall_start=wall_start)
+    registry = CommandRegistry(clock=clock, accept_timeout_s=3.0)
+    record = registry.on_received(make_command("cmd1")).record
+
+    clock.advance(3.0)
+    assert registry.expire_timeouts() == 1
+    assert record.status == CommandStatus.TIMEOUT
+    assert record.timeout_ns - record.received_ns == 3_000_000_000
+    assert record.received_at == wall_start
+    assert record.timeout_at == wall_start + timedelta(seconds=3)
+
+def test_datetime_clock_round_trips_microseconds():
+    now = datetime(2026, 5, 17, 12, 30, 1, 123456, tzinfo=timezone.utc)
+    clock = DatetimeClock(lambda: now)
+    assert clock.to_utc(clock.now_ns()) == now
+
+def test_monotonic_clock_converts_to_current_wall_time():
+    clock = MonotonicClock()
+    converted = clock.to_utc(clock.now_ns())
+    assert abs(converted - datetime.now(timezone.utc)) < timedelta(seconds=1)
@@ -0,0 +1,176 @@
+from hubcontroller.adapters.persistence.command_journal import RECORD_SIZE, CommandJournal
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.compact_registry import CompactCommandRegistry
+from hubcontroller.domain.registry import CommandRegistry
+
+
+def cmd(command_id, command_type="start_cycle"):
+    return Command(command_id=command_id, command_type=command_type, payload={"x": 1})
+
+
+def journaled_registry(path, clock):
+    registry = CommandRegistry(clock=clock)
+    journal = CommandJournal(path, fsync=False)
+    journal.recover(registry)
+    journal.attach(registry)
+    return registry, journal
+
+
+def test_recover_restores_status_timestamps_and_in_flight(tmp_path):
+    clock = ManualClock()
+    registry, journal = journaled_registry(tmp_path / "cmd.journal", clock)
+    registry.on_received(cmd("c1"))
+    clock.advance(1)
+    registry.on_dispatched("c1")
+    registry.on_received(cmd("c2", "go_home"))
+    registry.on_dispatched("c2")
+    registry.on_accepted("c2")
+    registry.on_executed("c2")
+    journal.close()
+
+    restored = CommandRegistry(clock=ManualClock())
+    assert CommandJournal(tmp_path / "cmd.journal").recover(restored) == 2
+    c1, c2 = restored.get_record("c1"), restored.get_record("c2")
+    assert (c1.status, c1.received_ns, c1.dispatched_ns) == (CommandStatus.DISPATCHED, 0, 1_000_000_000)
+    assert c2.status == CommandStatus.EXECUTED and c2.command.command_type == "go_home"
+    # open commands get their payload back so they can be sent again; terminal ones do not need it
+    assert c1.command.payload == {"x": 1}
+    assert c2.command.payload == {}
+    assert restored.in_flight_count == 1
+    assert [r.command.command_id for r in restored.records()] == ["c1", "c2"]
+    # duplicate detection works across the restart
+    assert restored.on_received(cmd("c2")).changed is False
+
+
+def test_torn_tail_is_cut_off(tmp_path):
+    path = tmp_path / "cmd.journal"
+    registry, journal = journaled_registry(path, ManualClock())
+    registry.on_received(cmd("c1"))
+    journal.sync()
+    registry.on_received(cmd("c2"))
+    journal.close()
+    data = path.read_bytes()
+    # crash in the middle of the last commit
+    path.write_bytes(data[:-RECORD_SIZE // 2])
+
+    restored = CommandRegistry(clock=ManualClock())
+    journal = CommandJournal(path)
+    assert journal.recover(restored) == 1
+    assert journal.stats.torn_bytes == len(data) - RECORD_SIZE // 2 - path.stat().st_size
+    assert path.read_bytes() == data[:path.stat().st_size]
+
+    # a corrupted (not just short) commit stops the replay as well
+    data = bytearray(path.read_bytes())
+    data[-10] ^= 0xFF
+    path.write_bytes(bytes(data))
+    assert CommandJournal(path).recover(CommandRegistry(clock=ManualClock())) == 0
+
+
+def test_checkpoint_truncates_journal_and_keeps_live_state(tmp_path):
+    path = tmp_path / "cmd.journal"
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock, ttl_s=10)
+    journal = CommandJournal(path, fsync=False, snapshot_bytes=4 * RECORD_SIZE)
+    journal.attach(registry)
+    registry.on_received(cmd("old"))
+    clock.advance(20)
+    registry.on_received(cmd("new"))
+    registry.on_dispatched("new")
+    journal.sync()
+    registry.gc_ttl()
+    assert journal.checkpoint() is True
+    assert journal.checkpoint(force=True) is False  # one at a time
+    # the registry thread only queued it; the snapshot is written by the next commit
+    registry.on_accepted("new")
+    registry.on_received(cmd("later"))
+    assert not journal.snapshot_path.exists()
+    assert journal.sync() == 3  # eviction of "old" before the cut, accepted + received after it
+    assert journal.stats.snapshots == 1
+    journal.close()
+
+    restored = CommandRegistry(clock=ManualClock())
+    assert CommandJournal(path).recover(restored) == 2
+    assert restored.get_record("old") is None
+    new = restored.get_record("new")
+    assert new.status == CommandStatus.ACCEPTED and new.command.payload == {"x": 1}
+    assert restored.get_record("later").command.payload == {"x": 1}
+    assert [r.command.command_id for r in restored.records()] == ["new", "later"]
+
+
+def test_evicted_commands_stay_evicted(tmp_path):
+    path = tmp_path / "cmd.journal"
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock, ttl_s=10, max_entries=2)
+    journal = CommandJournal(path, fsync=False)
+    journal.attach(registry)
+    registry.on_received(cmd("expired"))
+    clock.advance(20)
+    assert registry.gc_ttl() == 1
+    registry.on_received(cmd("a"))
+    registry.on_received(cmd("b"))
+    registry.on_received(cmd("c"))  # over capacity: "a" goes
+    registry.on_received(cmd("expired"))  # a new command under an evicted id
+    journal.close()
+    assert journal.stats.evictions == 3
+
+    restored = CommandRegistry(clock=ManualClock())
+    assert CommandJournal(path).recover(restored) == 2
+    assert [r.command.command_id for r in restored.records()] == ["c", "expired"]
+    assert restored.get_record("expired").received_ns == 20_000_000_000
+
+
+def test_terminal_commands_from_a_snapshot_can_be_evicted_after_restart(tmp_path):
+    path = tmp_path / "cmd.journal"
+    clock = ManualClock()
+    registry, journal = journaled_registry(path, clock)
+    for command_id in ("a", "b", "c"):
+        registry.on_received(cmd(command_id))
+    for command_id in ("a", "b"):
+        registry.on_dispatched(command_id)
+        registry.on_accepted(command_id)
+        registry.on_executed(command_id)
+    journal.checkpoint(force=True)
+    journal.close()
+
+    registry, journal = journaled_registry(path, clock)
+    registry.max_entries = 3
+    registry.on_received(cmd("d"))  # over capacity: terminal "a" goes
+    registry.on_dispatched("c")
+    journal.close()
+
+    restored = CommandRegistry(clock=ManualClock())
+    assert CommandJournal(path).recover(restored) == 3
+    assert [(r.command.command_id, r.status) for r in restored.records()] == [
+        ("b", CommandStatus.EXECUTED), ("c", CommandStatus.DISPATCHED), ("d", CommandStatus.RECEIVED)]
+
+
+def test_compact_registry_recovers_the_same_state_from_columns(tmp_path):
+    path = tmp_path / "cmd.journal"
+    clock = ManualClock()
+    registry, journal = journaled_registry(path, clock)
+    for i in range(50):
+        registry.on_received(cmd(f"c{i}", "go_home" if i % 2 else "start_cycle"))
+        clock.advance(0.1)
+        if i % 3:
+            registry.on_dispatched(f"c{i}")
+        if i % 3 == 2:
+            registry.on_accepted(f"c{i}")
+            registry.on_executed(f"c{i}")
+    journal.checkpoint(force=True)
+    registry.on_dispatched("c0")
+    journal.close()
+
+    def state(registry):
+        return [(r.command, r.status, r.received_ns, r.dispatched_ns, r.accepted_ns, r.executed_ns)
+                for r in registry.records()]
+
+    restored_clock = ManualClock()
+    plain, compact = CommandRegistry(clock=restored_clock), CompactCommandRegistry(clock=restored_clock)
+    assert CommandJournal(path).recover(plain) == CommandJournal(path).recover(compact) == 50
+    assert state(compact) == state(plain)
+    assert compact.in_flight_count == plain.in_flight_count == 18
+    assert compact.get_record("c0").command.payload == {"x": 1}
+    # deadlines of the open commands come back too
+    restored_clock.advance(compact.exec_timeout_s + 10)
+    assert compact.expire_timeouts() == plain.expire_timeouts() == 34
@@ -0,0 +1,70 @@
+import urllib.request
+
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.registry import CommandRegistry, TransitionResult
+from hubcontroller.health.command_metrics import CommandMetrics
+from hubcontroller.health.metrics import LogHistogram
+from hubcontroller.health.prometheus import MetricsServer, escape_label, render
+
+
+def test_log_histogram_quantiles_within_bucket_error():
+    histogram = LogHistogram()
+    for us in range(1, 10_001):
+        histogram.observe_ns(us * 1000)
+    assert histogram.count == 10_000
+    for q, exact in ((0.5, 5_000_000), (0.99, 9_900_000)):
+        assert exact <= histogram.quantile_ns(q) <= exact * 1.04
+    assert histogram.quantile_ns(1.0) == 10_000_000
+    histogram.observe_ns(10**15)  # past max_ns: clamped into the last bucket
+    assert histogram.quantile_ns(1.0) == 10**15
+
+
+def test_stage_latencies_and_outcomes_recorded_on_terminal_transitions():
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock)
+    metrics = CommandMetrics()
+    metrics.attach(registry)
+
+    registry.on_received(Command(command_id="c1", command_type="start_cycle", payload={}))
+    clock.advance(0.002)
+    registry.on_dispatched("c1")
+    clock.advance(0.010)
+    registry.on_accepted("c1")
+    assert metrics.by_type == {}  # nothing until the command ends
+    clock.advance(0.5)
+    registry.on_executed("c1")
+
+    registry.on_received(Command(command_id="c2", command_type="start_cycle", payload={}))
+    registry.on_rejected("c2")
+    registry.on_executed("c1")  # duplicate
+    registry.on_accepted("c2")  # terminal already
+    registry.on_accepted("nope")
+
+    start_cycle = metrics.by_type["start_cycle"]
+    assert start_cycle.outcomes[CommandStatus.EXECUTED] == 1
+    assert start_cycle.outcomes[CommandStatus.REJECTED] == 1
+    dispatch, accept, execute = start_cycle.stages
+    assert (dispatch.count, accept.count, execute.count) == (1, 1, 1)  # c2 never dispatched
+    assert 0.010e9 <= accept.quantile_ns(0.5) <= 0.0104e9
+    assert registry.result_counts[TransitionResult.DUPLICATE] == 1
+    assert registry.result_counts[TransitionResult.TERMINAL] == 1
+    assert registry.result_counts[TransitionResult.UNKNOWN_COMMAND] == 1
+
+    text = render(metrics)
+    assert 'hubcontroller_commands_total{command_type="start_cycle",status="executed"} 1' in text
+    assert 'hubcontroller_transition_results_total{result="terminal"} 1' in text
+    assert 'result="ok"' not in text
+    assert 'hubcontroller_command_stage_latency_seconds_count{command_type="start_cycle",stage="accept_to_execute"} 1' in text
+
+
+def test_metrics_server_serves_text_format():
+    assert escape_label('a"b\\c\nd') == 'a\\"b\\\\c\\nd'
+    server = MetricsServer(lambda: "up 1\n", port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert response.read() == b"up 1\n"
+    finally:
+        server.stop()
@@ -0,0 +1,106 @@
+import gc
+from datetime import datetime, timezone, timedelta
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.registry import CommandRegistry
+
+def make_command(command_id: str) -> Command:
+    return Command(
+        command_id= command_id,
+        command_type="test",
+        payload= {'x':'s'}
+        )
+
+def test_only_due_stage_deadlines_expire():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=fake_clock.now, accept_timeout_s=3.0, exec_timeout_s=10.0)
+    registry.dispatch_timeout_s = 5.0
+
+    registry.on_received(make_command("received"))
+    registry.on_received(make_command("dispatched"))
+    registry.on_dispatched("dispatched")
+    registry.on_received(make_command("accepted"))
+    registry.on_dispatched("accepted")
+    registry.on_accepted("accepted")
+
+    fake_clock.advance(3.0)
+    assert registry.expire_timeouts() == 1
+    assert registry.get_record("received").status == CommandStatus.TIMEOUT
+    assert registry.get_record("received").timeout_at == fake_clock.now()
+
+    fake_clock.advance(2.0)
+    assert registry.expire_timeouts() == 1
+    assert registry.get_record("dispatched").status == CommandStatus.TIMEOUT
+    assert registry.get_record("accepted").status == CommandStatus.ACCEPTED
+
+    fake_clock.advance(5.0)
+    assert registry.expire_timeouts() == 1
+    assert registry.get_record("accepted").status == CommandStatus.TIMEOUT
+    assert registry.expire_timeouts() == 0
+
+def test_stage_change_replaces_old_deadline():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=fake_clock.now, accept_timeout_s=3.0)
+    registry.on_received(make_command("cmd1"))
+
+    fake_clock.advance(2.0)
+    registry.on_dispatched("cmd1")
+
+    # accept deadline (t=3) is stale now, dispatch deadline is t=7
+    fake_clock.advance(1.5)
+    assert registry.expire_timeouts() == 0
+    assert registry.get_record("cmd1").status == CommandStatus.DISPATCHED
+
+    fake_clock.advance(3.5)
+    assert registry.expire_timeouts() == 1
+
+def test_changed_timeout_is_applied_to_live_records():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=fake_clock.now, accept_timeout_s=30.0)
+    registry.on_received(make_command("cmd1"))
+
+    registry.accept_timeout_s = 1.0
+    fake_clock.advance(1.0)
+    assert registry.expire_timeouts() == 1
+
+def test_gc_then_same_command_id_uses_new_deadline():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=fake_clock.now, accept_timeout_s=3.0, ttl_s=1.0)
+    registry.on_received(make_command("cmd1"))
+
+    fake_clock.advance(1.0)
+    assert registry.gc_ttl() == 1
+    registry.on_received(make_command("cmd1"))
+
+    fake_clock.advance(2.5)
+    assert registry.expire_timeouts() == 0
+    fake_clock.advance(0.5)
+    assert registry.expire_timeouts() == 1
+
+def test_deadline_entries_are_not_tracked_by_the_gc():
+    # every stage leaves a stale entry behind until it comes due; in a burst they pile up and must
+    # not make full collections slower
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=fake_clock.now, accept_timeout_s=3.0, exec_timeout_s=10.0)
+    for command_id in ("deadline-a", "deadline-b"):
+        registry.on_received(make_command(command_id))
+        registry.on_dispatched(command_id)
+        registry.on_accepted(command_id)
+
+    gc.collect()
+    entries = [o for o in gc.get_objects() if type(o) is tuple and ("deadline-a" in o or "deadline-b" in o)]
+    assert entries == []
+
+    fake_clock.advance(10.0)
+    assert registry.expire_timeouts() == 2
+    assert registry.get_record("deadline-a").status == CommandStatus.TIMEOUT
+
+
+class FakeClock:
+    def __init__(self, start: datetime):
+        self._t = start
+
+    def now(self) -> datetime:
+        return self._t
+
+    def advance(self, second: float) -> None:
+        self._t = self._t + timedelta(seconds=second)
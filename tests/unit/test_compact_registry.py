@@ -0,0 +1,72 @@
+# Runs the Stage 1 suite unchanged against CompactCommandRegistry, plus store specifics.
+import random
+from collections import OrderedDict
+
+import pytest
+
+import test_command_registry_stage1 as stage1
+from test_command_registry_stage1 import *  # noqa: F401,F403 - re-collect the Stage 1 tests here
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import CommandStatus
+from hubcontroller.domain.compact_registry import CompactCommandRegistry
+
+
+@pytest.fixture(autouse=True)
+def compact_backend(monkeypatch):
+    monkeypatch.setattr(stage1, "CommandRegistry", CompactCommandRegistry)
+
+
+def test_freed_slot_is_reused_and_old_view_is_detached():
+    clock = ManualClock()
+    registry = CompactCommandRegistry(clock=clock, ttl_s=10.0)
+    old = registry.on_received(stage1.make_command("old")).record
+    registry.on_dispatched("old")
+
+    clock.advance(10.0)
+    assert registry.gc_ttl() == 1
+    new = registry.on_received(stage1.make_command("new")).record
+
+    assert new._slot == old._slot
+    assert old.command.command_id == "old"
+    assert old.status == CommandStatus.DISPATCHED
+    assert old.dispatched_ns == 0
+    assert new.status == CommandStatus.RECEIVED
+    assert new.dispatched_ns is None
+
+
+def test_views_write_through_to_columns():
+    clock = ManualClock()
+    registry = CompactCommandRegistry(clock=clock, accept_timeout_s=1.0)
+    registry.on_received(stage1.make_command("cmd1"))
+
+    clock.advance(1.0)
+    assert registry.expire_timeouts() == 1
+    record = registry.get_record("cmd1")
+    assert record.status == CommandStatus.TIMEOUT
+    assert record.timeout_ns == 1_000_000_000
+    assert record.is_terminal()
+
+
+def test_store_keeps_index_and_age_order_through_growth_and_deletes():
+    # random adds/deletes against an OrderedDict model: the table grows and backward-shifts
+    rng = random.Random(7)
+    registry = CompactCommandRegistry(clock=ManualClock())
+    store = registry._by_command_id
+    model = OrderedDict()
+    for i in range(3000):
+        if model and rng.random() < 0.4:
+            if rng.random() < 0.3:
+                command_id, _ = store.popitem(last=False)
+                assert command_id == next(iter(model))
+            else:
+                command_id = rng.choice(list(model))
+                del store[command_id]
+            del model[command_id]
+        else:
+            command_id = f"c{i}"
+            store.add(stage1.make_command(command_id), CommandStatus.RECEIVED, i)
+            model[command_id] = i
+    assert len(store) == len(model)
+    assert [(command_id, record.received_ns) for command_id, record in store.items()] == list(model.items())
+    assert all(store.get(command_id).command.command_id == command_id for command_id in model)
+    assert "c-missing" not in store and store.get("c-missing") is None
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+
+import pytest
+
+from hubcontroller.adapters.mqtt.control_ingest import ControlIngest, compile_control_validator, CONTROL_SCHEMA
+
+
+def frame(**kwargs) -> bytes:
+    body = {"command_id": "c1", "command_type": "start_cycle", "payload": {"mission_id": 3}}
+    body.update(kwargs)
+    return json.dumps(body).encode()
+
+
+@pytest.mark.parametrize("raw, reason", [
+    (b"{not json", "invalid_json"),
+    (b"[1, 2]", "not_an_object"),
+    (json.dumps({"command_type": "start_cycle"}).encode(), "missing_command_id"),
+    (frame(command_id=7), "invalid_command_id"),
+    (frame(command_id=""), "empty_command_id"),
+    (frame(command_id="x" * 41), "too_long_command_id"),
+    (frame(command_id="ą" * 21), "too_long_command_id"),  # 42 bytes in utf-8
+    (frame(command_type=None), "missing_command_type"),
+    (frame(payload=[1]), "invalid_payload"),
+])
+def test_malformed_frames_are_rejected(raw, reason):
+    delivered = []
+    rejects = []
+    ingest = ControlIngest(delivered.extend, on_reject=lambda raw, reason: rejects.append(reason))
+    assert ingest.on_message(raw) is False
+    ingest.drain()
+    assert delivered == []
+    assert rejects == [reason]
+    assert ingest.stats.rejected == {reason: 1}
+
+
+def test_command_type_is_interned_against_known_types():
+    ingest = ControlIngest(lambda batch: None)
+    a = ingest.parse(frame(command_type="".join(["start_", "cycle"])))
+    b = ingest.parse(frame(command_id="c2", command_type="".join(["start", "_cycle"])))
+    assert a.command_type == "start_cycle"
+    assert a.command_type is b.command_type
+    assert a.payload == {"mission_id": 3}
+    # unknown types pass through untouched; the processor rejects them via the registry
+    assert ingest.parse(frame(command_type="brew_coffee")).command_type == "brew_coffee"
+
+
+def test_valid_commands_are_delivered_in_micro_batches():
+    batches = []
+    ingest = ControlIngest(batches.append, batch_max=16, batch_window_s=0.05)
+    ingest.start()
+    for i in range(40):
+        assert ingest.on_message(frame(command_id=f"c{i}"))
+    deadline = time.monotonic() + 2
+    while sum(map(len, batches)) < 40 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    ingest.stop()
+    ids = [c.command_id for batch in batches for c in batch]
+    assert ids == [f"c{i}" for i in range(40)]
+    assert all(len(batch) <= 16 for batch in batches)
+    assert len(batches) < 40
+    assert ingest.stats.accepted == 40
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    delivered = []
+    rejects = []
+    ingest = ControlIngest(delivered.extend, max_queued=3, on_reject=lambda raw, reason: rejects.append(reason))
+    results = [ingest.on_message(frame(command_id=f"c{i}")) for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert ingest.stats.accepted == 3
+    assert ingest.stats.dropped == 2
+    assert rejects == ["queue_full", "queue_full"]
+    ingest.drain()
+    assert [c.command_id for c in delivered] == ["c0", "c1", "c2"]
+
+
+def test_stop_leaves_the_queue_to_a_consumer_that_is_still_running():
+    release = threading.Event()
+    entered = threading.Event()
+    delivered = []
+
+    def sink(batch):
+        entered.set()
+        release.wait(5)
+        delivered.extend(batch)
+
+    ingest = ControlIngest(sink, batch_max=1, batch_window_s=0)
+    ingest.start()
+    ingest.on_message(frame(command_id="c0"))
+    assert entered.wait(2)
+    ingest.on_message(frame(command_id="c1"))
+    ingest.stop(timeout_s=0.05)
+    assert delivered == []  # c1 was not handed to the sink from this thread meanwhile
+
+    release.set()
+    ingest.stop()
+    assert [c.command_id for c in delivered] == ["c0", "c1"]
+
+
+def test_validator_without_optional_field():
+    validate = compile_control_validator(CONTROL_SCHEMA)
+    assert validate({"command_id": "a", "command_type": "b"}) is None
@@ -0,0 +1,92 @@
+import csv
+import gzip
+
+import pytest
+
+from hubcontroller.adapters.audit.csv_audit import AuditSink
+from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.registry import CommandRegistry
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+def test_registry_transitions_and_snapshots_are_written(tmp_path):
+    sink = AuditSink(tmp_path / "control.csv", tmp_path / "ack.csv", tmp_path / "exec.csv")
+    registry = CommandRegistry(clock=ManualClock())
+    unsubscribe = registry.subscribe(sink.on_transition)
+
+    registry.on_received(Command(command_id="c1", command_type="start_cycle", payload={}))
+    registry.on_dispatched("c1")
+    registry.on_dispatched("c1")  # duplicate, not a transition
+    sink.on_ack(AckSnapshot(trigger=1, command="start_cycle", error=0, message="ok", token="c1", mission_id=3))
+    sink.on_exec(ExecSnapshot(trigger=1, command="start_cycle", error=0, message="done", token="c1", mission_id=3))
+    unsubscribe()
+    registry.on_rejected("c1")
+    assert sink.pending == 4
+
+    sink.start()
+    sink.stop()
+
+    control = read_csv(tmp_path / "control.csv")
+    assert control[0] == ["timestamp", "command_id", "command_type", "status"]
+    assert [row[1:] for row in control[1:]] == [["c1", "start_cycle", "received"], ["c1", "start_cycle", "dispatched"]]
+    assert control[1][0].startswith("1970-01-01T00:00:00")
+    assert read_csv(tmp_path / "ack.csv")[1][1:] == ["c1", "start_cycle", "1", "0", "ok", "3"]
+    assert read_csv(tmp_path / "exec.csv")[1][1:] == ["c1", "start_cycle", "1", "0", "done", "3"]
+    assert sink.stats.fsyncs >= 3
+
+
+def test_rotated_segments_are_gzipped(tmp_path):
+    sink = AuditSink(tmp_path / "control.csv", max_bytes=200, fsync_interval_s=0)
+    registry = CommandRegistry(clock=ManualClock())
+    registry.subscribe(sink.on_transition)
+    for i in range(30):
+        registry.on_received(Command(command_id=f"command-{i}", command_type="start_cycle", payload={}))
+        sink.flush()
+    sink.stop()
+
+    segments = sorted(tmp_path.glob("control.csv.*.gz"))
+    assert sink.stats.rotations == len(segments) == sink.stats.compressed > 0
+    ids = []
+    for segment in segments:
+        with gzip.open(segment, "rt", newline="", encoding="utf-8") as f:
+            ids += [row[1] for row in list(csv.reader(f))[1:]]
+    if (tmp_path / "control.csv").exists():
+        ids += [row[1] for row in read_csv(tmp_path / "control.csv")[1:]]
+    assert sorted(ids, key=lambda s: int(s.split("-")[1])) == [f"command-{i}" for i in range(30)]
+
+
+def test_queue_is_bounded_and_counts_dropped_rows(tmp_path):
+    sink = AuditSink(tmp_path / "control.csv", max_pending=2)
+    registry = CommandRegistry(clock=ManualClock())
+    registry.subscribe(sink.on_transition)
+    for i in range(3):
+        registry.on_received(Command(command_id=f"command-{i}", command_type="start_cycle", payload={}))
+    assert sink.pending == 2 and sink.stats.dropped == 1
+
+
+def test_rows_of_a_failed_write_are_kept_for_the_next_flush(tmp_path):
+    blocker = tmp_path / "audit"
+    blocker.write_text("not a directory")
+    sink = AuditSink(blocker / "control.csv", tmp_path / "ack.csv")
+    registry = CommandRegistry(clock=ManualClock())
+    registry.subscribe(sink.on_transition)
+    sink.on_ack(AckSnapshot(trigger=1, command="start_cycle", error=0, message="ok", token="c1", mission_id=3))
+    registry.on_received(Command(command_id="c1", command_type="start_cycle", payload={}))
+    registry.on_dispatched("c1")
+
+    with pytest.raises(OSError):
+        sink.flush()
+    assert sink.pending == 2  # the ack row was written, the control rows were not
+
+    blocker.unlink()
+    assert sink.flush(fsync=True) == 2
+    sink.stop()
+    assert [row[3] for row in read_csv(blocker / "control.csv")[1:]] == ["received", "dispatched"]
+    assert len(read_csv(tmp_path / "ack.csv")) == 2
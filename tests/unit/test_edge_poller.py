@@ -0,0 +1,104 @@
+from dataclasses import dataclass
+
+from hubcontroller.adapters.plc.pollers.edge_poller import AdaptivePollInterval, EdgeTriggeredPoller
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.registry import CommandRegistry
+
+FIELDS = (
+    FieldSpec(name="trigger", offset=0, dtype=PlcDataType.INT),
+    FieldSpec(name="token", offset=2, dtype=PlcDataType.STRING, max_len=10),
+)
+SPEC = FrameSpec(db_num=7, start=0, length=get_max_length(FIELDS), fields=FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    trigger: int
+    token: str
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.db = bytearray(SPEC.length)
+        self.db[2] = 10
+        self.reads: list[tuple[int, int]] = []
+
+    def read_db(self, db_number, start, length):
+        assert db_number == 7
+        self.reads.append((start, length))
+        return bytearray(self.db[start:start + length])
+
+    def raise_frame(self, token: str):
+        self.db[0:2] = (1).to_bytes(2, "big")
+        self.db[3] = len(token)
+        self.db[4:4 + len(token)] = token.encode()
+
+
+def test_idle_poll_reads_only_trigger_word():
+    adapter = FakeAdapter()
+    poller = EdgeTriggeredPoller(adapter, SPEC, compile_decoder(SPEC, Frame))
+    for _ in range(50):
+        assert poller.poll() is None
+    assert set(adapter.reads) == {(0, 2)}
+    assert poller.frame_reads == 0
+
+    adapter.raise_frame("tok1")
+    assert poller.poll() == Frame(trigger=1, token="tok1")
+    assert adapter.reads[-2:] == [(0, 2), (0, SPEC.length)]
+    assert poller.frame_reads == 1
+
+
+def test_registry_in_flight_count_tracks_transitions():
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock, accept_timeout_s=1, exec_timeout_s=1, ttl_s=100)
+    for cid in ("a", "b", "c", "d"):
+        registry.on_received(Command(command_id=cid, command_type="test", payload={}))
+    assert registry.in_flight_count == 0
+
+    for cid in ("a", "b", "c"):
+        registry.on_dispatched(cid)
+    registry.on_accepted("a")
+    registry.on_accepted("b")
+    assert registry.in_flight_count == 3
+    registry.on_executed("a")
+    registry.on_failed("b")
+    registry.on_rejected("d")
+    assert registry.in_flight_count == 1
+
+    clock.advance(10)
+    registry.expire_timeouts()
+    assert registry.in_flight_count == 0
+
+
+def test_registry_in_flight_count_drops_gc_records():
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock, ttl_s=5, max_entries=2)
+    for cid in ("a", "b", "c"):
+        registry.on_received(Command(command_id=cid, command_type="test", payload={}))
+        registry.on_dispatched(cid)
+    assert registry.in_flight_count == 2  # "a" evicted by max_entries
+    clock.advance(6)
+    registry.gc_ttl()
+    assert registry.in_flight_count == 0
+
+
+def test_adaptive_interval_follows_in_flight_and_lingers():
+    registry = CommandRegistry()
+    interval = AdaptivePollInterval(registry, fast_s=0.01, slow_s=0.5, linger_polls=2)
+    assert interval() == 0.5
+
+    registry.on_received(Command(command_id="a", command_type="test", payload={}))
+    registry.on_dispatched("a")
+    assert interval() == 0.01
+    registry.on_accepted("a")
+    registry.on_executed("a")
+    assert interval() == 0.5
+
+    interval.on_poll(hit=True)
+    assert interval() == 0.01
+    interval.on_poll(hit=False)
+    interval.on_poll(hit=False)
+    assert interval() == 0.5
@@ -0,0 +1,72 @@
+import struct
+from dataclasses import dataclass
+
+import pytest
+
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length
+
+FIELDS = (
+    FieldSpec(name="trigger", offset=10, dtype=PlcDataType.INT),
+    FieldSpec(name="name", offset=12, dtype=PlcDataType.STRING, max_len=8),
+    FieldSpec(name="ready", offset=22, dtype=PlcDataType.BOOL, bit_index=0),
+    FieldSpec(name="busy", offset=22, dtype=PlcDataType.BOOL, bit_index=3),
+    FieldSpec(name="code", offset=23, dtype=PlcDataType.BYTE),
+    FieldSpec(name="speed", offset=24, dtype=PlcDataType.FLOAT),
+    FieldSpec(name="position", offset=28, dtype=PlcDataType.DOUBLE),
+)
+SPEC = FrameSpec(db_num=1, start=10, length=get_max_length(FIELDS, start=10), fields=FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
+class Sample:
+    position: float
+    name: str
+    trigger: int
+    busy: bool
+    ready: bool
+    speed: float
+    code: int
+
+
+def make_frame(name: bytes = b"hub", declared_max: int = 8) -> bytearray:
+    data = bytearray(SPEC.length)
+    struct.pack_into(">h", data, 0, -2)
+    data[2] = declared_max
+    data[3] = len(name)
+    data[4:4 + len(name)] = name
+    data[12] = 0b0000_1000
+    data[13] = 200
+    struct.pack_into(">f", data, 14, 1.5)
+    struct.pack_into(">d", data, 18, -12.25)
+    return data
+
+
+def test_decodes_all_types_in_snapshot_field_order():
+    decoder = compile_decoder(SPEC, Sample)
+    snapshot = decoder.decode(make_frame())
+
+    assert snapshot == Sample(position=-12.25, name="hub", trigger=-2, busy=True, ready=False, speed=1.5, code=200)
+
+def test_decodes_from_memoryview_slice():
+    decoder = compile_decoder(SPEC, Sample)
+    buffer = bytearray(4) + make_frame(name=b"abcdefghij")
+    snapshot = decoder.decode(memoryview(buffer)[4:])
+
+    # current length is clamped to max_len
+    assert snapshot.name == "abcdefgh"
+
+def test_rejects_short_frame_and_bad_string_header():
+    decoder = compile_decoder(SPEC, Sample)
+    with pytest.raises(ValueError):
+        decoder.decode(bytes(SPEC.length - 1))
+    with pytest.raises(ValueError):
+        decoder.decode(make_frame(declared_max=4))
+
+def test_snapshot_must_match_spec_fields():
+    @dataclass
+    class Missing:
+        trigger: int
+
+    with pytest.raises(ValueError):
+        compile_decoder(SPEC, Missing)
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+
+import pytest
+
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.encoders.frame_encoder import compile_encoder
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length
+
+FIELDS = (
+    FieldSpec(name="trigger", offset=0, dtype=PlcDataType.INT),
+    FieldSpec(name="command", offset=2, dtype=PlcDataType.STRING, max_len=10),
+    FieldSpec(name="ready", offset=14, dtype=PlcDataType.BOOL, bit_index=1),
+    FieldSpec(name="busy", offset=14, dtype=PlcDataType.BOOL, bit_index=6),
+    FieldSpec(name="code", offset=15, dtype=PlcDataType.BYTE),
+    FieldSpec(name="speed", offset=16, dtype=PlcDataType.FLOAT),
+    FieldSpec(name="position", offset=20, dtype=PlcDataType.DOUBLE),
+)
+SPEC = FrameSpec(db_num=1, start=0, length=get_max_length(FIELDS), fields=FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
+class Frame:
+    trigger: int
+    command: str
+    ready: bool
+    busy: bool
+    code: int
+    speed: float
+    position: float
+
+
+def test_encode_decode_round_trip():
+    encoder = compile_encoder(SPEC)
+    values = dict(trigger=1, command="start", ready=True, busy=False, code=7, speed=2.5, position=-1.0)
+    frame = encoder.encode(values)
+
+    assert compile_decoder(SPEC, Frame).decode(frame) == Frame(**values)
+    assert frame[2] == 10 and frame[3] == 5
+
+def test_first_write_is_full_frame_then_only_changes():
+    encoder = compile_encoder(SPEC)
+    encoder.encode(dict(trigger=1, command="start"))
+    assert encoder.dirty_range() == (0, SPEC.length)
+    encoder.mark_written()
+
+    encoder.encode(dict(trigger=1, command="start"))
+    assert encoder.dirty_range() is None
+
+    encoder.encode(dict(trigger=1, command="start", code=3))
+    assert encoder.dirty_range() == (15, 16)
+    encoder.mark_written()
+
+    # shorter string zero-fills its tail
+    frame = encoder.encode(dict(trigger=1, command="go", code=3))
+    assert encoder.dirty_range() == (2, 14)
+    assert bytes(frame[4:14]) == b"go" + bytes(8)
+
+def test_always_dirty_field_is_part_of_every_write():
+    encoder = compile_encoder(SPEC, always_dirty=("trigger",))
+    encoder.encode(dict(trigger=1, code=1))
+    encoder.mark_written()
+
+    encoder.encode(dict(trigger=1, code=2))
+    assert encoder.dirty_range() == (0, 16)
+
+def test_invalid_values_raise_value_error():
+    encoder = compile_encoder(SPEC)
+    with pytest.raises(ValueError):
+        encoder.encode(dict(command="x" * 11))
+    with pytest.raises(ValueError):
+        encoder.encode(dict(trigger=40_000))
+    with pytest.raises(ValueError):
+        compile_encoder(SPEC, always_dirty=("missing",))
@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import (ALLOWED, KNOWN_COMMAND_TYPES, Guard, GuardDecision, GuardDecisionReason,
+                                        load_guard_policy, policy_from_config)
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+
+
+def legacy_check(command_type: str, mode: HubMode | None) -> GuardDecision:
+    # the if/elif chain Guard.check used before the table
+    rules = [
+        (HubMode.SAFETY_STOP, {"safety_ack", "machine_off", "safety_stop"}, GuardDecisionReason.SAFETY_STOP_ACTIVE),
+        (HubMode.ERROR, {"fault_ack", "safety_stop", "machine_off"}, GuardDecisionReason.HUB_ERROR),
+        (HubMode.HOMING_ACTIVE, {"stop_homing", "machine_off", "safety_stop"}, GuardDecisionReason.HUB_BUSY),
+        (HubMode.HOMING_READY, {"start_homing", "machine_off", "safety_stop"}, GuardDecisionReason.ACTION_NEEDED),
+        (HubMode.CYCLE_READY, {"start_cycle", "machine_off", "safety_stop"}, GuardDecisionReason.ACTION_NEEDED),
+    ]
+    if mode is None or (mode == HubMode.UNKNOWN and command_type not in {"machine_on", "machine_off", "fault_ack", "safety_ack", "safety_stop"}):
+        return GuardDecision(allowed=False, reason=GuardDecisionReason.HUB_STATE_UNKNOWN.value)
+    for rule_mode, allowed, reason in rules:
+        if mode == rule_mode and command_type not in allowed:
+            return GuardDecision(allowed=False, reason=reason.value)
+    if mode == HubMode.CYCLE_ACTIVE and command_type not in {
+            "stop_cycle", "machine_off", "safety_stop", "prepare_to_start", "uav_started", "perform_diagnostic",
+            "diagnostic_ok", "diagnostic_nok", "uav_landed", "hide_in_hub", "request_to_land", "load_battery",
+            "unload_battery", "load_uav_to_docks", "unload_uav_from_docks", "start_mission", "abort_mission"}:
+        return GuardDecision(allowed=False, reason=GuardDecisionReason.ACTION_NEEDED.value)
+    return GuardDecision(allowed=True, reason=None)
+
+
+def snapshot(mode: HubMode) -> HubStateSnapshot:
+    return HubStateSnapshot(mode=mode, execution_state=ExecutionState.IDLE)
+
+
+def test_table_matches_legacy_chain_for_every_mode_and_type():
+    guard = Guard()
+    for command_type in sorted(KNOWN_COMMAND_TYPES) + ["brew_coffee", ""]:
+        command = Command(command_id="c", command_type=command_type, payload={})
+        assert guard.check(command, None) == legacy_check(command_type, None)
+        for mode in HubMode:
+            assert guard.check(command, snapshot(mode)) == legacy_check(command_type, mode), (mode, command_type)
+
+
+def test_decisions_are_shared_singletons():
+    guard = Guard()
+    a = guard.check(Command("a", "start_cycle", {}), snapshot(HubMode.CYCLE_READY))
+    b = guard.check(Command("b", "start_cycle", {}), snapshot(HubMode.CYCLE_READY))
+    c = guard.check(Command("c", "stop_cycle", {}), snapshot(HubMode.CYCLE_READY))
+    d = guard.check(Command("d", "brew_coffee", {}), snapshot(HubMode.HOMING_READY))
+    assert a is b is ALLOWED
+    assert c is d and c.reason == "action_needed"
+
+
+def test_policy_loaded_from_config(tmp_path):
+    path = tmp_path / "guard.json"
+    path.write_text(json.dumps({
+        "cycle_ready": {"allowed": ["start_cycle", "start_mission"], "reason": "action_needed"},
+        "error": {"allowed": ["fault_ack"], "reason": "hub_error"},
+    }))
+    guard = Guard(load_guard_policy(path))
+    assert guard.check(Command("a", "start_mission", {}), snapshot(HubMode.CYCLE_READY)).allowed
+    assert guard.check(Command("b", "machine_off", {}), snapshot(HubMode.ERROR)).reason == "hub_error"
+    # modes without a rule deny everything
+    for mode in (HubMode.SAFETY_STOP, HubMode.UNKNOWN, HubMode.CYCLE_ACTIVE):
+        for command_type in ("safety_ack", "machine_off", "start_mission"):
+            assert not guard.check(Command("c", command_type, {}), snapshot(mode)).allowed
+    assert guard.check(Command("d", "safety_ack", {}), snapshot(HubMode.SAFETY_STOP)).reason == "safety_stop_active"
+
+
+@pytest.mark.parametrize("config", [
+    {"parking": {"allowed": []}},
+    {"error": {"allowed": "fault_ack"}},
+    {"error": {"allowed": [], "reason": "because"}},
+])
+def test_invalid_policy_config_is_rejected(config):
+    with pytest.raises(ValueError):
+        policy_from_config(config)
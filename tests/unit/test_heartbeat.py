@@ -0,0 +1,76 @@
+import gc
+import sys
+import time
+
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcLinkStats
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.registry import CommandRegistry
+from hubcontroller.health.heartbeat import HeartbeatEngine
+
+
+class FakeWriter:
+    def __init__(self):
+        self.stats = PlcLinkStats()
+        self.writes = []
+        self.fail = False
+
+    def write_db(self, db_number, start, data):
+        if self.fail:
+            raise ConnectionError("write connection down")
+        self.writes.append((db_number, start, data))
+
+
+class RecordingSink:
+    def __init__(self):
+        self.payloads = []
+
+    def publish_heartbeat(self, topic, payload):
+        self.payloads.append(payload)
+        return True
+
+
+def make(plc, sink, **kwargs):
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    return HeartbeatEngine(plc, sink, "hub/heartbeat", state, CommandRegistry(), livebit_db=3, livebit_offset=12, **kwargs)
+
+
+def test_beat_toggles_livebit_with_one_byte_writes_and_reports_link_health():
+    plc, sink = FakeWriter(), RecordingSink()
+    engine = make(plc, sink)
+    engine.beat()
+    engine.beat()
+    assert plc.writes == [(3, 12, b"\x01"), (3, 12, b"\x00")]
+    plc.fail = True
+    engine.beat()
+    engine.beat()
+    # plc_ok reports the write of the beat it is published with
+    assert [p["plc_ok"] for p in sink.payloads] == [True, True, False, False]
+    assert sink.payloads[-1]["seq"] == 4 and sink.payloads[-1]["mode"] == "cycle_ready"
+    assert sink.payloads[-1]["in_flight"] == 0
+    assert engine.stats.livebit_errors == 2
+
+
+def test_engine_thread_beats_on_its_own_timer():
+    plc, sink = FakeWriter(), RecordingSink()
+    engine = make(plc, sink, period_s=0.01)
+    engine.start()
+    time.sleep(0.2)
+    engine.stop()
+    assert 10 <= engine.stats.beats <= 21
+    assert engine.stats.lateness.count == engine.stats.beats
+
+
+def test_engine_runs_full_collections_between_beats_while_started():
+    plc, sink = FakeWriter(), RecordingSink()
+    threshold, switch_interval = gc.get_threshold(), sys.getswitchinterval()
+    engine = make(plc, sink, period_s=0.01, switch_interval_s=0.001, gc_interval_s=0.05)
+    engine.start()
+    try:
+        assert gc.get_threshold()[:2] == threshold[:2] and gc.get_threshold()[2] > 10**9
+        assert sys.getswitchinterval() == 0.001
+        time.sleep(0.2)
+    finally:
+        engine.stop()
+    assert gc.get_threshold() == threshold and sys.getswitchinterval() == switch_interval
+    assert 2 <= engine.stats.full_collections <= 5
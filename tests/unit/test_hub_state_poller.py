@@ -0,0 +1,77 @@
+import struct
+
+import pytest
+
+from hubcontroller.adapters.plc.pollers.hub_state_poller import UNKNOWN_HUB_STATE, HubStatePoller
+from hubcontroller.adapters.plc.protocol.decoders.hub_status_decoder import HubStatusDecoder
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FieldSpec, FrameSpec, PlcDataType, get_max_length
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.guard import Guard, GuardDecisionReason
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+
+FIELDS = (
+    FieldSpec(name="mode", offset=0, dtype=PlcDataType.INT),
+    FieldSpec(name="execution_state", offset=2, dtype=PlcDataType.INT),
+)
+SPEC = FrameSpec(db_num=3, start=0, length=get_max_length(FIELDS), fields=FIELDS)
+
+
+class FakeAdapter:
+    def __init__(self):
+        self.db = bytearray(SPEC.length)
+        self.fail = False
+
+    def set(self, mode: int, execution_state: int) -> None:
+        struct.pack_into(">hh", self.db, 0, mode, execution_state)
+
+    def read_db(self, db_number, start, length):
+        if self.fail:
+            raise ConnectionError("link down")
+        return bytearray(self.db[start:start + length])
+
+
+def make_poller():
+    adapter = FakeAdapter()
+    provider = HubStateProvider(UNKNOWN_HUB_STATE)
+    seen = []
+    provider.subscribe(seen.append)
+    return adapter, provider, seen, HubStatePoller(adapter, provider, SPEC, HubStatusDecoder(SPEC))
+
+
+def test_decodes_and_notifies_only_on_change():
+    adapter, provider, seen, poller = make_poller()
+    adapter.set(5, 0)
+    ready = HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE)
+    assert poller.poll() == ready
+    for _ in range(100):
+        assert poller.poll() is None
+    adapter.set(6, 1)
+    poller.poll()
+    assert poller.reads == 102 and poller.decodes == 2
+    assert seen == [ready, HubStateSnapshot(mode=HubMode.CYCLE_ACTIVE, execution_state=ExecutionState.EXECUTING)]
+    assert provider.get_snapshot() is seen[-1]
+
+
+def test_unknown_codes_and_read_errors_close_the_guard():
+    adapter, provider, seen, poller = make_poller()
+    guard = Guard()
+    start_cycle = Command(command_id="c1", command_type="start_cycle", payload={})
+    adapter.set(99, 42)
+    poller.poll()
+    assert provider.get_snapshot() == HubStateSnapshot(mode=HubMode.UNKNOWN, execution_state=ExecutionState.FAILED)
+    decision = guard.check(start_cycle, provider.get_snapshot())
+    assert not decision.allowed and decision.reason == GuardDecisionReason.HUB_STATE_UNKNOWN.value
+
+    adapter.set(5, 0)
+    poller.poll()
+    adapter.fail = True
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            poller.poll()
+    assert provider.get_snapshot() is UNKNOWN_HUB_STATE
+    assert not guard.check(start_cycle, provider.get_snapshot()).allowed
+    adapter.fail = False
+    poller.poll()  # same bytes as before the outage, published again
+    assert provider.get_snapshot().mode == HubMode.CYCLE_READY
+    assert guard.check(start_cycle, provider.get_snapshot()).allowed
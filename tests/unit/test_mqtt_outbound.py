@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+
+from hubcontroller.adapters.mqtt.client import MqttOutbound
+from hubcontroller.adapters.mqtt.in_memory_broker import InMemoryBroker
+
+
+def decoded(broker, topic):
+    return [json.loads(m.payload) for m in broker.messages_on(topic)]
+
+
+def wait_for(predicate, timeout_s=2.0):
+    deadline = time.monotonic() + timeout_s
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_events_are_coalesced_and_keep_per_command_order():
+    broker = InMemoryBroker()
+    outbound = MqttOutbound(broker, batch_window_s=0.05, batch_max=100)
+    for i in range(10):
+        outbound.publish_ack("hub/ack", f"c{i % 3}", {"token": f"c{i % 3}", "seq": i})
+    outbound.publish_exec("hub/exec", "c0", {"token": "c0", "seq": 10})
+    outbound.publish_ack("hub/ack", "c1", {"token": "c1", "seq": 11})
+    outbound.start()
+    wait_for(lambda: outbound.stats.published_events == 12)
+    outbound.stop()
+
+    # one message per run of same-topic events: ack x10, exec, ack
+    assert [m.topic for m in broker.messages] == ["hub/ack", "hub/exec", "hub/ack"]
+    events = [e for m in broker.messages for e in json.loads(m.payload)]
+    assert [e["seq"] for e in events] == list(range(12))
+    assert outbound.publish_latency.count == 12
+    assert outbound.queue_depth.count == 1
+
+
+def test_full_queue_merges_and_drops_heartbeats_without_blocking():
+    broker = InMemoryBroker()
+    outbound = MqttOutbound(broker, max_queue=3)
+    assert outbound.publish_heartbeat("hub/hb", {"n": 1})
+    assert outbound.publish_heartbeat("hub/hb", {"n": 2})  # merged into the queued one
+    assert outbound.publish_ack("hub/ack", "a", {"token": "a"})
+    assert outbound.publish_ack("hub/ack", "b", {"token": "b"})
+    assert outbound.depth == 3
+    # full: the queued heartbeat makes room for the ack
+    assert outbound.publish_ack("hub/ack", "c", {"token": "c"})
+    assert outbound.publish_heartbeat("hub/hb", {"n": 3}) is False
+    assert outbound.publish_ack("hub/ack", "d", {"token": "d"}) is False
+    assert outbound.stats.heartbeats_merged == 1
+    assert outbound.stats.heartbeats_dropped == 2
+    assert outbound.stats.events_dropped == 1
+
+    outbound.start()
+    outbound.stop()
+    assert decoded(broker, "hub/ack") == [[{"token": "a"}, {"token": "b"}, {"token": "c"}]]
+    assert decoded(broker, "hub/hb") == []
+
+
+def test_heartbeat_merge_keeps_latest_state():
+    broker = InMemoryBroker()
+    outbound = MqttOutbound(broker)
+    for n in range(5):
+        outbound.publish_heartbeat("hub/hb", {"n": n})
+    outbound.start()
+    outbound.stop()
+    assert decoded(broker, "hub/hb") == [[{"n": 4}]]
+
+
+def test_offer_from_many_threads_while_draining():
+    broker = InMemoryBroker()
+    outbound = MqttOutbound(broker, max_queue=10_000, batch_max=20, batch_window_s=0.001)
+    outbound.start()
+
+    def produce(cid):
+        for seq in range(200):
+            outbound.publish_ack("hub/ack", cid, {"token": cid, "seq": seq})
+
+    threads = [threading.Thread(target=produce, args=(f"c{t}",)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wait_for(lambda: outbound.stats.published_events == 800)
+    outbound.stop()
+
+    per_command = {}
+    for batch in decoded(broker, "hub/ack"):
+        assert len(batch) <= 20
+        for event in batch:
+            per_command.setdefault(event["token"], []).append(event["seq"])
+    assert all(seqs == list(range(200)) for seqs in per_command.values())
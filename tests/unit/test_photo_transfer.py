@@ -0,0 +1,146 @@
+import struct
+import zlib
+
+import pytest
+
+from hubcontroller.adapters.plc.pollers.photo_transfer import PHOTO_CHUNK, PhotoTransfer
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec, get_max_length
+from hubcontroller.adapters.plc.protocol.specs.photo_specs import PHOTO_HEADER_FIELDS
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcLinkStats
+
+DB = 7
+DATA_OFFSET = 8
+HEADER_SPEC = FrameSpec(db_num=DB, start=0, length=get_max_length(PHOTO_HEADER_FIELDS), fields=PHOTO_HEADER_FIELDS)
+
+
+class FakePhotoPlc:
+    def __init__(self, pdu=240):
+        self.db = bytearray(4096)
+        self.pdu = pdu
+        self.stats = PlcLinkStats()
+        self.fail_next = False
+        self.chunk_reads = 0
+
+    def put_photo(self, photo_id, data):
+        self.db[DATA_OFFSET:DATA_OFFSET + len(data)] = data
+        struct.pack_into(">ii", self.db, 0, photo_id, len(data))
+
+    def read_db(self, db_number, start, length):
+        assert db_number == DB
+        return bytes(self.db[start:start + length])
+
+    def read_multi_db(self, items):
+        if self.fail_next:
+            self.fail_next = False
+            raise RuntimeError("link down")
+        for db_number, start, size, buffer, offset in items:
+            assert size + 18 <= self.pdu
+            buffer[offset:offset + size] = self.db[start:start + size]
+            self.chunk_reads += 1
+
+    def pdu_length(self):
+        return self.pdu
+
+
+class RecordingPublisher:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, topic, payload, qos=0, retain=False):
+        self.messages.append(bytes(payload))
+
+
+def reassemble(messages):
+    data = bytearray()
+    crc = None
+    for seq, message in enumerate(messages):
+        photo_id, size, offset, msg_seq, count, msg_crc = PHOTO_CHUNK.unpack_from(message)
+        assert msg_seq == seq and offset == len(data)
+        data += message[PHOTO_CHUNK.size:]
+        if seq == count - 1:
+            crc = msg_crc
+    assert zlib.crc32(data) == crc
+    return photo_id, bytes(data)
+
+
+def make(plc, publisher, **kwargs):
+    return PhotoTransfer(plc, publisher, "hub/photo", HEADER_SPEC, DATA_OFFSET, max_bytes=4096 - DATA_OFFSET, **kwargs)
+
+
+def test_photo_streamed_in_pdu_sized_chunks_one_per_poll():
+    plc, publisher = FakePhotoPlc(), RecordingPublisher()
+    photo = bytes(range(256)) * 4
+    plc.put_photo(1, photo)
+    transfer = make(plc, publisher)
+
+    polls = 1
+    while not transfer.poll():
+        polls += 1
+    assert polls == len(publisher.messages) == -(-len(photo) // 222)  # one chunk per poll
+    assert reassemble(publisher.messages) == (1, photo)
+    assert not transfer.poll()  # same photo_id is not sent twice
+    assert transfer.stats.photos == 1 and transfer.stats.bytes == len(photo)
+
+
+def test_transfer_resumes_after_read_error_and_restarts_on_new_photo():
+    plc, publisher = FakePhotoPlc(), RecordingPublisher()
+    photo = b"x" * 1000
+    plc.put_photo(5, photo)
+    transfer = make(plc, publisher)
+    transfer.poll()
+    transfer.poll()
+    plc.fail_next = True
+    with pytest.raises(RuntimeError):
+        transfer.poll()
+    plc.stats.reconnects += 1
+    while not transfer.poll():
+        pass
+    assert transfer.stats.resumed == 1
+    assert reassemble(publisher.messages) == (5, photo)
+
+    publisher.messages.clear()
+    plc.put_photo(6, b"a" * 500)
+    transfer.poll()
+    plc.put_photo(7, b"b" * 300)  # replaced mid-transfer
+    while not transfer.poll():
+        pass
+    assert transfer.stats.aborted == 1
+    assert reassemble(publisher.messages[-2:]) == (7, b"b" * 300)
+
+
+def test_oversized_photo_is_skipped():
+    plc, publisher = FakePhotoPlc(), RecordingPublisher()
+    struct.pack_into(">ii", plc.db, 0, 9, 1_000_000)
+    transfer = make(plc, publisher)
+    assert not transfer.poll() and not transfer.poll()
+    assert transfer.stats.rejected == 1 and publisher.messages == []
+
+
+def test_negative_photo_id_is_skipped_not_packed():
+    plc, publisher = FakePhotoPlc(), RecordingPublisher()
+    plc.put_photo(-5, b"x" * 100)
+    transfer = make(plc, publisher)
+    assert not transfer.poll() and not transfer.poll()
+    assert not transfer.active
+    assert transfer.stats.rejected == 1 and publisher.messages == []
+
+    plc.put_photo(6, b"y" * 100)
+    assert transfer.poll()
+    assert reassemble(publisher.messages) == (6, b"y" * 100)
+
+
+def test_replacement_mid_photo_is_caught_before_the_batch_is_published():
+    plc, publisher = FakePhotoPlc(), RecordingPublisher()
+    plc.put_photo(6, b"a" * 1000)
+    transfer = make(plc, publisher, chunks_per_poll=2)
+    transfer.poll()
+    plc.put_photo(7, b"b" * 1000)  # same size, so only the header check can tell
+    assert not transfer.poll()
+    assert transfer.stats.aborted == 1
+    assert [PHOTO_CHUNK.unpack_from(m)[0] for m in publisher.messages] == [6, 6]
+    assert all(set(m[PHOTO_CHUNK.size:]) == {ord("a")} for m in publisher.messages)
+
+    publisher.messages.clear()
+    while not transfer.poll():
+        pass
+    assert reassemble(publisher.messages) == (7, b"b" * 1000)
@@ -0,0 +1,199 @@
+import pytest
+
+from hubcontroller.adapters.plc.transport.plc_adapter import CPU_RUN, PlcAdapter, PlcBackingOffError, PlcNotRunningError
+
+
+class FakeS7Server:
+    # shared state of the "PLC": DB contents, CPU state, link up/down
+    def __init__(self):
+        self.dbs: dict[int, bytearray] = {1: bytearray(range(100))}
+        self.cpu_state = CPU_RUN
+        self.reachable = True
+        self.fail_next_io = False
+        self.refuse = False
+
+
+class FakeS7Client:
+    def __init__(self, server: FakeS7Server):
+        self._server = server
+        self._connected = False
+        self.cpu_state_calls = 0
+
+    def connect(self, address, rack, slot, tcp_port):
+        if self._server.refuse:
+            raise ConnectionRefusedError(111, "Connection refused")
+        if not self._server.reachable:
+            raise RuntimeError("TCP : Unreachable peer")
+        self._connected = True
+
+    def get_connected(self) -> bool:
+        return self._connected and self._server.reachable
+
+    def get_cpu_state(self) -> str:
+        self.cpu_state_calls += 1
+        if not self.get_connected():
+            raise RuntimeError("ISO : An error occurred during send TCP : Connection reset by peer")
+        return self._server.cpu_state
+
+    def _io(self):
+        if self._server.fail_next_io:
+            self._server.fail_next_io = False
+            raise RuntimeError("CLI : function refused by CPU")
+        if not self.get_connected():
+            self._connected = False
+            raise RuntimeError("ISO : An error occurred during recv TCP : Connection reset by peer")
+
+    def db_read(self, db_number, start, length):
+        self._io()
+        return bytearray(self._server.dbs[db_number][start:start + length])
+
+    def db_write(self, db_number, start, data):
+        self._io()
+        self._server.dbs[db_number][start:start + len(data)] = data
+
+    def disconnect(self):
+        self._connected = False
+
+    def destroy(self):
+        pass
+
+
+class Clock:
+    def __init__(self):
+        self.t = 1000.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.fixture
+def server():
+    return FakeS7Server()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_adapter(server, clock, **kwargs):
+    clients = []
+
+    def factory():
+        client = FakeS7Client(server)
+        clients.append(client)
+        return client
+
+    adapter = PlcAdapter("127.0.0.1", 0, 1, 102, client_factory=factory, clock=clock, rng=lambda: 0.5, **kwargs)
+    return adapter, clients
+
+
+def test_io_path_does_not_probe_cpu_state_between_intervals(server, clock):
+    adapter, clients = make_adapter(server, clock, probe_interval_s=5.0)
+    for _ in range(100):
+        assert adapter.read_db(1, 0, 4) == bytearray([0, 1, 2, 3])
+    assert adapter.stats.probes == 0
+    assert adapter.stats.reconnects == 1
+
+    clock.t += 5.0
+    adapter.read_db(1, 0, 4)
+    assert adapter.stats.probes == 1
+    assert len(clients) == 1
+
+
+def test_cpu_out_of_run_fails_io_and_backs_off_without_reconnecting(server, clock):
+    adapter, clients = make_adapter(server, clock, probe_interval_s=5.0, backoff_initial_s=1.0, backoff_max_s=4.0)
+    adapter.write_db(1, 0, b"\x07")
+    server.cpu_state = "S7CpuStatusStop"
+    clock.t += 5.0
+    with pytest.raises(PlcNotRunningError, match="S7CpuStatusStop"):
+        adapter.write_db(1, 0, b"\x08")
+    assert adapter.stats.probes == 1
+    # fails fast until the backoff (rng=0.5 -> 0.75s) is over, then probes again with a longer one
+    clock.t += 0.5
+    with pytest.raises(PlcNotRunningError):
+        adapter.write_db(1, 0, b"\x08")
+    assert adapter.stats.probes == 1
+    clock.t += 0.25
+    with pytest.raises(PlcNotRunningError):
+        adapter.write_db(1, 0, b"\x08")
+    assert adapter.stats.probes == 2
+    assert server.dbs[1][0] == 7
+    assert adapter.stats.reconnects == 1
+    assert len(clients) == 1
+
+    server.cpu_state = CPU_RUN
+    clock.t += 1.5
+    adapter.write_db(1, 0, b"\x08")
+    assert server.dbs[1][0] == 8
+    assert adapter.stats.reconnects == 1
+    assert adapter.stats.run_resumed == 1  # tells PlcClient the control DB may have been reset
+
+
+def test_io_error_probes_and_keeps_healthy_connection(server, clock):
+    adapter, clients = make_adapter(server, clock)
+    adapter.read_db(1, 0, 1)
+    server.fail_next_io = True
+    with pytest.raises(RuntimeError):
+        adapter.read_db(1, 0, 1)
+    assert adapter.stats.io_errors == 1
+    assert adapter.stats.probes == 1
+    assert adapter.is_connected_read()
+    adapter.read_db(1, 0, 1)
+    assert len(clients) == 1
+
+
+def test_reconnect_backs_off_exponentially(server, clock):
+    adapter, clients = make_adapter(server, clock, backoff_initial_s=1.0, backoff_max_s=4.0)
+    adapter.read_db(1, 0, 1)
+    server.reachable = False
+    # the socket is seen as down before the I/O, so this is a failed reconnect, not an I/O error
+    with pytest.raises(RuntimeError):
+        adapter.read_db(1, 0, 1)
+    assert adapter.stats.io_errors == 0
+    assert adapter.stats.connect_failures == 1
+    assert adapter.client_read is None
+
+    attempts = [clock.t]
+    for _ in range(60):
+        clock.t += 0.25
+        before = len(clients)
+        with pytest.raises((RuntimeError, ConnectionError)):
+            adapter.read_db(1, 0, 1)
+        if len(clients) > before:
+            attempts.append(clock.t)
+    gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+    # rng=0.5 -> 0.75 * backoff: 1s, 2s, 4s, capped at 4s
+    assert gaps[:4] == [0.75, 1.5, 3.0, 3.0]
+
+    server.reachable = True
+    clock.t += 4.0
+    assert adapter.read_db(1, 0, 1) == bytearray([0])
+    assert adapter.stats.reconnects == 2
+
+
+def test_refused_connect_counts_as_failure_and_backs_off(server, clock):
+    adapter, clients = make_adapter(server, clock, backoff_initial_s=1.0, backoff_max_s=4.0)
+    server.refuse = True
+    # an OSError from connect() is a ConnectionError too; it must not skip the cleanup
+    with pytest.raises(ConnectionRefusedError):
+        adapter.read_db(1, 0, 1)
+    assert adapter.stats.connect_failures == 1
+    assert adapter.client_read is None
+    with pytest.raises(PlcBackingOffError):
+        adapter.read_db(1, 0, 1)
+    assert len(clients) == 1
+    assert adapter.stats.connect_failures == 1
+
+    server.refuse = False
+    clock.t += 0.75
+    assert adapter.read_db(1, 0, 1) == bytearray([0])
+    assert adapter.stats.reconnects == 1
+
+
+def test_int_cpu_state_is_mapped(server, clock, monkeypatch):
+    adapter, clients = make_adapter(server, clock)
+    adapter.connect_read()
+    monkeypatch.setattr(clients[0], "get_cpu_state", lambda: 0)
+    snap7 = pytest.importorskip("snap7")
+    assert adapter.get_plc_state(adapter.client_read) == snap7.types.cpu_statuses.get(0)
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from hubcontroller.adapters.plc.client import PlcClient
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.adapters.plc.protocol.specs.control_specs import CONTROL_FIELDS
+from hubcontroller.adapters.plc.protocol.specs.frame_spec import FrameSpec, get_max_length
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcLinkStats
+from hubcontroller.domain.commands import Command
+
+SPEC = FrameSpec(db_num=2, start=0, length=get_max_length(CONTROL_FIELDS), fields=CONTROL_FIELDS)
+
+
+class LazyPlc:
+    # takes the control frame (clears trigger) only after `scans` trigger reads
+    def __init__(self, scans: int):
+        self.db = bytearray(SPEC.length)
+        self.scans = scans
+        self._reads_left = 0
+        self.trigger_reads = 0
+        self.taken: list[str] = []
+        self.overwritten = 0
+        self.writes: list[tuple[int, int]] = []
+        self.stats = PlcLinkStats()
+
+    def ensure_connected_write(self):
+        pass
+
+    def read_db(self, db_number, start, length):
+        raise AssertionError("the slot check goes over the write connection")
+
+    def read_db_write(self, db_number, start, length):
+        self.trigger_reads += 1
+        if any(self.db[0:2]):
+            self._reads_left -= 1
+            if self._reads_left <= 0:
+                n = self.db[105]
+                self.taken.append(bytes(self.db[106:106 + n]).decode())
+                self.db[0:2] = b"\x00\x00"
+        return bytearray(self.db[start:start + length])
+
+    def write_db(self, db_number, start, data):
+        if start == 0 and any(self.db[0:2]):
+            self.overwritten += 1
+        self.db[start:start + len(data)] = data
+        self.writes.append((start, len(data)))
+        self._reads_left = self.scans
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    def sleep(s):
+        raise AssertionError("plc_write_command must not sleep")
+    monkeypatch.setattr(time, "sleep", sleep)
+
+
+def commands(n):
+    return [Command(command_id=f"cmd-{i}", command_type="start_cycle", payload={}) for i in range(n)]
+
+
+def test_busy_slot_is_a_timeout_after_one_check():
+    plc = LazyPlc(scans=3)
+    client = PlcClient(plc, SPEC)
+    cmd = commands(2)
+    assert client.plc_write_command(cmd[0]) == PlcSendStatus.OK
+    for _ in range(2):
+        reads = plc.trigger_reads
+        assert client.plc_write_command(cmd[1]) == PlcSendStatus.TIMEOUT
+        assert plc.trigger_reads == reads + 1
+    assert client.plc_write_command(cmd[1]) == PlcSendStatus.OK  # the PLC took cmd-0 on this check
+    assert plc.taken == ["cmd-0"] and plc.overwritten == 0
+
+
+def test_busy_slot_fails_the_rest_of_the_batch_fast():
+    plc = LazyPlc(scans=10**9)
+    client = PlcClient(plc, SPEC)
+    statuses = client.plc_write_commands(commands(3))
+    assert statuses == [PlcSendStatus.OK, PlcSendStatus.TIMEOUT, PlcSendStatus.TIMEOUT]
+    assert plc.trigger_reads == 2 and plc.overwritten == 0
+
+
+def test_full_frame_is_written_again_after_the_plc_lost_its_copy():
+    plc = LazyPlc(scans=1)
+    client = PlcClient(plc, SPEC)
+    same = [Command(command_id=f"cmd-{i}", command_type="start_cycle", payload={}) for i in range(3)]
+    assert client.plc_write_command(same[0]) == PlcSendStatus.OK
+    assert client.plc_write_command(same[1]) == PlcSendStatus.OK
+    assert plc.writes[0] == (0, SPEC.length) and plc.writes[1][1] < SPEC.length  # only what changed
+
+    plc.db[:] = bytes(SPEC.length)  # DB reinitialised while the link was down
+    plc.stats.reconnects += 1
+    assert client.plc_write_command(same[2]) == PlcSendStatus.OK
+    assert plc.writes[2] == (0, SPEC.length)
+    assert bytes(plc.db[106:106 + plc.db[105]]) == b"cmd-2" and bytes(plc.db[2:4]) != bytes(2)
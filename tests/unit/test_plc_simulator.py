@@ -0,0 +1,119 @@
+import pytest
+
+from hubcontroller.adapters.plc.client import PlcClient
+from hubcontroller.adapters.plc.gateway.exec_gateway import AckGateway
+from hubcontroller.adapters.plc.protocol.decoders.frame_decoder import compile_decoder
+from hubcontroller.adapters.plc.protocol.decoders.hub_status_decoder import HubStatusDecoder
+from hubcontroller.adapters.plc.protocol.models.ack_snapshot import AckSnapshot
+from hubcontroller.adapters.plc.protocol.specs.ack_specs import build_ack_frame_spec
+from hubcontroller.adapters.plc.protocol.specs.control_specs import build_control_frame_spec
+from hubcontroller.adapters.plc.protocol.specs.hub_status_specs import build_hub_status_frame_spec
+from hubcontroller.adapters.plc.transport.plc_adapter import PlcAdapter
+from hubcontroller.config.settings import Settings
+from hubcontroller.domain.commands import Command
+from hubcontroller.domain.hub_state import ExecutionState, HubMode
+from hubcontroller.sim.plc_simulator import PlcBehaviour, SimulatedPlc, fixed
+
+SETTINGS = Settings.from_env({
+    "PLC_CONTROL_IP": "127.0.0.1", "PLC_CONTROL_READ": "1", "PLC_CONTROL_WRITE": "2", "PLC_PHOTOS_READ": "3",
+    "PLC_EXEC_READ": "4", "PLC_ACK_READ_DB": "5", "PLC_LIVEBIT": "6", "PLC_RESEND_READ": "7",
+    "HUB_NUMBER_OF_UAVS": "1", "HUB_NUMBER_OF_BATTERY": "2", "SERVER_MQTT_PORT": "1883",
+})
+
+
+class Clock:
+    def __init__(self):
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_hub(sim, clock):
+    adapter = PlcAdapter("127.0.0.1", 0, 1, 102, client_factory=sim.client, clock=clock)
+    ack_spec = build_ack_frame_spec(SETTINGS)
+    gateway = AckGateway(adapter, compile_decoder(ack_spec, AckSnapshot), ack_spec)
+    return adapter, PlcClient(adapter, build_control_frame_spec(SETTINGS)), gateway
+
+
+def send(client, n):
+    for i in range(n):
+        client.plc_write_command(Command(command_id=f"cmd-{i}", command_type="open_roof", payload={"mission_id": i}))
+
+
+def drain(gateway):
+    acks = []
+    snapshot = gateway.read_ack_snapshot()
+    while gateway.consume_ack_trigger(snapshot):
+        acks.append(snapshot)
+        snapshot = gateway.read_ack_snapshot()
+    return acks
+
+
+def test_acks_follow_accept_latency_and_queue_behind_the_mailbox(clock):
+    sim = SimulatedPlc.from_settings(SETTINGS, PlcBehaviour(accept_latency=fixed(0.5)), clock=clock)
+    adapter, client, gateway = make_hub(sim, clock)
+    send(client, 3)
+    assert sim.stats.commands == 3
+    assert drain(gateway) == []
+
+    clock.t += 0.5
+    acks = drain(gateway)
+    assert [(a.token, a.command, a.mission_id, a.error) for a in acks] == [
+        ("cmd-0", "open_roof", 0, 0), ("cmd-1", "open_roof", 1, 0), ("cmd-2", "open_roof", 2, 0)]
+    # exec frames queue behind the exec mailbox the hub has not cleared
+    assert sim.stats.acks == 3 and sim.stats.execs == 1 and sim.pending_frames == 2
+
+
+def test_scripted_drops_rejects_and_resends_are_reproducible(clock):
+    behaviour = dict(ack_drop_rate=0.2, reject_rate=0.2, resend_rate=0.2, seed=7)
+    runs = []
+    for _ in range(2):
+        sim = SimulatedPlc.from_settings(SETTINGS, PlcBehaviour(**behaviour), clock=clock)
+        adapter, client, gateway = make_hub(sim, clock)
+        send(client, 200)
+        runs.append(sim.stats)
+    stats = runs[0]
+    assert runs[0] == runs[1]
+    assert stats.dropped and stats.rejected and stats.resends
+    assert stats.commands == 200
+
+
+def test_cpu_stop_holds_frames_and_hub_status_tracks_execution(clock):
+    sim = SimulatedPlc.from_settings(SETTINGS, PlcBehaviour(execute_latency=fixed(1.0)), clock=clock)
+    adapter, client, gateway = make_hub(sim, clock)
+    hub_status_spec = build_hub_status_frame_spec(SETTINGS)
+    status = lambda: HubStatusDecoder(hub_status_spec).decode(
+        adapter.read_db(hub_status_spec.db_num, hub_status_spec.start, hub_status_spec.length))
+
+    send(client, 1)
+    assert len(drain(gateway)) == 1
+    assert status().execution_state == ExecutionState.EXECUTING
+
+    sim.stop_cpu()
+    clock.t += 2.0
+    assert adapter.read_db(4, 0, 2) == bytearray(2)  # exec frame not posted in STOP
+    sim.start_cpu()
+    assert adapter.read_db(4, 0, 2) == bytearray(b"\x00\x01")
+    assert status().execution_state == ExecutionState.IDLE
+
+    sim.set_hub_mode(HubMode.SAFETY_STOP)
+    assert status().mode == HubMode.SAFETY_STOP
+
+
+def test_livebit_toggles_and_unreachable_plc(clock):
+    sim = SimulatedPlc.from_settings(SETTINGS, clock=clock)
+    adapter, client, gateway = make_hub(sim, clock)
+    for bit in (b"\x01", b"\x00", b"\x00", b"\x01"):
+        adapter.write_db(SETTINGS.plc_livebit, 0, bit)
+    assert sim.stats.livebit_toggles == 3
+
+    sim.reachable = False
+    with pytest.raises(RuntimeError):
+        adapter.read_db(5, 0, 2)
+    assert adapter.stats.io_errors + adapter.stats.connect_failures >= 1
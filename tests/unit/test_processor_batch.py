@@ -0,0 +1,86 @@
+import pytest
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.domain import processor as processor_module
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry, TransitionResult
+
+
+class ScriptedPlc:
+    # command_id -> statuses for consecutive writes, the last one repeats; fails the rest of a batch
+    # after ERROR/TIMEOUT like PlcClient does
+    def __init__(self, outcomes=None):
+        self.outcomes = outcomes or {}
+        self.writes: list[str] = []
+
+    def plc_write_command(self, command):
+        self.writes.append(command.command_id)
+        outcomes = self.outcomes.get(command.command_id, [PlcSendStatus.OK])
+        return outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+
+    def plc_write_commands(self, commands):
+        statuses = []
+        for command in commands:
+            status = self.plc_write_command(command)
+            statuses.append(status)
+            if status in (PlcSendStatus.ERROR, PlcSendStatus.TIMEOUT):
+                statuses.extend([status] * (len(commands) - len(statuses)))
+                break
+        return statuses
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(processor_module.time, "sleep", slept.append)
+    return slept
+
+
+def make_processor(plc):
+    registry = CommandRegistry(clock=ManualClock())
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    handlers = {"start_cycle": None, "start_mission": None}
+    return registry, CommandProcessor(registry, handlers, state, Guard(), plc)
+
+
+def command(command_id, command_type="start_cycle"):
+    return Command(command_id=command_id, command_type=command_type, payload={})
+
+
+def test_batch_results_in_order_with_duplicates_and_guard_rejection(sleeps):
+    plc = ScriptedPlc()
+    registry, processor = make_processor(plc)
+    batch = [command("a"), command("b", "start_mission"), command("c"), command("a"), command("x", "unknown")]
+
+    results = processor.on_commands(batch)
+    assert results == [None, TransitionResult.OK, None, TransitionResult.DUPLICATE, TransitionResult.OK]
+    assert plc.writes == ["a", "c"]  # the second "a" is not written again
+    assert [registry.get_record(cid).status for cid in "abcx"] == [
+        CommandStatus.DISPATCHED, CommandStatus.REJECTED, CommandStatus.DISPATCHED, CommandStatus.REJECTED]
+    assert sleeps == []
+
+
+def test_failed_write_retries_the_failed_tail_together(sleeps):
+    plc = ScriptedPlc({"b": [PlcSendStatus.ERROR, PlcSendStatus.OK]})
+    registry, processor = make_processor(plc)
+
+    results = processor.on_commands([command(cid) for cid in "abcd"])
+    assert results == [None] * 4
+    assert plc.writes == ["a", "b", "b", "c", "d"]
+    assert sleeps == [processor.retry_base_delay_s]  # one backoff for the batch, not one per command
+    assert all(registry.get_record(cid).status == CommandStatus.DISPATCHED for cid in "abcd")
+
+
+def test_write_failing_every_attempt_leaves_commands_received(sleeps):
+    plc = ScriptedPlc({"a": [PlcSendStatus.TIMEOUT]})
+    registry, processor = make_processor(plc)
+
+    processor.on_commands([command("a"), command("b")])
+    assert plc.writes == ["a"] * processor.retry_attempts
+    assert len(sleeps) == processor.retry_attempts - 1
+    assert registry.get_record("b").status == CommandStatus.RECEIVED
@@ -0,0 +1,89 @@
+import pytest
+
+from hubcontroller.adapters.plc.transport.read_scheduler import S7_MAX_VARS, ReadScheduler
+
+
+class FakeMultiReader:
+    def __init__(self, dbs: dict[int, bytes], pdu: int = 240):
+        self._dbs = dbs
+        self._pdu = pdu
+        self.calls: list[list[tuple[int, int, int]]] = []
+
+    def pdu_length(self) -> int:
+        return self._pdu
+
+    def read_multi_db(self, items) -> None:
+        response = 14
+        for db_number, start, size, buffer, offset in items:
+            buffer[offset:offset + size] = self._dbs[db_number][start:start + size]
+            response += 4 + size + (size & 1)
+        assert len(items) <= S7_MAX_VARS
+        assert response <= self._pdu
+        self.calls.append([(db, start, size) for db, start, size, _, _ in items])
+
+
+def db_bytes(seed: int, n: int = 1000) -> bytes:
+    return bytes((seed + i) % 256 for i in range(n))
+
+
+def test_adjacent_areas_in_same_db_share_one_item():
+    dbs = {1: db_bytes(1)}
+    reader = FakeMultiReader(dbs)
+    scheduler = ReadScheduler(reader)
+    a = scheduler.register_area(1, 0, 10)
+    b = scheduler.register_area(1, 10, 20)
+
+    scheduler.poll()
+    assert reader.calls == [[(1, 0, 30)]]
+    assert bytes(a.view) == dbs[1][0:10]
+    assert bytes(b.view) == dbs[1][10:30]
+    # zero-copy: both views share the block buffer
+    assert a.view.obj is b.view.obj
+
+def test_small_areas_from_several_dbs_are_one_round_trip():
+    dbs = {n: db_bytes(n) for n in range(1, 7)}
+    reader = FakeMultiReader(dbs)
+    scheduler = ReadScheduler(reader)
+    handles = {n: scheduler.register_area(n, 4, 2) for n in dbs}
+
+    scheduler.poll()
+    assert scheduler.round_trips == 1
+    for n, handle in handles.items():
+        assert bytes(handle.view) == dbs[n][4:6]
+
+def test_large_area_is_split_into_pdu_sized_items():
+    dbs = {1: db_bytes(1), 2: db_bytes(2)}
+    reader = FakeMultiReader(dbs, pdu=240)
+    scheduler = ReadScheduler(reader)
+    big = scheduler.register_area(1, 0, 600)
+    small = scheduler.register_area(2, 100, 50)
+
+    scheduler.poll()
+    assert scheduler.round_trips == 3
+    assert bytes(big.view) == dbs[1][0:600]
+    assert bytes(small.view) == dbs[2][100:150]
+
+def test_views_see_fresh_data_on_each_poll():
+    dbs = {1: bytearray(db_bytes(1))}
+    scheduler = ReadScheduler(FakeMultiReader(dbs))
+    handle = scheduler.register_area(1, 0, 4)
+    scheduler.poll()
+    dbs[1][0] = 0xAA
+    scheduler.poll()
+    assert handle.view[0] == 0xAA
+
+def test_rejects_empty_area():
+    with pytest.raises(ValueError):
+        ReadScheduler(FakeMultiReader({})).register_area(1, 0, 0)
+
+def test_view_is_usable_before_the_first_poll():
+    dbs = {1: db_bytes(1)}
+    reader = FakeMultiReader(dbs)
+    scheduler = ReadScheduler(reader)
+    a = scheduler.register_area(1, 0, 4)
+    assert bytes(a.view) == b"\x00" * 4
+    b = scheduler.register_area(1, 4, 4)
+    assert reader.calls == []
+
+    scheduler.poll()
+    assert bytes(a.view) == dbs[1][0:4] and bytes(b.view) == dbs[1][4:8]
@@ -0,0 +1,40 @@
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.compact_registry import CompactCommandRegistry
+from hubcontroller.domain.registry import CommandRegistry, TransitionResult
+
+
+def make_command(command_id: str) -> Command:
+    return Command(command_id=command_id, command_type="test", payload={})
+
+
+def test_on_received_many_matches_sequential_results():
+    for registry_cls in (CommandRegistry, CompactCommandRegistry):
+        registry = registry_cls(clock=ManualClock())
+        registry.on_received(make_command("old"))
+        batch = [make_command(cid) for cid in ("a", "old", "b", "a")]
+
+        transitions = registry.on_received_many(batch)
+        assert [t.result for t in transitions] == [TransitionResult.OK, TransitionResult.DUPLICATE,
+                                                   TransitionResult.OK, TransitionResult.DUPLICATE]
+        assert transitions[3].record is registry.get_record("a")
+        assert registry.get_record("a").received_ns == registry.get_record("b").received_ns
+
+
+def test_on_dispatched_many_keeps_order_and_per_command_results():
+    registry = CommandRegistry(clock=ManualClock())
+    registry.on_received_many([make_command(cid) for cid in ("a", "b", "c")])
+    registry.on_rejected("c")
+
+    transitions = registry.on_dispatched_many(["a", "missing", "b", "c", "a"])
+    assert [t.result for t in transitions] == [TransitionResult.OK, TransitionResult.UNKNOWN_COMMAND, TransitionResult.OK,
+                                               TransitionResult.TERMINAL, TransitionResult.DUPLICATE]
+    assert registry.get_record("b").status == CommandStatus.DISPATCHED
+    assert registry.in_flight_count == 2
+
+
+def test_on_received_many_respects_max_entries():
+    registry = CommandRegistry(clock=ManualClock(), max_entries=2)
+    registry.on_received_many([make_command(cid) for cid in ("a", "b", "c")])
+    assert registry.get_record("a") is None
+    assert registry.eviction_stats.capacity == 1
@@ -0,0 +1,141 @@
+import pytest
+
+from hubcontroller.adapters.plc.commands.commands import PlcSendStatus
+from hubcontroller.domain.async_processor import AsyncCommandProcessor
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.guard import Guard
+from hubcontroller.domain.hub_state import ExecutionState, HubMode, HubStateSnapshot
+from hubcontroller.domain.hub_state_provider import HubStateProvider
+from hubcontroller.domain.processor import CommandProcessor
+from hubcontroller.domain.registry import CommandRegistry, TransitionResult
+from hubcontroller.domain.retry_scheduler import RetryScheduler
+
+
+class FlakyPlc:
+    def __init__(self, outcomes):
+        self.outcomes = outcomes  # command_id -> list of statuses, last one repeats
+        self.writes = []
+
+    def write(self, command):
+        self.writes.append(command.command_id)
+        outcomes = self.outcomes[command.command_id]
+        return outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+
+
+def received(registry, command_id):
+    command = Command(command_id=command_id, command_type="start_cycle", payload={})
+    registry.on_received(command)
+    return command
+
+
+def test_retries_with_backoff_until_dispatched():
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock)
+    plc = FlakyPlc({"c1": [PlcSendStatus.ERROR, PlcSendStatus.TIMEOUT, PlcSendStatus.OK]})
+    scheduler = RetryScheduler(registry, plc.write, base_delay_s=0.1)
+    assert scheduler.schedule(received(registry, "c1"))
+
+    assert scheduler.run_due() == 0  # nothing due yet, no sleeping either
+    clock.advance(0.1)
+    assert scheduler.run_due() == 1
+    assert registry.get_record("c1").status == CommandStatus.RECEIVED
+    clock.advance(0.1)
+    assert scheduler.run_due() == 0  # second retry backs off 0.2 s
+    clock.advance(0.1)
+    assert scheduler.run_due() == 1
+    clock.advance(0.4)
+    assert scheduler.run_due() == 1
+    assert registry.get_record("c1").status == CommandStatus.DISPATCHED
+    assert len(scheduler) == 0 and scheduler.stats.dispatched == 1
+
+
+def test_gives_up_at_dispatch_timeout_and_caps_pending_retries():
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock)
+    registry.dispatch_timeout_s = 1.0
+    plc = FlakyPlc({"c1": [PlcSendStatus.ERROR], "c2": [PlcSendStatus.ERROR], "c3": [PlcSendStatus.INVALID_PARAMETERS]})
+    scheduler = RetryScheduler(registry, plc.write, max_in_flight=2, max_delay_s=0.4)
+    assert scheduler.schedule(received(registry, "c1"))
+    assert scheduler.schedule(received(registry, "c3"))
+    assert not scheduler.schedule(received(registry, "c2"))
+    assert scheduler.stats.dropped == 1
+
+    for _ in range(20):
+        clock.advance(0.1)
+        scheduler.run_due()
+    assert registry.get_record("c1").status == CommandStatus.TIMEOUT
+    assert registry.get_record("c1").timeout_ns == 1_000_000_000
+    assert registry.get_record("c3").status == CommandStatus.REJECTED
+    assert registry.get_record("c2").status == CommandStatus.RECEIVED
+    assert plc.writes.count("c1") == 3  # 0.1, 0.3, 0.7 (0.4 cap), then the deadline at 1.0
+    assert len(scheduler) == 0
+
+
+def test_max_per_tick_bounds_writes():
+    clock = ManualClock()
+    registry = CommandRegistry(clock=clock)
+    plc = FlakyPlc({f"c{i}": [PlcSendStatus.OK] for i in range(6)})
+    scheduler = RetryScheduler(registry, plc.write, max_per_tick=4)
+    for i in range(6):
+        scheduler.schedule(received(registry, f"c{i}"))
+    clock.advance(0.1)
+    assert scheduler.run_due() == 4
+    assert scheduler.run_due() == 2
+    assert registry.in_flight_count == 6
+
+
+class FlakyPlcClient(FlakyPlc):
+    def plc_write_command(self, command):
+        return self.write(command)
+
+    def plc_write_commands(self, commands):
+        return [self.write(command) for command in commands]
+
+
+def make_processor(clock, plc, **scheduler_kwargs):
+    registry = CommandRegistry(clock=clock)
+    scheduler = RetryScheduler(registry, plc.plc_write_command, **scheduler_kwargs)
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    return registry, CommandProcessor(registry, {"start_cycle": None}, state, Guard(), plc, retry_scheduler=scheduler)
+
+
+def command(command_id):
+    return Command(command_id=command_id, command_type="start_cycle", payload={})
+
+
+def test_processor_retries_failed_writes_from_tick():
+    clock = ManualClock()
+    plc = FlakyPlcClient({"c1": [PlcSendStatus.ERROR, PlcSendStatus.OK], "c2": [PlcSendStatus.OK]})
+    registry, processor = make_processor(clock, plc)
+
+    assert processor.on_command(command("c1")) is None
+    assert processor.on_commands([command("c2")]) == [None]
+    assert registry.get_record("c1").status == CommandStatus.RECEIVED
+    processor.tick()
+    assert plc.writes == ["c1", "c2"]  # nothing due yet
+    clock.advance(0.1)
+    processor.tick()
+    assert plc.writes == ["c1", "c2", "c1"]
+    assert registry.get_record("c1").status == CommandStatus.DISPATCHED
+
+
+def test_processor_times_out_commands_the_full_scheduler_cannot_take():
+    clock = ManualClock()
+    plc = FlakyPlcClient({cid: [PlcSendStatus.ERROR] for cid in ("c1", "c2", "c3")})
+    registry, processor = make_processor(clock, plc, max_in_flight=1)
+
+    assert processor.on_command(command("c1")) is None
+    assert processor.on_command(command("c2")) == TransitionResult.OK
+    assert processor.on_commands([command("c3")]) == [TransitionResult.OK]
+    assert registry.get_record("c1").status == CommandStatus.RECEIVED  # waiting for its retry
+    assert registry.get_record("c2").status == CommandStatus.TIMEOUT
+    assert registry.get_record("c3").status == CommandStatus.TIMEOUT
+
+
+def test_async_processor_rejects_a_retry_scheduler():
+    registry = CommandRegistry(clock=ManualClock())
+    state = HubStateProvider(HubStateSnapshot(mode=HubMode.CYCLE_READY, execution_state=ExecutionState.IDLE))
+    scheduler = RetryScheduler(registry, lambda command: PlcSendStatus.OK)
+    with pytest.raises(ValueError):
+        AsyncCommandProcessor(registry, {}, state, Guard(), None, retry_scheduler=scheduler)
@@ -0,0 +1,65 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from hubcontroller.adapters.plc.protocol.specs import ack_specs, frame_spec
+from hubcontroller.config import settings as settings_module
+from hubcontroller.config.settings import ConfigError, Settings, configure
+
+VALID = {
+    "PLC_CONTROL_IP": "192.168.0.10", "PLC_CONTROL_READ": "1", "PLC_CONTROL_WRITE": "2", "PLC_PHOTOS_READ": "3",
+    "PLC_EXEC_READ": "4", "PLC_ACK_READ_DB": "5", "PLC_LIVEBIT": "6", "PLC_RESEND_READ": "7",
+    "HUB_NUMBER_OF_UAVS": "1", "HUB_NUMBER_OF_BATTERY": "2", "SERVER_MQTT_PORT": "1883",
+}
+
+
+def test_settings_parsed_and_typed():
+    settings = Settings.from_env({**VALID, "SERVER_MQTT_ACK_TOPIC": "hub/ack"})
+    assert settings.plc_ack_read_db == 5 and settings.mqtt_server_port == 1883
+    assert settings.hub_device_ip == "192.168.0.10"
+    assert settings.ack_topic == "hub/ack" and settings.app_topic is None
+
+
+def test_all_errors_reported_in_one_pass():
+    environ = {**VALID, "PLC_CONTROL_READ": "abc", "SERVER_MQTT_PORT": "70000", "PLC_LIVEBIT": " "}
+    del environ["PLC_CONTROL_IP"]
+    with pytest.raises(ConfigError) as error:
+        Settings.from_env(environ)
+    assert error.value.errors == [
+        "PLC_CONTROL_IP: missing",
+        "PLC_CONTROL_READ='abc': invalid literal for int() with base 10: 'abc'",
+        "PLC_LIVEBIT: missing",
+        "SERVER_MQTT_PORT='70000': 70000 is not a TCP port (1..65535)",
+    ]
+
+
+def test_importing_specs_reads_no_config():
+    # a fresh interpreter: in this one another test may have built the spec already
+    code = "from hubcontroller.adapters.plc.protocol.specs import ack_specs; assert 'ACK_FRAME_SPEC' not in vars(ack_specs)"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+def test_frame_specs_built_on_first_access(monkeypatch):
+    assert ack_specs.build_ack_frame_spec(Settings.from_env(VALID)).db_num == 5
+
+    namespace = {}
+    getattr_ = frame_spec.lazy_frame_specs("specs", namespace, {"SPEC": ack_specs.build_ack_frame_spec})
+    monkeypatch.setattr(settings_module, "_settings", Settings.from_env({**VALID, "PLC_ACK_READ_DB": "42"}))
+    spec = getattr_("SPEC")
+    assert spec.db_num == 42 and namespace["SPEC"] is spec
+    with pytest.raises(AttributeError):
+        getattr_("OTHER")
+
+
+def test_configure_rebuilds_cached_specs():
+    try:
+        configure(Settings.from_env(VALID))
+        assert ack_specs.ACK_FRAME_SPEC.db_num == 5
+        configure(Settings.from_env({**VALID, "PLC_ACK_READ_DB": "42"}))
+        assert ack_specs.ACK_FRAME_SPEC.db_num == 42
+    finally:
+        configure(None)
+    assert "ACK_FRAME_SPEC" not in vars(ack_specs)
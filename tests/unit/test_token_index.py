@@ -0,0 +1,77 @@
+import random
+from collections import OrderedDict
+
+from hubcontroller.adapters.persistence.token_index import TokenIndex
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.domain.clock import ManualClock
+from hubcontroller.domain.eviction import GcMode
+from hubcontroller.domain.exec.exec_registry import ExecRegistry
+
+
+def make_exec(token: str) -> ExecSnapshot:
+    return ExecSnapshot(trigger=1, command="start_cycle", error=0, message="", token=token, mission_id=0)
+
+
+def test_tokens_survive_restart_and_keep_ttl(tmp_path):
+    clock = ManualClock()
+    index = TokenIndex(tmp_path / "exec.tix", capacity=16)
+    registry = ExecRegistry(ttl_s=10.0, clock=clock, store=index)
+    registry.store_exec(make_exec("a"))
+    clock.advance(6.0)
+    registry.store_exec(make_exec("b"))
+    index.close()
+
+    index = TokenIndex(tmp_path / "exec.tix", capacity=16)
+    registry = ExecRegistry(ttl_s=10.0, clock=clock, store=index)
+    assert registry.is_duplicate(make_exec("a"))
+    assert registry.is_duplicate(make_exec("b"))
+    assert not registry.is_duplicate(make_exec("c"))
+    assert index.bloom_rejects >= 1
+
+    clock.advance(4.0)
+    assert registry.gc_ttl() == 1
+    assert not registry.is_duplicate(make_exec("a"))
+    assert registry.is_duplicate(make_exec("b"))
+    assert list(index.items()) == [("b", ("start_cycle", 6_000_000_000))]
+
+
+def test_capacity_bounds_the_index(tmp_path):
+    index = TokenIndex(tmp_path / "exec.tix", capacity=2)
+    registry = ExecRegistry(clock=ManualClock(), store=index, gc_mode=GcMode.SCAN)
+    assert registry.max_entries == 2
+    for token in ("a", "b", "c"):
+        registry.store_exec(make_exec(token))
+    assert list(index.keys()) == ["b", "c"]
+    assert registry.eviction_stats.capacity == 1
+    size = (tmp_path / "exec.tix").stat().st_size
+    index.close()
+    assert list(TokenIndex(tmp_path / "exec.tix", capacity=2).keys()) == ["b", "c"]
+    assert (tmp_path / "exec.tix").stat().st_size == size
+
+
+def test_matches_ordered_dict_under_random_operations(tmp_path):
+    rng = random.Random(7)
+    index = TokenIndex(tmp_path / "exec.tix", capacity=64)
+    model: OrderedDict[str, tuple[str, int]] = OrderedDict()
+    for step in range(3000):
+        token = f"t{rng.randrange(120)}"
+        op = rng.random()
+        if op < 0.5:
+            if token not in model and len(model) >= 64:
+                model.popitem(last=False)
+            model[token] = ("cmd", step)
+            index[token] = ("cmd", step)
+        elif op < 0.7 and token in model:
+            model.move_to_end(token)
+            index.move_to_end(token)
+        elif op < 0.9 and token in model:
+            del model[token]
+            del index[token]
+        elif model:
+            assert index.popitem(last=False) == model.popitem(last=False)
+        assert (token in index) == (token in model)
+    assert list(index.items()) == list(model.items())
+    index.close()
+    # order on reopen comes from the stored timestamps
+    reopened = TokenIndex(tmp_path / "exec.tix", capacity=64)
+    assert sorted(reopened.items()) == sorted(model.items())
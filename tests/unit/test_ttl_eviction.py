@@ -0,0 +1,112 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from hubcontroller.adapters.plc.protocol.models.exec_snapshot import ExecSnapshot
+from hubcontroller.domain.commands import Command, CommandStatus
+from hubcontroller.domain.eviction import GcMode
+from hubcontroller.domain.exec.exec_registry import ExecRegistry
+from hubcontroller.domain.registry import CommandRegistry
+
+def make_command(command_id: str) -> Command:
+    return Command(
+        command_id= command_id,
+        command_type="test",
+        payload= {'x':'s'}
+        )
+
+def make_exec(token: str) -> ExecSnapshot:
+    return ExecSnapshot(trigger=1, command="test", error=0, message="", token=token, mission_id=0)
+
+def test_ordered_gc_evicts_only_expired_prefix():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = CommandRegistry(clock=fake_clock.now, ttl_s=10.0)
+    for i in range(3):
+        registry.on_received(make_command(f"old{i}"))
+    fake_clock.advance(5.0)
+    registry.on_received(make_command("new"))
+
+    fake_clock.advance(5.0)
+    assert registry.gc_ttl() == 3
+    assert registry.get_record("old0") is None
+    assert registry.get_record("new") is not None
+    assert registry.eviction_stats.ttl == 3
+
+def test_scan_and_ordered_gc_agree():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    scan = CommandRegistry(clock=fake_clock.now, ttl_s=10.0, gc_mode=GcMode.SCAN)
+    ordered = CommandRegistry(clock=fake_clock.now, ttl_s=10.0, gc_mode=GcMode.ORDERED)
+    for i in range(10):
+        scan.on_received(make_command(f"cmd{i}"))
+        ordered.on_received(make_command(f"cmd{i}"))
+        fake_clock.advance(1.0)
+
+    fake_clock.advance(3.0)
+    assert scan.gc_ttl() == ordered.gc_ttl() == 4
+
+def test_command_registry_max_entries_evicts_oldest():
+    registry = CommandRegistry(max_entries=2)
+    for i in range(4):
+        registry.on_received(make_command(f"cmd{i}"))
+
+    assert registry.get_record("cmd0") is None
+    assert registry.get_record("cmd1") is None
+    assert registry.get_record("cmd3") is not None
+    assert registry.eviction_stats.capacity == 2
+    assert registry.eviction_stats.ttl == 0
+
+def test_command_registry_max_entries_evicts_terminal_before_in_flight():
+    registry = CommandRegistry(max_entries=3)
+    for cid in ("cmd0", "cmd1", "cmd2"):
+        registry.on_received(make_command(cid))
+    registry.on_dispatched("cmd0")
+    registry.on_dispatched("cmd1")
+    registry.on_rejected("cmd2")
+
+    registry.on_received(make_command("cmd3"))
+    assert registry.get_record("cmd2") is None
+    assert registry.get_record("cmd0").status == CommandStatus.DISPATCHED
+    assert registry.eviction_stats.open == 0
+
+    # nothing terminal left: the oldest open record has to go
+    registry.on_received(make_command("cmd4"))
+    assert registry.get_record("cmd0") is None
+    assert registry.in_flight_count == 1
+    assert registry.eviction_stats.capacity == 2 and registry.eviction_stats.open == 1
+
+def test_command_registry_rejects_max_entries_below_one():
+    with pytest.raises(ValueError):
+        CommandRegistry(max_entries=0)
+
+def test_exec_registry_restore_refreshes_ttl():
+    fake_clock = FakeClock(datetime.now(timezone.utc))
+    registry = ExecRegistry(ttl_s=10.0, clock=fake_clock.now)
+    registry.store_exec(make_exec("a"))
+    registry.store_exec(make_exec("b"))
+    fake_clock.advance(6.0)
+    registry.store_exec(make_exec("a"))
+
+    fake_clock.advance(4.0)
+    assert registry.gc_ttl() == 1
+    assert registry.is_duplicate(make_exec("a"))
+    assert not registry.is_duplicate(make_exec("b"))
+
+def test_exec_registry_max_entries():
+    registry = ExecRegistry(max_entries=1)
+    registry.store_exec(make_exec("a"))
+    registry.store_exec(make_exec("b"))
+
+    assert not registry.is_duplicate(make_exec("a"))
+    assert registry.is_duplicate(make_exec("b"))
+    assert registry.eviction_stats.capacity == 1
+
+
+class FakeClock:
+    def __init__(self, start: datetime):
+        self._t = start
+
+    def now(self) -> datetime:
+        return self._t
+
+    def advance(self, second: float) -> None:
+        self._t = self._t + timedelta(seconds=second)